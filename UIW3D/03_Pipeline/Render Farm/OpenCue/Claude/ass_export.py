@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+#  Copyright Contributors to the OpenCue Project
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Export per-frame Arnold .ass files for the kick render stage.
+
+Runs in mayapy on a render node as the first layer of an export-once /
+render-many job (see job_spec.buildAssLayers). It opens the scene once per
+chunk and writes one .ass per frame. File paths in the scene are mapped to
+render-node paths first, so kick on any host finds the textures. Each file is
+written under a temporary name and renamed when complete, so a retried
+chunk never leaves a half-written .ass for kick.
+
+--frames takes the chunk's frame spec (#FRAMESPEC#), so a chunk of a
+stepped or listed frame set exports only its own frames.
+
+Usage:
+    mayapy ass_export.py --scene <scene.ma> --frames 1-10
+        --output <dir/name.####.ass> [--camera cam] [--render-layer layer]
+"""
+
+import argparse
+import os
+import time
+
+import frame_set
+import path_mapping
+import preflight
+
+# Padding of the frame number replacing #### in --output (kick reads
+# #ZFRAME#, which OpenCue pads to four digits)
+FRAME_PADDING = 4
+
+
+def framePath(pattern, frame):
+    return pattern.replace("#" * FRAME_PADDING, str(frame).zfill(FRAME_PADDING))
+
+
+def mapScenePaths(cmds, mapper):
+    """Point every file attribute at the path render nodes use.
+
+    Only the open session changes; the scene file is never saved. A plug
+    that can't be set (locked, or from a reference) keeps its path and is
+    reported; the rest of the chunk still exports.
+    """
+    count = 0
+    for path, sources in preflight.collectDependencies().items():
+        mapped = mapper.map(path)
+        if mapped == path:
+            continue
+        for source in sources:
+            if "." not in source:
+                continue
+            node = source.split(".", 1)[0]
+            # A new path re-runs the colour space rules; keep the scene's.
+            colorSpace = None
+            if cmds.attributeQuery("colorSpace", node=node, exists=True):
+                colorSpace = cmds.getAttr(node + ".colorSpace")
+            try:
+                cmds.setAttr(source, mapped, type="string")
+                if colorSpace:
+                    cmds.setAttr(node + ".colorSpace", colorSpace, type="string")
+            except RuntimeError as e:
+                print("Could not map {}: {}".format(source, e), flush=True)
+                continue
+            count += 1
+    return count
+
+
+def exportFrames(scene, frames, output, camera=None, renderLayer=None, show=None):
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+    import maya.cmds as cmds
+
+    cmds.loadPlugin("mtoa", quiet=True)
+    cmds.file(scene, open=True, force=True)
+    if renderLayer:
+        cmds.editRenderLayerGlobals(currentRenderLayer=renderLayer)
+    print("Mapped {} file path(s)".format(mapScenePaths(cmds, path_mapping.forShow(show))),
+          flush=True)
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    options = {"cam": camera} if camera else {}
+    for frame in frames:
+        frameStart = time.time()
+        cmds.currentTime(frame)
+        path = framePath(output, frame)
+        tmpPath = path + ".tmp.ass"
+        cmds.arnoldExportAss(filename=tmpPath, **options)
+        os.replace(tmpPath, path)
+        print("Exported frame {} to {} in {:.1f}s".format(frame, path, time.time() - frameStart),
+              flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export per-frame Arnold .ass files")
+    parser.add_argument("--scene", required=True)
+    parser.add_argument("--frames", required=True, help="Frame spec, e.g. 1-10 or 1-17x4")
+    parser.add_argument("--output", required=True,
+                        help="Output path with #### for the frame number")
+    parser.add_argument("--camera")
+    parser.add_argument("--render-layer")
+    parser.add_argument("--show", help="Show whose path mapping rules apply")
+    args = parser.parse_args()
+
+    if "#" * FRAME_PADDING not in args.output:
+        parser.error("--output needs #### for the frame number")
+    try:
+        frames = frame_set.FrameSet.parse(args.frames)
+    except ValueError as e:
+        parser.error(str(e))
+    exportFrames(args.scene, frames, args.output, args.camera, args.render_layer, args.show)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+"""
+Throughput benchmark for maya_submit_worker.py --batch.
+
+Submits N generated job-data records against a fake Cuebot that sleeps for
+a fixed RPC latency, at several concurrency levels, and compares the result
+with N one-shot worker invocations (interpreter cold start + one RPC each).
+The fake replaces the opencue package, so this runs without a farm.
+
+Usage:
+    python benchmarks/bench_batch_submit.py [--jobs 200] [--latency 0.05]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeJob(object):
+    def __init__(self, name):
+        self._name = name
+
+    def name(self):
+        return self._name
+
+    def id(self):
+        return "00000000-0000-0000-0000-{:012d}".format(abs(hash(self._name)) % 10 ** 12)
+
+
+class FakeCuebot(object):
+    """Stands in for opencue.api with a fixed per-RPC latency."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.launched = 0
+        self.lock = threading.Lock()
+
+    def launchSpecAndWait(self, spec):
+        time.sleep(self.latency)
+        with self.lock:
+            self.launched += 1
+        start = spec.index('<job name="') + len('<job name="')
+        return [FakeJob(spec[start:spec.index('"', start)])]
+
+
+def installFakeOpencue(cuebot):
+    """Register fake opencue modules before the worker is imported."""
+    opencue = types.ModuleType("opencue")
+    opencue.api = cuebot
+    opencue.exception = types.SimpleNamespace(EntityNotFoundException=LookupError)
+    cuebotModule = types.ModuleType("opencue.cuebot")
+    cuebotModule.Cuebot = types.SimpleNamespace(setHosts=lambda hosts: None)
+    sys.modules["opencue"] = opencue
+    sys.modules["opencue.cuebot"] = cuebotModule
+
+
+def makeRecords(count):
+    for i in range(count):
+        jobData = {
+            "name": "wedge_{:04d}".format(i),
+            "show": "testing",
+            "shot": "turntable",
+            "username": "bench",
+            "layers": [{
+                "name": "render",
+                "layerType": "Maya",
+                "layerRange": "1-100",
+                "chunk": 5,
+                "services": ["maya"],
+                "cmd": {
+                    "mayaFile": "S:/shows/testing/turntable/wedge_{:04d}.ma".format(i),
+                    "camera": "renderCam",
+                    "renderer": "arnold",
+                },
+            }],
+        }
+        yield "record{}".format(i), jobData, None
+
+
+def measureColdStart(samples=5):
+    """Median wall time to start and exit a bare Python interpreter."""
+    times = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="Fake Cuebot RPC latency in seconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    cuebot = FakeCuebot(args.latency)
+    installFakeOpencue(cuebot)
+    import maya_submit_worker
+
+    coldStart = measureColdStart()
+    oneShot = args.jobs * (coldStart + args.latency)
+    print("{} jobs, {:.0f} ms fake RPC latency, {:.0f} ms bare interpreter start".format(
+        args.jobs, args.latency * 1000, coldStart * 1000
+    ))
+    print("{:<22}{:>10}{:>12}".format("mode", "seconds", "jobs/s"))
+    print("{:<22}{:>10.2f}{:>12.1f}  (estimated, excludes opencue import)".format(
+        "one-shot x N", oneShot, args.jobs / oneShot
+    ))
+
+    for concurrency in args.concurrency:
+        cuebot.launched = 0
+        start = time.perf_counter()
+        submitted, failed = maya_submit_worker.submitBatch(
+            makeRecords(args.jobs), concurrency
+        )
+        elapsed = time.perf_counter() - start
+        assert submitted == args.jobs and not failed, (submitted, failed)
+        print("{:<22}{:>10.2f}{:>12.1f}".format(
+            "batch concurrency={}".format(concurrency), elapsed, args.jobs / elapsed
+        ))
+
+
+if __name__ == "__main__":
+    main()
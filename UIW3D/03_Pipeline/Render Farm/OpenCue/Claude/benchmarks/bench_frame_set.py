@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""
+Preview-split benchmark for frame_set.FrameSet.
+
+Splits stepped frame ranges of 1,000 to 10,000,000 frames into key frames and
+the rest, then writes both as OpenCue frame specs, as
+job_spec.buildPreviewLayers does. It compares FrameSet, which works on the
+parsed progressions, with expanding the range to a list of frames, removing
+the key frames and compressing the list back into a spec.
+
+Usage:
+    python benchmarks/bench_frame_set.py [--sizes 1000 100000 10000000] [--step 4]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import frame_set
+
+
+def expandedSplit(expression, keyCount):
+    """Key frames and rest spec from a fully expanded frame list."""
+    frames = sorted(set(frame_set.FrameSet.parse(expression)))
+    total = len(frames)
+    keys = sorted(set(
+        frames[int(round(i * (total - 1) / float(keyCount - 1)))] for i in range(keyCount)
+    ))
+    removed = set(keys)
+    rest = [frame for frame in frames if frame not in removed]
+    return keys, frame_set.FrameSet.fromFrames(rest).toSpec()
+
+
+def frameSetSplit(expression, keyCount):
+    frames = frame_set.FrameSet.parse(expression)
+    keys = frames.keyFrames(keyCount)
+    return keys, frames.without(keys).toSpec()
+
+
+def measure(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 10000000])
+    parser.add_argument("--step", type=int, default=4)
+    parser.add_argument("--keys", type=int, default=3)
+    args = parser.parse_args()
+
+    print("{:>10}  {:>14}{:>14}".format("frames", "expanded ms", "frameset ms"))
+    for size in args.sizes:
+        expression = "1-{}x{}".format(size * args.step, args.step)
+        expandedTime, expanded = measure(lambda: expandedSplit(expression, args.keys))
+        frameSetTime, split = measure(lambda: frameSetSplit(expression, args.keys))
+        assert split == expanded, "results differ"
+        print("{:>10}  {:>14.2f}{:>14.3f}".format(size, expandedTime * 1000, frameSetTime * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+Build-time and memory benchmark for job_spec.buildJobSpec.
+
+Generates job data with 10 to 10,000 layers (as a camera x render layer x
+AOV matrix would) and reports build time and peak traced memory for the
+streaming JobSpecWriter next to the previous string-concatenation builder,
+kept here as a reference.
+
+Usage:
+    python benchmarks/bench_job_spec.py [--sizes 10 100 1000 10000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import job_spec
+
+
+def legacyBuildJobSpec(jobData):
+    """The pre-JobSpecWriter builder: += per layer, no escaping."""
+    layers_xml = ""
+    for layerData in jobData.get("layers", []):
+        services = layerData.get("services", ["maya"])
+        layers_xml += """
+      <layer name="{name}" type="Render">
+        <cmd>{cmd}</cmd>
+        <range>{range}</range>
+        <chunk>{chunk}</chunk>
+        <services>
+          <service>{service}</service>
+        </services>
+      </layer>""".format(
+            name=layerData.get("name", "render"),
+            cmd=job_spec.buildMayaCmd(layerData),
+            range=layerData.get("layerRange", "1-1"),
+            chunk=layerData.get("chunk", 1),
+            service=services[0] if services else "maya"
+        )
+
+    return """<?xml version="1.0"?>
+<spec>
+  <job name="{jobName}">
+    <layers>{layers}
+    </layers>
+  </job>
+</spec>""".format(jobName=jobData.get("name", "maya_job"), layers=layers_xml)
+
+
+def makeJobData(layerCount):
+    layers = []
+    for i in range(layerCount):
+        layers.append({
+            "name": "rl{:03d}_cam{:02d}_aov{:02d}".format(i // 100, (i // 10) % 10, i % 10),
+            "layerType": "Maya",
+            "layerRange": "1001-1240",
+            "chunk": 5,
+            "services": ["maya"],
+            "cmd": {
+                "mayaFile": "S:/shows/R&D/seq010/sh{:04d}/lighting_v012.ma".format(i),
+                "camera": "shotCam{}".format(i % 10),
+                "renderer": "arnold",
+            },
+        })
+    return {"name": "bench", "show": "testing", "shot": "shot01",
+            "username": "bench", "layers": layers}
+
+
+def measure(builder, jobData, repeat):
+    """Return (best seconds, peak traced bytes, spec size) for a builder."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        builder(jobData)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    spec = builder(jobData)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, len(spec)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print("{:>8} {:>12} {:>12} {:>12} {:>12} {:>10}".format(
+        "layers", "writer ms", "legacy ms", "writer MiB", "legacy MiB", "spec KiB"
+    ))
+    for size in args.sizes:
+        jobData = makeJobData(size)
+        newTime, newPeak, specSize = measure(job_spec.buildJobSpec, jobData, args.repeat)
+        oldTime, oldPeak, _ = measure(legacyBuildJobSpec, jobData, args.repeat)
+        print("{:>8} {:>12.2f} {:>12.2f} {:>12.2f} {:>12.2f} {:>10.0f}".format(
+            size, newTime * 1000, oldTime * 1000,
+            newPeak / 2.0 ** 20, oldPeak / 2.0 ** 20, specSize / 1024.0
+        ))
+
+
+if __name__ == "__main__":
+    main()
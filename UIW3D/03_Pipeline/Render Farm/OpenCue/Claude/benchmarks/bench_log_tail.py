@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Last-lines benchmark for log_tail.lastLines.
+
+Writes a synthetic frame log of each size and reads its last N lines the
+way an editor or a naive script does, by reading the whole file and
+splitting it, then with log_tail.lastLines. This runs on local disk, where
+both reads are cheap per byte; over SMB the whole-file read also pays for
+moving every byte across the network.
+
+Usage:
+    python benchmarks/bench_log_tail.py [--sizes 10 100 500] [--lines 50]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import log_tail
+
+LINE = b"00:12:34  1024MB         | [ray] texture cache stats: 4812 reads, 12 misses\n"
+
+
+def writeLog(path, megabytes):
+    chunk = LINE * (1024 * 1024 // len(LINE))
+    with open(path, "wb") as f:
+        for _ in range(megabytes):
+            f.write(chunk)
+        f.write(b"render done in 0:41.12\n")
+
+
+def wholeFile(path, count):
+    with open(path, "rb") as f:
+        lines = f.read().splitlines()
+    return [log_tail.decode(line) for line in lines[-count:]]
+
+
+def measure(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500],
+                        help="Log sizes in MB")
+    parser.add_argument("--lines", type=int, default=50)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    print("{:>8}  {:>14}{:>14}".format("MB", "whole ms", "tail ms"))
+    for size in args.sizes:
+        path = os.path.join(directory, "job.0001-render.rqlog")
+        writeLog(path, size)
+        wholeTime, whole = measure(lambda: wholeFile(path, args.lines))
+        tailTime, tail = measure(lambda: log_tail.lastLines(path, args.lines))
+        assert tail == whole, "results differ"
+        print("{:>8}  {:>14.2f}{:>14.3f}".format(size, wholeTime * 1000, tailTime * 1000))
+        os.remove(path)
+    os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""
+Mapping-time benchmark for path_mapping.PathMapper.
+
+Maps 1,000 to 100,000 texture paths (as a pre-flight dependency list would
+hold) through a rule set of mapped drives, Linux mounts and per-show roots.
+It compares the prefix trie (cold, then with its per-path cache warm)
+against a linear scan that tries every rule's startswith in order, the
+shape the old single-prefix convert_to_render_path would grow into with
+more rules.
+
+Usage:
+    python benchmarks/bench_path_mapping.py [--sizes 1000 10000 100000] [--shows 50]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import path_mapping
+
+DRIVES = "PQRSTUVW"
+
+
+def makeRules(shows):
+    rules = []
+    for drive in DRIVES:
+        rules.append({"from": "{}:/".format(drive), "to": "//10.40.14.25/{}/".format(drive)})
+        rules.append({"from": "/mnt/{}/".format(drive.lower()),
+                      "to": "//10.40.14.25/{}/".format(drive)})
+    for i in range(shows):
+        rules.append({"from": "S:/shows/show{:03d}/".format(i),
+                      "to": "//fast{}/show{:03d}/".format(i % 4, i)})
+    return path_mapping.parseRules(rules)
+
+
+def makePaths(count, shows, seed=1):
+    rng = random.Random(seed)
+    paths = []
+    for i in range(count):
+        drive = rng.choice(DRIVES)
+        if drive == "S":
+            root = "S:\\shows\\show{:03d}".format(rng.randrange(shows))
+        elif rng.random() < 0.3:
+            root = "/mnt/{}".format(drive.lower())
+        else:
+            root = "{}:\\assets".format(drive.lower())
+        paths.append("{}\\chars\\hero\\tex\\hero_diffuse_{}.<UDIM>.tx".format(root, i % 5000))
+    return paths
+
+
+def linearMap(rules, path):
+    """Try every rule in order; longest match wins."""
+    normalized = path.replace("\\", "/")
+    folded = normalized.lower()
+    best, length = None, 0
+    for rule in rules:
+        source = rule.source.replace("\\", "/")
+        candidate = folded if path_mapping.isWindowsPath(source) else normalized
+        if path_mapping.isWindowsPath(source):
+            source = source.lower()
+        if len(source) > length and candidate.startswith(source):
+            best, length = rule, len(source)
+    if best is None:
+        return path
+    return best.target + normalized[length:]
+
+
+def measure(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--shows", type=int, default=50, help="Per-show root rules")
+    args = parser.parse_args()
+
+    rules = makeRules(args.shows)
+    print("{} rules".format(len(rules)))
+    print("{:>8}  {:>12}{:>12}{:>12}".format("paths", "linear ms", "trie ms", "cached ms"))
+    for size in args.sizes:
+        paths = makePaths(size, args.shows)
+        linearTime, linear = measure(lambda: [linearMap(rules, path) for path in paths])
+        mapper = path_mapping.PathMapper(rules)
+        trieTime, mapped = measure(lambda: mapper.mapPaths(paths))
+        cachedTime, _ = measure(lambda: mapper.mapPaths(paths))
+        assert mapped == linear, "results differ"
+        print("{:>8}  {:>12.1f}{:>12.1f}{:>12.1f}".format(
+            size, linearTime * 1000, trieTime * 1000, cachedTime * 1000
+        ))
+
+
+if __name__ == "__main__":
+    main()
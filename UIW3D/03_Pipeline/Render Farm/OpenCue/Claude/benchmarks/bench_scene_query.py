@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+"""
+Camera query benchmark for scene_info.queryCameras.
+
+Runs the one-pass OpenMaya query (renderable cameras, transforms and render
+layer membership) and the previous per-camera cmds loop against a mocked
+Maya scene with 10 to 10,000 cameras. Every mocked maya.cmds call spins for
+--overhead microseconds to stand in for the command layer's per-call cost;
+the mocked OpenMaya calls cost only their Python overhead, so this measures
+the number of command round trips removed, not absolute Maya timings.
+
+Usage:
+    python benchmarks/bench_scene_query.py [--sizes 10 1000 10000] [--overhead 20]
+"""
+
+import argparse
+import os
+import sys
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+LAYERS = ["bg", "chars", "fx"]
+
+
+class FakeScene(object):
+    """N cameras under |layout, every tenth one renderable, layers by group."""
+
+    def __init__(self, count, overhead):
+        self.overhead = overhead
+        self.calls = 0
+        self.cameras = []
+        for i in range(count):
+            group = "|layout|set{}".format(i % 3)
+            self.cameras.append({
+                "shape": "cam{}Shape".format(i),
+                "transform": "cam{}".format(i),
+                "fullPath": "{}|cam{}".format(group, i),
+                "renderable": i % 10 == 0,
+            })
+        self.byShape = dict((cam["shape"], cam) for cam in self.cameras)
+        self.members = dict(
+            (layer, ["|layout|set{}".format(i)]) for i, layer in enumerate(LAYERS)
+        )
+
+    def command(self):
+        self.calls += 1
+        end = time.perf_counter() + self.overhead
+        while time.perf_counter() < end:
+            pass
+
+
+def installFakeMaya(scene):
+    """Register mocked maya.cmds and maya.api.OpenMaya modules for a scene."""
+    cmds = types.ModuleType("maya.cmds")
+
+    def ls(type=None, **kwargs):
+        scene.command()
+        if type == "camera":
+            return [cam["shape"] for cam in scene.cameras]
+        if type == "renderLayer":
+            return ["defaultRenderLayer"] + LAYERS
+        return []
+
+    def listRelatives(node, parent=False, **kwargs):
+        scene.command()
+        return [scene.byShape[node]["transform"]]
+
+    def getAttr(plug):
+        scene.command()
+        node, attr = plug.split(".", 1)
+        return scene.byShape[node][attr]
+
+    def editRenderLayerMembers(layer, query=False, fullNames=False):
+        scene.command()
+        return scene.members[layer]
+
+    cmds.ls = ls
+    cmds.listRelatives = listRelatives
+    cmds.getAttr = getAttr
+    cmds.editRenderLayerMembers = editRenderLayerMembers
+
+    class MDagPath(object):
+        def __init__(self, cam):
+            self.cam = cam
+            self.popped = False
+
+        def pop(self):
+            self.popped = True
+
+        def fullPathName(self):
+            return self.cam["fullPath"]
+
+        def partialPathName(self):
+            return self.cam["transform"]
+
+    class MPlug(object):
+        def __init__(self, value):
+            self.value = value
+
+        def asBool(self):
+            return bool(self.value)
+
+    class MFnDagNode(object):
+        def __init__(self, path):
+            self.cam = path.cam
+
+        def findPlug(self, name, wantNetworked):
+            return MPlug(self.cam[name])
+
+    class MItDag(object):
+        kDepthFirst = 0
+
+        def __init__(self, traversal, filterType):
+            self.index = 0
+
+        def isDone(self):
+            return self.index >= len(scene.cameras)
+
+        def getPath(self):
+            return MDagPath(scene.cameras[self.index])
+
+        def next(self):
+            self.index += 1
+
+    om = types.ModuleType("maya.api.OpenMaya")
+    om.MItDag = MItDag
+    om.MFnDagNode = MFnDagNode
+    om.MFn = types.SimpleNamespace(kCamera=1)
+
+    maya = types.ModuleType("maya")
+    api = types.ModuleType("maya.api")
+    maya.cmds = cmds
+    maya.api = api
+    api.OpenMaya = om
+    sys.modules.update({
+        "maya": maya,
+        "maya.cmds": cmds,
+        "maya.api": api,
+        "maya.api.OpenMaya": om,
+    })
+    return cmds
+
+
+def legacyQueryCameras(cmds):
+    """The pre-scene_info loop from get_scene_info: three commands per camera."""
+    cameras = []
+    for cam in cmds.ls(type="camera"):
+        if cmds.getAttr("{}.renderable".format(cam)):
+            transform = cmds.listRelatives(cam, parent=True)[0]
+            cameras.append(transform)
+    return cameras
+
+
+def measure(func, scene):
+    scene.calls = 0
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, scene.calls, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--overhead", type=float, default=20,
+                        help="Simulated cost of one maya.cmds call in microseconds")
+    args = parser.parse_args()
+
+    scene = FakeScene(0, args.overhead / 1e6)
+    cmds = installFakeMaya(scene)
+    import scene_info
+
+    print("{:>8}  {:<10}{:>10}{:>10}{:>12}".format(
+        "cameras", "query", "ms", "commands", "renderable"
+    ))
+    for size in args.sizes:
+        scene.__init__(size, args.overhead / 1e6)
+        legacyTime, legacyCalls, legacy = measure(lambda: legacyQueryCameras(cmds), scene)
+        bulkTime, bulkCalls, bulk = measure(lambda: scene_info.queryCameras(), scene)
+        assert bulk["renderableCameras"] == legacy, "results differ"
+        assert all(bulk["cameraLayers"][cam] for cam in bulk["cameras"])
+        for name, elapsed, calls in (("legacy", legacyTime, legacyCalls),
+                                     ("one-pass", bulkTime, bulkCalls)):
+            print("{:>8}  {:<10}{:>10.2f}{:>10}{:>12}".format(
+                size, name, elapsed * 1000, calls, len(legacy)
+            ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+#  Copyright Contributors to the OpenCue Project
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Package the submit worker as a single zipapp with precompiled bytecode.
+
+Run this with the same Python the worker uses (Python 3.9) so the bundled
+bytecode matches it. Modules are stored uncompressed as unchecked-hash .pyc
+files next to their sources, so the worker starts without compiling or
+stat-ing any source; a different interpreter version falls back to the
+bundled sources automatically.
+
+Usage:
+    "C:\\Program Files\\Python39\\python.exe" build_worker_zipapp.py [-o dist\\maya_submit_worker.pyz]
+
+maya_submit.py uses the zipapp instead of maya_submit_worker.py whenever it
+exists and is newer than every bundled source (isStale).
+"""
+
+import argparse
+import os
+import py_compile
+import sys
+import tempfile
+import zipfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(HERE, "dist", "maya_submit_worker.pyz")
+
+# The worker and every module it imports. Modules that import Maya, run in
+# mayapy on render nodes, or are tooling stay out of the bundle; add a
+# module here when the worker starts importing it.
+WORKER_MODULES = (
+    "chunk_sizing",
+    "cuebot_hosts",
+    "frame_set",
+    "job_history",
+    "job_monitor",
+    "job_spec",
+    "maya_submit_worker",
+    "path_mapping",
+    "spec_cache",
+    "submit_outbox",
+)
+
+# Config files the bundled modules read next to themselves
+DATA_FILES = ("path_mappings.json",)
+
+MAIN_SOURCE = """import maya_submit_worker
+maya_submit_worker.main()
+"""
+
+
+def bundledFiles(sourceDir=HERE):
+    """Return the paths of the sources and config files bundled into the zipapp."""
+    return (
+        [os.path.join(sourceDir, module + ".py") for module in WORKER_MODULES]
+        + [os.path.join(sourceDir, name) for name in DATA_FILES]
+    )
+
+
+def isStale(output=DEFAULT_OUTPUT, sourceDir=HERE):
+    """Return True if the zipapp is missing or older than a bundled source."""
+    try:
+        built = os.path.getmtime(output)
+        return any(os.path.getmtime(path) > built for path in bundledFiles(sourceDir))
+    except OSError:
+        return True
+
+
+def compileModule(sourcePath, archiveName):
+    """Return unchecked-hash bytecode for a source file."""
+    fd, cfile = tempfile.mkstemp(suffix=".pyc")
+    os.close(fd)
+    try:
+        py_compile.compile(
+            sourcePath,
+            cfile=cfile,
+            dfile=archiveName,
+            doraise=True,
+            invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH,
+        )
+        with open(cfile, "rb") as f:
+            return f.read()
+    finally:
+        os.unlink(cfile)
+
+
+def buildZipapp(output=DEFAULT_OUTPUT, sourceDir=HERE):
+    """Write the zipapp atomically and return the bundled module names."""
+    modules = list(WORKER_MODULES)
+    outputDir = os.path.dirname(os.path.abspath(output))
+    os.makedirs(outputDir, exist_ok=True)
+
+    fd, tmpPath = tempfile.mkstemp(dir=outputDir, suffix=".tmp")
+    os.close(fd)
+    try:
+        # Stored, not deflated: a few hundred KB read once beats inflating.
+        with zipfile.ZipFile(tmpPath, "w", zipfile.ZIP_STORED) as archive:
+            archive.writestr("__main__.py", MAIN_SOURCE)
+            for module in modules:
+                sourcePath = os.path.join(sourceDir, module + ".py")
+                archive.write(sourcePath, module + ".py")
+                archive.writestr(module + ".pyc", compileModule(sourcePath, module + ".py"))
+            for name in DATA_FILES:
+                archive.write(os.path.join(sourceDir, name), name)
+        os.replace(tmpPath, output)
+    except Exception:
+        os.unlink(tmpPath)
+        raise
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the submit worker zipapp")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT,
+                        help="Output .pyz (default: dist/maya_submit_worker.pyz)")
+    args = parser.parse_args()
+
+    modules = buildZipapp(args.output)
+    print("Built {} for Python {}.{} with: {}".format(
+        args.output, sys.version_info[0], sys.version_info[1], ", ".join(modules)
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+#  Copyright Contributors to the OpenCue Project
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Chunk size from measured scene load time and per-frame render time.
+
+Every task render_task.py runs writes a small timing record to the share:
+TIMING_ROOT/<show>/<shot>/<job>.<layer>.<id>.json, holding the scene, the
+scene load time and each rendered frame's time. Each record is a
+separate file written atomically, so render nodes never contend for one
+file over SMB.
+
+planChunk uses the medians of the most specific history it has: the same
+scene, else the shot, else the show (at least MIN_SAMPLES tasks). It picks
+the number of frames that fills TARGET_TASK_SECONDS after the load. If the
+farm's idle cores are known, it lowers the chunk so the frames still spread
+over every free task slot. Records older than HISTORY_DAYS are ignored.
+
+Standard library only; used by both submitters and by render_task.py.
+
+Usage:
+    python chunk_sizing.py --show S --shot X [--scene F] --frames N [--idle-cores N]
+    python chunk_sizing.py prune [--days N]
+"""
+
+import argparse
+import collections
+import json
+import math
+import os
+import posixpath
+import statistics
+import tempfile
+import time
+import uuid
+
+TIMING_ROOT = os.environ.get(
+    "OPENCUE_TIMING_ROOT", r"//10.40.14.25/RenderOutputRepo/OpenCue/timings"
+)
+
+# Wanted wall time of one task: long enough to amortise scene load, short
+# enough that a failed or preempted task loses little
+TARGET_TASK_SECONDS = 10 * 60
+
+# Cores one render task takes (render layers carry no core hint)
+TASK_CORES = 4
+
+# Tasks needed before a level of history is trusted
+MIN_SAMPLES = 3
+
+HISTORY_DAYS = 30
+
+# How long a scanned show stays fresh in memory
+HISTORY_TTL = 5 * 60
+
+Estimate = collections.namedtuple("Estimate", "level samples loadSeconds frameSeconds")
+
+ChunkPlan = collections.namedtuple("ChunkPlan", "chunk reason estimate slots")
+
+
+def normalizeScene(scene):
+    # By file name: the same scene is mapped or staged to different paths.
+    return posixpath.basename((scene or "").replace("\\", "/")).lower()
+
+
+def safeName(value):
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in value or "") or "_"
+
+
+def recordTiming(show, shot, job, layer, scene, loadSeconds, frameSeconds, root=TIMING_ROOT):
+    """Write one task's timings for later planChunk calls.
+
+    frameSeconds holds the times of the frames that rendered. Returns the
+    record's path.
+    """
+    directory = os.path.join(root, safeName(show), safeName(shot))
+    os.makedirs(directory, exist_ok=True)
+    name = "{}.{}.{}.json".format(safeName(job), safeName(layer), uuid.uuid4().hex[:12])
+    record = {
+        "scene": scene,
+        "load": round(loadSeconds, 3),
+        "frames": [round(seconds, 3) for seconds in frameSeconds],
+        "time": time.time(),
+    }
+    fd, tmpPath = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(record, f)
+    path = os.path.join(directory, name)
+    os.replace(tmpPath, path)
+    return path
+
+
+class TimingHistory(object):
+    """Timing records on the share, read incrementally.
+
+    Parsed records are kept per file, so rescanning a show only reads the
+    records written since the last scan.
+    """
+
+    def __init__(self, root=TIMING_ROOT, days=HISTORY_DAYS, ttl=HISTORY_TTL):
+        self.root = root
+        self.days = days
+        self.ttl = ttl
+        self.records = {}
+        self.scanned = {}
+
+    def scan(self, show):
+        """Return [(shot, scene, load, mean frame seconds)] for a show."""
+        showDir = os.path.join(self.root, safeName(show))
+        scannedAt = self.scanned.get(showDir)
+        if scannedAt is None or time.time() - scannedAt > self.ttl:
+            self.refresh(showDir)
+            self.scanned[showDir] = time.time()
+        prefix = showDir + os.sep
+        return [
+            record for path, record in self.records.items()
+            if path.startswith(prefix) and record is not None
+        ]
+
+    def refresh(self, showDir):
+        cutoff = time.time() - self.days * 86400
+        try:
+            shots = [entry for entry in os.scandir(showDir) if entry.is_dir()]
+        except OSError:
+            return
+        for shot in shots:
+            try:
+                entries = list(os.scandir(shot.path))
+            except OSError:
+                continue
+            for entry in entries:
+                if not entry.name.endswith(".json") or entry.path in self.records:
+                    continue
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        continue
+                    with open(entry.path) as f:
+                        data = json.load(f)
+                    frames = data["frames"]
+                    self.records[entry.path] = (
+                        shot.name, normalizeScene(data.get("scene")),
+                        float(data["load"]), sum(frames) / len(frames)
+                    )
+                except (OSError, ValueError, KeyError, TypeError, ZeroDivisionError):
+                    # Unreadable or empty; don't retry it every scan.
+                    self.records[entry.path] = None
+
+    def estimate(self, show, shot=None, scene=None, minSamples=MIN_SAMPLES):
+        """Return the Estimate of the most specific level with enough
+        samples, or None.
+        """
+        records = self.scan(show)
+        scene = normalizeScene(scene)
+        shot = safeName(shot) if shot else None
+        candidates = (
+            ("scene", [r for r in records if scene and r[1] == scene]),
+            ("shot", [r for r in records if shot and r[0] == shot]),
+            ("show", records),
+        )
+        for level, matching in candidates:
+            if len(matching) >= minSamples:
+                return Estimate(
+                    level, len(matching),
+                    statistics.median(r[2] for r in matching),
+                    statistics.median(r[3] for r in matching),
+                )
+        return None
+
+
+HISTORY = None
+
+
+def history():
+    """Return the process-wide TimingHistory."""
+    global HISTORY
+    if HISTORY is None:
+        HISTORY = TimingHistory()
+    return HISTORY
+
+
+def idleCores(api):
+    """Sum the idle cores of up, unlocked hosts (api is opencue.api)."""
+    hostPb = api.host_pb2
+    return int(sum(
+        host.idleCores() for host in api.getHosts()
+        if host.state() == hostPb.UP and host.lockState() == hostPb.OPEN
+    ))
+
+
+def chooseChunk(frameCount, estimate, idleCores=None, taskCores=TASK_CORES,
+                target=TARGET_TASK_SECONDS):
+    """Return a ChunkPlan for frameCount frames given an Estimate."""
+    frameCount = max(1, frameCount)
+    slots = idleCores // max(1, taskCores) if idleCores else None
+    if estimate is None:
+        return ChunkPlan(1, "no render history yet, one frame per task", None, slots)
+
+    frameSeconds = max(estimate.frameSeconds, 0.001)
+    chunk = max(1, int((target - estimate.loadSeconds) // frameSeconds))
+    reason = "{} history ({} tasks): load {:.0f}s, {:.0f}s/frame -> {} frames fill {:.0f} min".format(
+        estimate.level, estimate.samples, estimate.loadSeconds, estimate.frameSeconds,
+        chunk, target / 60.0
+    )
+    if slots:
+        spread = max(1, int(math.ceil(frameCount / float(slots))))
+        if spread < chunk:
+            chunk = spread
+            reason += "; {} idle task slots, capped at {} to use them".format(slots, chunk)
+        else:
+            reason += "; {} idle task slots".format(slots)
+    else:
+        reason += "; farm load unknown"
+    chunk = min(chunk, frameCount)
+    taskSeconds = estimate.loadSeconds + chunk * estimate.frameSeconds
+    reason += " (~{:.1f} min/task, {:.0%} loading)".format(
+        taskSeconds / 60.0, estimate.loadSeconds / taskSeconds if taskSeconds else 0.0
+    )
+    return ChunkPlan(chunk, reason, estimate, slots)
+
+
+def planChunk(show, shot, scene, frameCount, idleCores=None, taskCores=TASK_CORES,
+              target=TARGET_TASK_SECONDS):
+    """Return a ChunkPlan from the timing history on the share."""
+    return chooseChunk(
+        frameCount, history().estimate(show, shot, scene), idleCores, taskCores, target
+    )
+
+
+def prune(root=TIMING_ROOT, days=HISTORY_DAYS):
+    """Delete records older than days; return how many were removed."""
+    cutoff = time.time() - days * 86400
+    removed = 0
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan a chunk size from render history")
+    parser.add_argument("command", nargs="?", choices=["plan", "prune"], default="plan")
+    parser.add_argument("--show")
+    parser.add_argument("--shot")
+    parser.add_argument("--scene")
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--idle-cores", type=int)
+    parser.add_argument("--task-cores", type=int, default=TASK_CORES)
+    parser.add_argument("--days", type=int, default=HISTORY_DAYS)
+    args = parser.parse_args()
+
+    if args.command == "prune":
+        print("Removed {} record(s)".format(prune(days=args.days)))
+        return
+    if not args.show:
+        parser.error("--show is required")
+    plan = planChunk(args.show, args.shot, args.scene, args.frames,
+                     args.idle_cores, args.task_cores)
+    print("Chunk {}: {}".format(plan.chunk, plan.reason))
+
+
+if __name__ == "__main__":
+    main()
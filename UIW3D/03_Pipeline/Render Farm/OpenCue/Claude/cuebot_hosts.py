@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+#  Copyright Contributors to the OpenCue Project
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Cuebot endpoint health probes and host selection.
+
+Every endpoint gets a quick TCP connect probe (in parallel, bounded by
+PROBE_TIMEOUT) and the results are cached on disk for PROBE_TTL seconds, so
+back-to-back submits from the worker, the daemon and the Maya UI share one
+probe. Hosts are ranked healthy-by-latency first; unreachable hosts stay at
+the end in case they come back. HostPool walks that ranking when an RPC
+fails with a connection error.
+
+Standard library only, so Maya's Python can show probe results too.
+
+Usage:
+    python cuebot_hosts.py host1:8443,host2:8443 [--refresh]
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+DEFAULT_PORT = 8443
+
+# A healthy Cuebot accepts a connection in a few ms on the studio network;
+# anything slower than this is treated as down for ranking.
+PROBE_TIMEOUT = 0.5
+
+# Seconds a probe result is reused before the host is probed again
+PROBE_TTL = 30
+
+PROBE_CACHE_FILE = os.path.join(
+    os.environ.get("LOCALAPPDATA", tempfile.gettempdir()), "OpenCueSubmit", "cuebot_probe.json"
+)
+
+cacheLock = threading.Lock()
+
+
+def parseHosts(value):
+    """Return a list of host:port strings from a list or comma-separated string."""
+    if isinstance(value, str):
+        value = value.split(",")
+    hosts = []
+    for host in value or []:
+        host = host.strip()
+        if host and host not in hosts:
+            hosts.append(host)
+    return hosts
+
+
+def splitHost(host):
+    """Return (hostname, port) for a host:port string."""
+    name, sep, port = host.rpartition(":")
+    if not sep or not port.isdigit():
+        return host, DEFAULT_PORT
+    return name.strip("[]"), int(port)
+
+
+def probeHost(host, timeout=PROBE_TIMEOUT):
+    """Time a TCP connect to a Cuebot and return its probe result."""
+    start = time.time()
+    try:
+        conn = socket.create_connection(splitHost(host), timeout=timeout)
+        conn.close()
+    except (OSError, ValueError) as e:
+        return {"host": host, "ok": False, "latency": None, "error": str(e), "time": start}
+    latency = round((time.time() - start) * 1000.0, 1)
+    return {"host": host, "ok": True, "latency": latency, "error": None, "time": start}
+
+
+def readCache():
+    try:
+        with open(PROBE_CACHE_FILE, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def writeCache(results):
+    """Merge probe results into the shared cache file."""
+    with cacheLock:
+        cache = readCache()
+        for result in results:
+            cache[result["host"]] = result
+        try:
+            os.makedirs(os.path.dirname(PROBE_CACHE_FILE), exist_ok=True)
+            fd, tmpPath = tempfile.mkstemp(dir=os.path.dirname(PROBE_CACHE_FILE), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(cache, f)
+            os.replace(tmpPath, PROBE_CACHE_FILE)
+        except OSError:
+            # Probing still works without the cache; it just isn't shared.
+            pass
+
+
+def probeHosts(hosts, refresh=False, ttl=PROBE_TTL, timeout=PROBE_TIMEOUT):
+    """Return probe results for hosts, ranked fastest healthy first.
+
+    Cached results younger than ttl are reused unless refresh is set; the
+    remaining hosts are probed in parallel.
+    """
+    hosts = parseHosts(hosts)
+    cache = {} if refresh else readCache()
+    now = time.time()
+    results = {}
+    stale = []
+    for host in hosts:
+        cached = cache.get(host)
+        if cached and now - cached.get("time", 0) < ttl:
+            results[host] = cached
+        else:
+            stale.append(host)
+
+    if stale:
+        threads = []
+        for host in stale:
+            thread = threading.Thread(
+                target=lambda host=host: results.__setitem__(host, probeHost(host, timeout))
+            )
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        writeCache([results[host] for host in stale])
+
+    # Healthy hosts by latency, then the rest in configured order.
+    return sorted(
+        (results[host] for host in hosts),
+        key=lambda result: (not result["ok"], result["latency"] or 0)
+    )
+
+
+def recordFailure(host, error):
+    """Mark a host down in the cache after a failed RPC."""
+    writeCache([{"host": host, "ok": False, "latency": None, "error": str(error),
+                 "time": time.time()}])
+
+
+def formatProbe(result):
+    """Describe one probe result for logs and the Maya UI."""
+    if result["ok"]:
+        return "{} ({:.0f} ms)".format(result["host"], result["latency"])
+    return "{} (unreachable)".format(result["host"])
+
+
+class HostPool(object):
+    """Cuebot endpoints in probe order, switching host on connection errors.
+
+    connect(host) is called to point the RPC channel at a host, initially
+    at the fastest healthy one and again on every failover.
+    """
+
+    def __init__(self, hosts, connect, refresh=False):
+        self.probes = probeHosts(hosts, refresh)
+        if not self.probes:
+            raise ValueError("No Cuebot hosts configured")
+        self.hosts = [result["host"] for result in self.probes]
+        self.connect = connect
+        self.lock = threading.Lock()
+        self.index = 0
+        self.connect(self.current())
+
+    def current(self):
+        return self.hosts[self.index]
+
+    def failover(self, failedHost, tried, error=None):
+        """Move past a host that failed and return the host to retry on.
+
+        Returns None once every host has been tried. If another thread has
+        already moved on from failedHost, its choice is reused.
+        """
+        with self.lock:
+            if self.current() == failedHost:
+                recordFailure(failedHost, error)
+                for offset in range(1, len(self.hosts)):
+                    index = (self.index + offset) % len(self.hosts)
+                    if self.hosts[index] not in tried:
+                        self.index = index
+                        self.connect(self.current())
+                        break
+            host = self.current()
+            return None if host in tried else host
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Probe Cuebot endpoints")
+    parser.add_argument("hosts", help="Comma-separated host:port list")
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached probe results")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = probeHosts(args.hosts, refresh=args.refresh)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            print(formatProbe(result) if result["ok"] else "{}: {}".format(
+                formatProbe(result), result["error"]))
+    sys.exit(0 if any(result["ok"] for result in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+#!/usr/bin/env python
+#  Copyright Contributors to the OpenCue Project
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Frame-set expressions for layer ranges.
+
+Accepts the OpenCue frame spec syntax, comma-separated:
+
+    10          one frame
+    1-240       a range
+    1-240x4     every 4th frame (1, 5, 9, ...)
+    1-240y4     the frames 1-240x4 skips
+    240-1x-4    counting down (240, 236, ..., 4)
+
+A FrameSet keeps the parsed terms as arithmetic progressions and never
+lists their frames unless it has to. Counting and writing an OpenCue spec
+are arithmetic when no frame is in two terms, which is the usual case; a
+yN term's progressions interleave but never share a frame. Indexing and key
+frames are arithmetic when the terms don't interleave either. Otherwise
+frames come from a lazy k-way merge.
+
+keyFrames picks the first, middle and last frames (more with count). A
+layer's frames can then be split in two: a preview layer that renders the
+key frames first and the rest (see job_spec.buildPreviewLayers).
+
+Standard library only; used by both submitters and the worker.
+
+Usage:
+    python frame_set.py <expression> [--keys N]
+"""
+
+import argparse
+import heapq
+import math
+import re
+
+TERM = re.compile(r"^(-?\d+)(?:-(-?\d+)(?:([xy])(-?\d+))?)?$")
+
+# Frames a term may hold; a typo like 1-10000000000 fails fast
+MAX_TERM_FRAMES = 10 ** 8
+
+
+class FrameSet(object):
+    """A set of frame numbers held as disjoint-or-not arithmetic progressions.
+
+    Each progression is (first, last, step) with first <= last, step > 0
+    and last reachable from first. ordered means each progression ends
+    before the next starts; disjoint means no frame is in two of them.
+    """
+
+    def __init__(self, progressions=()):
+        self.progressions = sorted(p for p in progressions if p[0] <= p[1])
+        self.ordered = all(
+            a[1] < b[0] for a, b in zip(self.progressions, self.progressions[1:])
+        )
+        self.disjoint = self.ordered or isDisjoint(self.progressions)
+        self._count = None
+
+    @classmethod
+    def parse(cls, expression):
+        """Parse a frame-set expression; raise ValueError if it's malformed."""
+        progressions = []
+        terms = [term.strip() for term in expression.replace(" ", "").split(",")]
+        if not any(terms):
+            raise ValueError("Empty frame range")
+        for term in terms:
+            if term:
+                progressions.extend(parseTerm(term))
+        return cls(progressions)
+
+    @classmethod
+    def fromRange(cls, start, end, step=1):
+        return cls([normalize(start, end, step)])
+
+    def __len__(self):
+        if self._count is None:
+            if self.disjoint:
+                self._count = sum(length(p) for p in self.progressions)
+            else:
+                self._count = sum(1 for _ in self)
+        return self._count
+
+    def __iter__(self):
+        """Frames in ascending order, each once."""
+        if self.ordered:
+            for first, last, step in self.progressions:
+                for frame in range(first, last + 1, step):
+                    yield frame
+            return
+        previous = None
+        merged = heapq.merge(*(range(f, l + 1, s) for f, l, s in self.progressions))
+        for frame in merged:
+            if frame != previous:
+                yield frame
+                previous = frame
+
+    def __contains__(self, frame):
+        return any(
+            first <= frame <= last and (frame - first) % step == 0
+            for first, last, step in self.progressions
+        )
+
+    def __bool__(self):
+        return bool(self.progressions)
+
+    __nonzero__ = __bool__
+
+    def first(self):
+        return self.progressions[0][0] if self.progressions else None
+
+    def last(self):
+        return max(p[1] for p in self.progressions) if self.progressions else None
+
+    def isContiguous(self):
+        """Return True if every frame from first to last is in the set."""
+        return not self or len(self) == self.last() - self.first() + 1
+
+    def frameAt(self, index):
+        """Return the index'th frame in ascending order."""
+        if index < 0:
+            index += len(self)
+        if self.ordered:
+            for first, last, step in self.progressions:
+                count = length((first, last, step))
+                if index < count:
+                    return first + index * step
+                index -= count
+            raise IndexError("frame index out of range")
+        for position, frame in enumerate(self):
+            if position == index:
+                return frame
+        raise IndexError("frame index out of range")
+
+    def keyFrames(self, count=3):
+        """Return up to count frames spread evenly: first, middle(s), last."""
+        total = len(self)
+        if total <= count:
+            return list(self)
+        if count == 1:
+            return [self.frameAt(0)]
+        indexes = sorted(set(
+            int(round(i * (total - 1) / float(count - 1))) for i in range(count)
+        ))
+        return [self.frameAt(i) for i in indexes]
+
+    def without(self, frames):
+        """Return a FrameSet without the given frames.
+
+        Each removed frame splits the progression holding it, so removing a
+        few key frames from a huge range stays cheap.
+        """
+        if not self.disjoint:
+            removed = set(frames)
+            return FrameSet.fromFrames(frame for frame in self if frame not in removed)
+        progressions = list(self.progressions)
+        for frame in sorted(set(frames)):
+            for index, (first, last, step) in enumerate(progressions):
+                if first <= frame <= last and (frame - first) % step == 0:
+                    progressions[index:index + 1] = [
+                        p for p in ((first, frame - step, step), (frame + step, last, step))
+                        if p[0] <= p[1]
+                    ]
+                    break
+        return FrameSet(progressions)
+
+    @classmethod
+    def fromFrames(cls, frames):
+        """Build a FrameSet from ascending frames, finding arithmetic runs."""
+        return cls(compress(frames))
+
+    def toSpec(self):
+        """Return the OpenCue frame spec, e.g. "1-97x4,100"."""
+        progressions = self.progressions if self.disjoint else compress(iter(self))
+        return ",".join(formatProgression(p) for p in progressions)
+
+    def __str__(self):
+        return self.toSpec()
+
+    def __repr__(self):
+        return "FrameSet({!r})".format(self.toSpec())
+
+
+def normalize(first, last, step):
+    """Return (low, high, step) covering the same frames with step > 0."""
+    if step == 0:
+        raise ValueError("Frame step can't be 0")
+    if (last - first) * step < 0:
+        raise ValueError("Step {} never reaches {} from {}".format(step, last, first))
+    step = abs(step)
+    low, high = min(first, last), max(first, last)
+    if first > last:
+        # Descending: the frames are the ones reached from the top.
+        low = high - (high - low) // step * step
+    else:
+        high = low + (high - low) // step * step
+    return (low, high, step)
+
+
+def isDisjoint(progressions):
+    """Return True if no frame is in two of the sorted progressions.
+
+    Two progressions can only share a frame if their ranges meet and their
+    first frames agree modulo the gcd of their steps. Progressions still
+    open at each start are kept per step by first % step, so same-step
+    terms (a yN term's residues) are checked with one lookup each.
+    """
+    # step -> {first % step: open progressions}
+    openByStep = {}
+    # (last, step, residue) of the open progressions
+    ends = []
+    for first, last, step in progressions:
+        while ends and ends[0][0] < first:
+            _, openStep, residue = heapq.heappop(ends)
+            residues = openByStep[openStep]
+            residues[residue] -= 1
+            if not residues[residue]:
+                del residues[residue]
+        for openStep, residues in openByStep.items():
+            divisor = math.gcd(openStep, step)
+            if divisor == openStep:
+                if first % openStep in residues:
+                    return False
+            elif any((first - residue) % divisor == 0 for residue in residues):
+                return False
+        residue = first % step
+        residues = openByStep.setdefault(step, {})
+        residues[residue] = residues.get(residue, 0) + 1
+        heapq.heappush(ends, (last, step, residue))
+    return True
+
+
+def length(progression):
+    first, last, step = progression
+    return (last - first) // step + 1
+
+
+def parseTerm(term):
+    match = TERM.match(term)
+    if not match:
+        raise ValueError("Bad frame range term: {!r}".format(term))
+    first = int(match.group(1))
+    if match.group(2) is None:
+        return [(first, first, 1)]
+    last = int(match.group(2))
+    mode, step = match.group(3), int(match.group(4) or (1 if last >= first else -1))
+    progression = normalize(first, last, step)
+    if length(progression) > MAX_TERM_FRAMES or abs(last - first) > MAX_TERM_FRAMES:
+        raise ValueError("Frame range too large: {!r}".format(term))
+    if mode != "y":
+        return [progression]
+    # Inverse step: every frame of the range the stepped term skips, as one
+    # progression per skipped residue.
+    low, high = min(first, last), max(first, last)
+    anchor, step = progression[0], progression[2]
+    progressions = []
+    for offset in range(1, step):
+        start = low + (anchor + offset - low) % step
+        if start <= high:
+            progressions.append((start, start + (high - start) // step * step, step))
+    return progressions
+
+
+def compress(frames):
+    """Group ascending unique frames into arithmetic progressions."""
+    progressions = []
+    run = []
+    for frame in frames:
+        if len(run) < 2 or frame - run[-1] == run[1] - run[0]:
+            run.append(frame)
+            continue
+        if len(run) == 2:
+            # Two frames don't make a progression; start again from the second.
+            progressions.append((run[0], run[0], 1))
+            run = [run[1], frame]
+        else:
+            progressions.append((run[0], run[-1], run[1] - run[0]))
+            run = [frame]
+    if len(run) == 2:
+        progressions.extend([(run[0], run[0], 1), (run[1], run[1], 1)])
+    elif run:
+        progressions.append((run[0], run[-1], run[1] - run[0] if len(run) > 1 else 1))
+    return progressions
+
+
+def formatProgression(progression):
+    first, last, step = progression
+    if first == last:
+        return str(first)
+    if step == 1:
+        return "{}-{}".format(first, last)
+    return "{}-{}x{}".format(first, last, step)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Expand a frame-set expression")
+    parser.add_argument("expression")
+    parser.add_argument("--keys", type=int, default=3, help="Key frames to render first")
+    args = parser.parse_args()
+
+    frames = FrameSet.parse(args.expression)
+    keys = frames.keyFrames(args.keys)
+    print("Frames:     {} ({} frames)".format(frames.toSpec(), len(frames)))
+    print("Key frames: {}".format(",".join(str(frame) for frame in keys)))
+    print("Rest:       {}".format(frames.without(keys).toSpec()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+#!/usr/bin/env python
+#  Copyright Contributors to the OpenCue Project
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Local history of finished jobs, layers and frames pulled from Cuebot.
+
+Each frame row records run time, core time, peak RSS, cores, host, exit
+status and retries. Its layer records the show, shot, scene (by file name,
+taken from the render command) and service. Queries by those four are
+indexed.
+
+Syncing is incremental. Each watched show keeps a high-water mark, the stop
+time of the newest job already stored. A sync lists the show's jobs and
+fetches layers and frames (paged) only for finished jobs past the mark and
+not yet stored. Each job is stored in one transaction, so an interrupted
+sync resumes where it stopped. Shows are watched when a job is submitted
+to them. The submit daemon syncs every SYNC_INTERVAL; the CLI syncs on
+demand.
+
+Standard library only at import. Syncing takes the opencue.api module as an
+argument, so Maya can read the history without opencue.
+
+Usage:
+    python job_history.py sync [--show SHOW ...]
+    python job_history.py stats [--show S] [--shot X] [--scene F] [--service S]
+    python job_history.py shows
+"""
+
+import argparse
+import contextlib
+import os
+import re
+import sqlite3
+import tempfile
+import time
+
+import chunk_sizing
+
+HISTORY_FILE = os.path.join(
+    os.environ.get("LOCALAPPDATA", tempfile.gettempdir()), "OpenCueSubmit", "job_history.db"
+)
+
+# Frames fetched per RPC
+FRAME_PAGE = 500
+
+# How often the submit daemon syncs watched shows
+SYNC_INTERVAL = 15 * 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shows (
+    show TEXT PRIMARY KEY,
+    highWater REAL NOT NULL DEFAULT 0,
+    lastSync REAL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    show TEXT,
+    shot TEXT,
+    user TEXT,
+    startTime REAL,
+    stopTime REAL
+);
+CREATE TABLE IF NOT EXISTS layers (
+    id TEXT PRIMARY KEY,
+    jobId TEXT NOT NULL,
+    name TEXT,
+    show TEXT,
+    shot TEXT,
+    scene TEXT,
+    service TEXT,
+    minCores REAL,
+    minMemory INTEGER
+);
+CREATE TABLE IF NOT EXISTS frames (
+    id TEXT PRIMARY KEY,
+    layerId TEXT NOT NULL,
+    number INTEGER,
+    state TEXT,
+    exitStatus INTEGER,
+    retries INTEGER,
+    runTime INTEGER,
+    coreTime INTEGER,
+    maxRss INTEGER,
+    cores REAL,
+    host TEXT,
+    startTime REAL,
+    stopTime REAL
+);
+CREATE INDEX IF NOT EXISTS jobsByShow ON jobs (show, stopTime);
+CREATE INDEX IF NOT EXISTS layersByShot ON layers (show, shot);
+CREATE INDEX IF NOT EXISTS layersByScene ON layers (scene);
+CREATE INDEX IF NOT EXISTS layersByService ON layers (service);
+CREATE INDEX IF NOT EXISTS framesByLayer ON frames (layerId);
+"""
+
+# The scene in a render command: a quoted or bare .ma/.mb path
+SCENE_PATH = re.compile(r'"([^"]+\.m[ab])"|(\S+\.m[ab])\b', re.IGNORECASE)
+
+FRAME_COLUMNS = ("runTime", "coreTime", "maxRss", "cores", "host", "exitStatus",
+                 "retries", "state", "number", "stopTime")
+
+
+def sceneFromCommand(command):
+    """Return the scene file name a render command renders, or None."""
+    match = SCENE_PATH.search(command or "")
+    if match is None:
+        return None
+    return chunk_sizing.normalizeScene(match.group(1) or match.group(2))
+
+
+def parseResource(resource):
+    """Split a frame's last resource ("host/cores[/gpus]") into (host, cores)."""
+    parts = (resource or "").split("/")
+    try:
+        cores = float(parts[1]) if len(parts) > 1 else None
+    except ValueError:
+        cores = None
+    return parts[0] or None, cores
+
+
+def percentile(values, fraction):
+    """Return the fraction (0-1) percentile of values, interpolated."""
+    values = sorted(values)
+    if not values:
+        return None
+    position = (len(values) - 1) * fraction
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+class JobHistory(object):
+    """SQLite store of finished jobs, synced incrementally from Cuebot.
+
+    Each call opens its own connection, so the daemon's syncer and request
+    threads can share one JobHistory.
+    """
+
+    def __init__(self, path=HISTORY_FILE):
+        self.path = path
+        self.created = False
+
+    def connect(self):
+        # The database is created on first use, not at import time.
+        if not self.created:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Autocommit; writes are grouped explicitly by transaction().
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        if not self.created:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+            self.created = True
+        return db
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Yield a connection inside a write transaction."""
+        db = self.connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+        finally:
+            db.close()
+
+    def watch(self, show):
+        """Include a show in future syncs."""
+        if not show:
+            return
+        with self.transaction() as db:
+            db.execute("INSERT OR IGNORE INTO shows (show) VALUES (?)", (show,))
+
+    def shows(self):
+        db = self.connect()
+        try:
+            return [dict(row) for row in db.execute("SELECT * FROM shows ORDER BY show")]
+        finally:
+            db.close()
+
+    def sync(self, api, shows=None):
+        """Sync the given (or all watched) shows; return new jobs per show."""
+        if shows:
+            for show in shows:
+                self.watch(show)
+        else:
+            shows = [row["show"] for row in self.shows()]
+        return dict((show, self.syncShow(api, show)) for show in shows)
+
+    def syncShow(self, api, show):
+        """Store the show's jobs finished since its high-water mark."""
+        db = self.connect()
+        try:
+            row = db.execute("SELECT highWater FROM shows WHERE show = ?", (show,)).fetchone()
+            highWater = row["highWater"] if row is not None else 0
+            # Jobs stopping in the same second as the mark may not all be stored.
+            candidates = [
+                job for job in api.getJobs(show=[show], include_finished=True)
+                if job.stopTime() and job.stopTime() >= highWater
+            ]
+            known = set(
+                r["id"] for r in db.execute(
+                    "SELECT id FROM jobs WHERE show = ? AND stopTime >= ?", (show, highWater)
+                )
+            )
+        finally:
+            db.close()
+
+        added = 0
+        for job in sorted(candidates, key=lambda job: job.stopTime()):
+            if job.id() in known:
+                continue
+            layers, frames = self.collect(job)
+            with self.transaction() as db:
+                db.execute(
+                    "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (job.id(), job.name(), job.show(), job.shot(), job.user(),
+                     job.startTime(), job.stopTime())
+                )
+                db.executemany(
+                    "INSERT OR REPLACE INTO layers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", layers
+                )
+                db.executemany(
+                    "INSERT OR REPLACE INTO frames VALUES"
+                    " (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", frames
+                )
+                db.execute(
+                    "UPDATE shows SET highWater = MAX(highWater, ?) WHERE show = ?",
+                    (job.stopTime(), show)
+                )
+            added += 1
+
+        with self.transaction() as db:
+            db.execute("UPDATE shows SET lastSync = ? WHERE show = ?", (time.time(), show))
+        return added
+
+    @staticmethod
+    def collect(job):
+        """Return (layer rows, frame rows) for a finished job."""
+        layerRows, frameRows = [], []
+        for layer in job.getLayers():
+            services = list(layer.data.services)
+            layerRows.append((
+                layer.id(), job.id(), layer.name(), job.show(), job.shot(),
+                sceneFromCommand(layer.data.command), services[0] if services else None,
+                layer.minCores(), layer.data.min_memory
+            ))
+            page = 1
+            while True:
+                frames = layer.getFrames(page=page, limit=FRAME_PAGE)
+                for frame in frames:
+                    host, cores = parseResource(frame.lastResource())
+                    frameRows.append((
+                        frame.id(), layer.id(), frame.number(), str(frame.state()),
+                        frame.exitStatus(), frame.retries(), frame.runTime(),
+                        getattr(frame.data, "total_core_time", None), frame.maxRss(),
+                        cores, host, frame.startTime(), frame.stopTime()
+                    ))
+                if len(frames) < FRAME_PAGE:
+                    break
+                page += 1
+        return layerRows, frameRows
+
+    def frames(self, show=None, shot=None, scene=None, service=None, since=None,
+               succeeded=None, layer=None):
+        """Return frame rows (dicts with FRAME_COLUMNS and the layer's keys).
+
+        Every filter is optional; scene matches by file name. succeeded
+        selects frames that exited 0 (True) or didn't (False).
+        """
+        where, params = [], []
+        for column, value in (("l.show", show), ("l.shot", shot), ("l.service", service),
+                              ("l.name", layer)):
+            if value:
+                where.append("{} = ?".format(column))
+                params.append(value)
+        if scene:
+            where.append("l.scene = ?")
+            params.append(chunk_sizing.normalizeScene(scene))
+        if since:
+            where.append("f.stopTime >= ?")
+            params.append(since)
+        if succeeded is not None:
+            where.append("f.exitStatus {} 0".format("=" if succeeded else "!="))
+        query = (
+            "SELECT {}, l.show, l.shot, l.scene, l.service, l.name AS layer"
+            " FROM frames f JOIN layers l ON l.id = f.layerId".format(
+                ", ".join("f." + column for column in FRAME_COLUMNS)
+            )
+        )
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        db = self.connect()
+        try:
+            return [dict(row) for row in db.execute(query, params)]
+        finally:
+            db.close()
+
+
+def printStats(rows):
+    if not rows:
+        print("No frames")
+        return
+    ok = [row for row in rows if row["exitStatus"] == 0]
+    runTimes = [row["runTime"] for row in ok if row["runTime"]]
+    rss = [row["maxRss"] / 1024.0 for row in ok if row["maxRss"]]
+    print("{} frames, {} failed, {} retries".format(
+        len(rows), len(rows) - len(ok), sum(row["retries"] or 0 for row in rows)
+    ))
+    if runTimes:
+        print("Run time  p50 {:.0f}s  p95 {:.0f}s  max {:.0f}s".format(
+            percentile(runTimes, 0.5), percentile(runTimes, 0.95), max(runTimes)
+        ))
+    if rss:
+        print("Peak RSS  p50 {:.0f} MB  p95 {:.0f} MB  max {:.0f} MB".format(
+            percentile(rss, 0.5), percentile(rss, 0.95), max(rss)
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local job history from Cuebot")
+    parser.add_argument("command", choices=["sync", "stats", "shows"])
+    parser.add_argument("--show", action="append")
+    parser.add_argument("--shot")
+    parser.add_argument("--scene")
+    parser.add_argument("--service")
+    parser.add_argument("--days", type=float, help="Only frames from the last N days")
+    args = parser.parse_args()
+
+    history = JobHistory()
+    if args.command == "sync":
+        import opencue
+        for show, added in sorted(history.sync(opencue.api, args.show).items()):
+            print("{}: {} new job(s)".format(show, added))
+    elif args.command == "shows":
+        for row in history.shows():
+            print("{:<20} synced {}  newest job {}".format(
+                row["show"],
+                time.strftime("%Y-%m-%d %H:%M", time.localtime(row["lastSync"]))
+                if row["lastSync"] else "never",
+                time.strftime("%Y-%m-%d %H:%M", time.localtime(row["highWater"]))
+                if row["highWater"] else "-"
+            ))
+    else:
+        since = time.time() - args.days * 86400 if args.days else None
+        printStats(history.frames(
+            (args.show or [None])[0], args.shot, args.scene, args.service, since
+        ))
+
+
+if __name__ == "__main__":
+    main()
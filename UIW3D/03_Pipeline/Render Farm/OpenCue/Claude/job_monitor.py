@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+#  Copyright Contributors to the OpenCue Project
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Frame progress of submitted jobs from delta polls of Cuebot.
+
+The submit daemon keeps a JobProgress per watched job. The first poll lists
+the job's frames once, FRAME_PAGE per RPC. Every later poll is one
+GetUpdatedFrames RPC, which returns only the frames changed since the
+previous poll's Cuebot server time. A poll sooner than MIN_POLL after the
+last one is answered from memory, so several windows watching one job cost
+Cuebot a single stream of polls. A finished job is never polled again.
+
+Every frame state change gets a serial number. A client sends the highest
+serial it has seen and gets back the state counts plus only the newer
+changes (the last MAX_CHANGES are kept).
+
+nextInterval() is the client's backoff: MIN_POLL while frames change,
+doubling up to MAX_POLL while nothing does.
+
+Standard library only; opencue.api is passed in by the daemon, and the
+Maya UI imports this module for the poll intervals.
+
+Usage:
+    python job_monitor.py <job name>
+"""
+
+import argparse
+import collections
+import threading
+import time
+
+# Client poll interval: MIN_POLL while frames change, backing off by
+# POLL_BACKOFF per quiet poll up to MAX_POLL
+MIN_POLL = 2
+MAX_POLL = 60
+POLL_BACKOFF = 2.0
+
+# Frames per RPC when a job's frames are first listed
+FRAME_PAGE = 1000
+
+# State changes kept per job for clients that fall behind
+MAX_CHANGES = 500
+
+# Jobs nobody asked about for this long are dropped
+IDLE_EXPIRY = 10 * 60
+
+# Cuebot compares update times with its own clock; start the first delta
+# this far before the listing to cover clock skew.
+CLOCK_MARGIN = 5
+
+FINISHED = "FINISHED"
+
+
+def nextInterval(interval, changed, minPoll=MIN_POLL, maxPoll=MAX_POLL,
+                 backoff=POLL_BACKOFF):
+    """Return the wait before the next poll."""
+    if changed:
+        return minPoll
+    return min(maxPoll, max(minPoll, interval * backoff))
+
+
+class JobProgress(object):
+    """One job's frame states, kept current by delta polls."""
+
+    def __init__(self, name, jobId=None):
+        self.name = name
+        self.jobId = jobId
+        self.job = None
+        # frame id -> [frame name, state name]
+        self.frames = {}
+        self.state = None
+        self.lastCheck = None
+        self.polledAt = 0.0
+        self.requestedAt = time.time()
+        self.serial = 0
+        self.changes = collections.deque(maxlen=MAX_CHANGES)
+        self.error = None
+        self.rpcs = 0
+        self.lock = threading.Lock()
+
+    def poll(self, api, call=None, minPoll=MIN_POLL):
+        """Bring the frame states up to date unless polled within minPoll.
+
+        call wraps each RPC (the worker's callCuebot, for failover).
+        """
+        call = call or (lambda rpc: rpc())
+        with self.lock:
+            self.requestedAt = time.time()
+            if self.state == FINISHED or time.time() - self.polledAt < minPoll:
+                return
+            self.polledAt = time.time()
+            try:
+                if self.job is None:
+                    self.load(api, call)
+                else:
+                    self.update(api, call)
+                self.error = None
+            except Exception as e:
+                # Not on Cuebot yet (async launch) or unreachable; the next
+                # poll retries.
+                self.error = "{}: {}".format(
+                    "waiting for Cuebot" if self.job is None else "poll failed", e
+                )
+
+    def load(self, api, call):
+        """List every frame of the job once."""
+        job = call(lambda: api.findJob(self.name))
+        checkFrom = int(time.time()) - CLOCK_MARGIN
+        frames = {}
+        page = 1
+        while True:
+            batch = call(lambda: job.getFrames(page=page, limit=FRAME_PAGE))
+            self.rpcs += 1
+            for frame in batch:
+                frames[frame.id()] = [frame.name(), api.job_pb2.FrameState.Name(frame.state())]
+            if len(batch) < FRAME_PAGE:
+                break
+            page += 1
+        self.job = job
+        self.jobId = job.id()
+        self.frames = frames
+        self.lastCheck = checkFrom
+        self.state = api.job_pb2.JobState.Name(job.state())
+        # Counts changed; no single frame did.
+        self.serial += 1
+
+    def update(self, api, call):
+        """Apply the frames changed since the last poll."""
+        result = call(lambda: self.job.getUpdatedFrames(self.lastCheck))
+        self.rpcs += 1
+        self.lastCheck = result.server_time
+        self.state = api.job_pb2.JobState.Name(result.state)
+        for updated in result.updated_frames.updated_frames:
+            frame = self.frames.get(updated.id)
+            if frame is None:
+                # A frame added after submit: list the job again.
+                self.job = None
+                continue
+            state = api.job_pb2.FrameState.Name(updated.state)
+            if state == frame[1]:
+                continue
+            frame[1] = state
+            self.serial += 1
+            self.changes.append({
+                "serial": self.serial,
+                "frame": frame[0],
+                "state": state,
+                "retries": updated.retry_count,
+                "exitStatus": updated.exit_status,
+                "time": time.time(),
+            })
+
+    def summary(self, since=0):
+        """Return the counts and the changes after serial since."""
+        with self.lock:
+            counts = collections.Counter(state for _, state in self.frames.values())
+            return {
+                "name": self.name,
+                "id": self.jobId,
+                "state": self.state,
+                "total": len(self.frames),
+                "counts": dict(counts),
+                "serial": self.serial,
+                # The client missed changes that were already dropped.
+                "truncated": bool(since and self.changes) and since < self.changes[0]["serial"] - 1,
+                "changes": [change for change in self.changes if change["serial"] > since],
+                "error": self.error,
+                "rpcs": self.rpcs,
+            }
+
+
+class JobMonitor(object):
+    """The JobProgress of every job clients are watching."""
+
+    def __init__(self, expiry=IDLE_EXPIRY):
+        self.expiry = expiry
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def watch(self, name, jobId=None):
+        with self.lock:
+            progress = self.jobs.get(name)
+            if progress is None:
+                progress = self.jobs[name] = JobProgress(name, jobId)
+            return progress
+
+    def expire(self):
+        """Drop jobs no client has asked about within expiry."""
+        cutoff = time.time() - self.expiry
+        with self.lock:
+            for name in [name for name, p in self.jobs.items() if p.requestedAt < cutoff]:
+                del self.jobs[name]
+
+    def progress(self, api, jobs, since=None, call=None):
+        """Poll each {"name", "id"} job and return their summaries.
+
+        since maps job name to the last serial the client has seen.
+        """
+        self.expire()
+        since = since or {}
+        summaries = []
+        for job in jobs:
+            progress = self.watch(job["name"], job.get("id"))
+            progress.poll(api, call)
+            summaries.append(progress.summary(since.get(job["name"], 0)))
+        return summaries
+
+
+def formatCounts(summary):
+    """Describe a job summary's counts, e.g. "12/40 done, 4 running"."""
+    counts = summary.get("counts", {})
+    done = counts.get("SUCCEEDED", 0) + counts.get("EATEN", 0)
+    parts = ["{}/{} done".format(done, summary.get("total", 0))]
+    for state in ("RUNNING", "WAITING", "DEPEND", "DEAD"):
+        if counts.get(state):
+            parts.append("{} {}".format(counts[state], state.lower()))
+    return ", ".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Follow a job's frame progress")
+    parser.add_argument("job", help="Job name")
+    args = parser.parse_args()
+
+    import opencue
+    api = opencue.api
+    monitor = JobMonitor()
+    serial = 0
+    interval = MIN_POLL
+    while True:
+        summary = monitor.progress(api, [{"name": args.job}], {args.job: serial})[0]
+        for change in summary["changes"]:
+            print("{} {}".format(change["frame"], change["state"]))
+        print("{} ({}, {} RPCs)".format(
+            formatCounts(summary), summary["error"] or summary["state"], summary["rpcs"]
+        ))
+        if summary["state"] == FINISHED:
+            return
+        interval = nextInterval(interval, summary["serial"] != serial)
+        serial = summary["serial"]
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,505 @@
+#  Copyright Contributors to the OpenCue Project
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+CJSL job spec generation for the Maya submit worker.
+
+Kept free of opencue imports so it can be used (and benchmarked) from any
+Python, including Maya's. The spec is written incrementally to a stream, one
+layer at a time, with every value XML-escaped, so build time grows linearly
+with the number of layers.
+"""
+
+import io
+import re
+
+import frame_set
+import path_mapping
+
+
+# Frame tokens used by OpenCue
+FRAME_TOKEN = "#IFRAME#"
+FRAME_START_TOKEN = "#FRAME_START#"
+FRAME_END_TOKEN = "#FRAME_END#"
+# The chunk's frames as a frame spec, e.g. 1-17x4 or 1,50,100
+FRAME_SPEC_TOKEN = "#FRAMESPEC#"
+# Frame number zero-padded to four digits
+ZFRAME_TOKEN = "#ZFRAME#"
+
+# Maya configuration
+MAYA_RENDER_EXE = r"C:/Program Files/Autodesk/Maya2026/bin/Render.exe"
+
+# Render node Python and the asset cache launcher (render_cache.py) that
+# stages a layer's files locally when its cmd has a manifest
+RENDER_NODE_PYTHON = r"C:/Python39/python.exe"
+RENDER_CACHE_SCRIPT = r"//10.40.14.25/RenderOutputRepo/OpenCue/bin/render_cache.py"
+
+# Export-once / render-many: mayapy runs ass_export.py to write per-frame
+# .ass files under ASS_ROOT, then kick renders them on KICK_SERVICE hosts,
+# which don't need Maya.
+MAYAPY_EXE = r"C:/Program Files/Autodesk/Maya2026/bin/mayapy.exe"
+ASS_EXPORT_SCRIPT = r"//10.40.14.25/RenderOutputRepo/OpenCue/bin/ass_export.py"
+ASS_ROOT = r"//10.40.14.25/RenderOutputRepo/OpenCue/ass"
+KICK_EXE = r"C:/Program Files/Autodesk/Arnold/maya2026/bin/kick.exe"
+KICK_SERVICE = "arnold"
+
+# Render server: mayapy runs render_task.py, which loads the scene once per
+# chunk and renders its frames one by one, retrying a failed frame in-process
+RENDER_TASK_SCRIPT = r"//10.40.14.25/RenderOutputRepo/OpenCue/bin/render_task.py"
+# Renderers mayapy can batch render in-process; "file" is resolved from the
+# scene's render globals
+IN_PROCESS_RENDERERS = ("arnold",)
+
+# Key frames (first, middle, last) a preview layer renders ahead of the rest
+PREVIEW_FRAMES = 3
+
+# Use UID 1000+ to avoid root (0) rejection - typical non-root user range
+DEFAULT_UID = 1000
+
+SPEC_HEADER = (
+    '<?xml version="1.0"?>\n'
+    '<!DOCTYPE spec PUBLIC "SPI Cue Specification Language" '
+    '"http://localhost:8080/spcue/dtd/cjsl-1.12.dtd">\n'
+)
+
+# Control characters are not allowed in XML 1.0 even when escaped; a stray
+# "\b" from an unescaped Windows path is the usual culprit.
+INVALID_XML_CHARS = re.compile(u"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+# Anything needing attention; most values match nothing and pass straight
+# through after a single scan.
+SPECIAL_XML_CHARS = re.compile(u'[\x00-\x08\x0b\x0c\x0e-\x1f&<>"]')
+
+LAYER_TEMPLATE = (
+    '      <layer name="{name}" type="{layerType}">\n'
+    '        <cmd>{cmd}</cmd>\n'
+    '        <range>{range}</range>\n'
+    '        <chunk>{chunk}</chunk>\n'
+    '{resources}'
+    '        <services>\n'
+    '{services}'
+    '        </services>\n'
+    '      </layer>\n'
+)
+SERVICE_TEMPLATE = '          <service>{}</service>\n'
+# Optional per-layer requests; without them Cuebot uses the service minimums
+CORES_TEMPLATE = '        <cores>{:g}</cores>\n'
+MEMORY_TEMPLATE = '        <memory>{}m</memory>\n'
+
+DEPEND_TEMPLATE = (
+    '    <depend type="{dependType}" anyframe="False">\n'
+    '      <depjob>{job}</depjob>\n'
+    '      <deplayer>{layer}</deplayer>\n'
+    '      <onjob>{onJob}</onjob>\n'
+    '      <onlayer>{onLayer}</onlayer>\n'
+    '    </depend>\n'
+)
+
+# Characters Cuebot does not accept in layer names
+INVALID_LAYER_NAME_CHARS = re.compile(r"[^\w.-]+")
+
+
+def xmlEscape(value, quote=False):
+    """Escape a value for element text, or a double-quoted attribute if quote."""
+    value = str(value)
+    if not SPECIAL_XML_CHARS.search(value):
+        return value
+    if INVALID_XML_CHARS.search(value):
+        raise ValueError("Value contains characters not allowed in XML: {!r}".format(value))
+    value = value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    if quote:
+        value = value.replace('"', "&quot;")
+    return value
+
+
+class JobSpecWriter(object):
+    """Writes a CJSL job spec to a text stream as it is built.
+
+    Usage:
+        writer = JobSpecWriter(stream)
+        writer.startSpec(show, shot, user)
+        writer.startJob(jobName)
+        writer.addLayer(...)   # once per layer
+        writer.addDepend(...)  # any number, written with the spec's <depends>
+        writer.endJob()
+        writer.endSpec()
+    """
+
+    def __init__(self, stream):
+        self.write = stream.write
+        self.depends = []
+
+    def startSpec(self, show, shot, user, uid=DEFAULT_UID, facility="local"):
+        self.write(SPEC_HEADER)
+        self.write("<spec>\n")
+        self.write("  <facility>{}</facility>\n".format(xmlEscape(facility)))
+        self.write("  <show>{}</show>\n".format(xmlEscape(show)))
+        self.write("  <shot>{}</shot>\n".format(xmlEscape(shot)))
+        self.write("  <user>{}</user>\n".format(xmlEscape(user)))
+        self.write("  <uid>{}</uid>\n".format(int(uid)))
+
+    def startJob(self, name, paused=False, os="Windows"):
+        self.write('  <job name="{}">\n'.format(xmlEscape(name, quote=True)))
+        self.write("    <paused>{}</paused>\n".format(bool(paused)))
+        self.write("    <os>{}</os>\n".format(xmlEscape(os)))
+        self.write("    <layers>\n")
+
+    def addLayer(self, name, cmd, frameRange, chunk, services, layerType="Render",
+                 cores=None, memory=None):
+        """Write one layer; cores and memory (MB) override the service minimums."""
+        resources = ""
+        if cores:
+            resources += CORES_TEMPLATE.format(float(cores))
+        if memory:
+            resources += MEMORY_TEMPLATE.format(int(memory))
+        # One write per layer keeps the per-layer cost flat.
+        self.write(LAYER_TEMPLATE.format(
+            name=xmlEscape(name, quote=True),
+            layerType=xmlEscape(layerType, quote=True),
+            cmd=xmlEscape(cmd),
+            range=xmlEscape(frameRange),
+            chunk=int(chunk),
+            resources=resources,
+            services="".join(SERVICE_TEMPLATE.format(xmlEscape(s)) for s in services),
+        ))
+
+    def addDepend(self, job, layer, onJob, onLayer, dependType="FRAME_BY_FRAME"):
+        """Make a layer wait on another, frame by frame by default."""
+        self.depends.append(DEPEND_TEMPLATE.format(
+            dependType=xmlEscape(dependType, quote=True),
+            job=xmlEscape(job),
+            layer=xmlEscape(layer),
+            onJob=xmlEscape(onJob),
+            onLayer=xmlEscape(onLayer),
+        ))
+
+    def endJob(self):
+        self.write("    </layers>\n")
+        self.write("  </job>\n")
+
+    def endSpec(self):
+        # Depends follow all jobs in CJSL.
+        if self.depends:
+            self.write("  <depends>\n")
+            self.write("".join(self.depends))
+            self.write("  </depends>\n")
+            self.depends = []
+        self.write("</spec>")
+
+
+def buildMayaCmd(layerData, mapper=None):
+    """Build a Maya Render command from layer data.
+
+    With cmd["renderServer"] set the chunk runs through render_task.py
+    instead of Render.exe, if its renderer can render in-process. Paths in
+    the command are translated with mapper (a path_mapping.PathMapper), if
+    given.
+    """
+    cmd = layerData.get("cmd", {})
+    mayaFile = cmd.get("mayaFile", "")
+    camera = cmd.get("camera", "")
+    renderer = cmd.get("renderer", "file")
+
+    if not mayaFile:
+        raise ValueError("No Maya file provided")
+
+    # Build render command - use forward slashes for consistency
+    mayaFile = mayaFile.replace("\\", "/")
+
+    if cmd.get("renderServer") and rendersInProcess(renderer):
+        return finishCmd(buildRenderTaskCmd(mayaFile, cmd), cmd, mapper)
+
+    renderCmd = '"{}" -r {} -s {} -e {}'.format(
+        MAYA_RENDER_EXE,
+        renderer,
+        FRAME_START_TOKEN,
+        FRAME_END_TOKEN
+    )
+
+    renderLayer = cmd.get("renderLayer", "")
+    if renderLayer:
+        renderCmd += " -rl {}".format(renderLayer)
+
+    if camera:
+        renderCmd += " -cam {}".format(camera)
+
+    renderCmd += ' "{}"'.format(mayaFile)
+
+    return finishCmd(renderCmd, cmd, mapper)
+
+
+def rendersInProcess(renderer, sceneRenderer=None):
+    """Return True if render_task.py can render in-process with renderer.
+
+    "file" uses sceneRenderer, the scene's current renderer, when known;
+    otherwise render_task.py resolves it on the render node.
+    """
+    if renderer == "file":
+        return sceneRenderer is None or sceneRenderer in IN_PROCESS_RENDERERS
+    return renderer in IN_PROCESS_RENDERERS
+
+
+def buildRenderTaskCmd(mayaFile, cmd):
+    """Build the mayapy command rendering a chunk in one Maya session."""
+    renderCmd = '"{}" "{}" --scene "{}" --frames {} --renderer {}'.format(
+        MAYAPY_EXE,
+        RENDER_TASK_SCRIPT,
+        mayaFile,
+        FRAME_SPEC_TOKEN,
+        cmd.get("renderer", "file")
+    )
+    if cmd.get("camera"):
+        renderCmd += " --camera {}".format(cmd["camera"])
+    if cmd.get("renderLayer"):
+        renderCmd += " --render-layer {}".format(cmd["renderLayer"])
+    return renderCmd
+
+
+def rangeChunk(frameRange, chunk):
+    """Return the chunk size a #FRAME_START#-#FRAME_END# command can use.
+
+    Render.exe renders every frame from a chunk's first to its last, so a
+    frame set with gaps (steps, lists, a preview layer's leftovers) gets one
+    frame per task.
+    """
+    if int(chunk) > 1 and not frame_set.FrameSet.parse(frameRange).isContiguous():
+        return 1
+    return chunk
+
+
+def finishCmd(renderCmd, cmd, mapper=None):
+    """Wrap a Maya command with the asset cache launcher and map its paths."""
+    manifest = cmd.get("manifest", "")
+    if manifest:
+        renderCmd = '"{}" "{}" run --manifest "{}" -- {}'.format(
+            RENDER_NODE_PYTHON,
+            RENDER_CACHE_SCRIPT,
+            manifest.replace("\\", "/"),
+            renderCmd
+        )
+
+    if mapper is not None:
+        renderCmd = mapper.mapCommand(renderCmd)
+
+    return renderCmd
+
+
+def buildAssExportCmd(layerData, mapper=None):
+    """Build the mayapy command exporting one .ass per frame of a chunk."""
+    cmd = layerData.get("cmd", {})
+    mayaFile = cmd.get("mayaFile", "")
+    if not mayaFile:
+        raise ValueError("No Maya file provided")
+
+    exportCmd = '"{}" "{}" --scene "{}" --frames {} --output "{}"'.format(
+        MAYAPY_EXE,
+        ASS_EXPORT_SCRIPT,
+        mayaFile.replace("\\", "/"),
+        FRAME_SPEC_TOKEN,
+        cmd["assFile"]
+    )
+    if cmd.get("camera"):
+        exportCmd += " --camera {}".format(cmd["camera"])
+    if cmd.get("renderLayer"):
+        exportCmd += " --render-layer {}".format(cmd["renderLayer"])
+    if mapper is not None and mapper.show:
+        exportCmd += ' --show "{}"'.format(mapper.show)
+
+    return finishCmd(exportCmd, cmd, mapper)
+
+
+def buildKickCmd(layerData, mapper=None):
+    """Build the kick command rendering one exported frame."""
+    assFile = layerData.get("cmd", {}).get("assFile", "")
+    if not assFile:
+        raise ValueError("No .ass file provided")
+
+    kickCmd = '"{}" -i "{}" -dw -dp -nstdin -v 2'.format(
+        KICK_EXE, assFile.replace("####", ZFRAME_TOKEN)
+    )
+    if mapper is not None:
+        kickCmd = mapper.mapCommand(kickCmd)
+    return kickCmd
+
+
+# Command builders by layerType
+LAYER_COMMANDS = {
+    "Maya": buildMayaCmd,
+    "MayaAssExport": buildAssExportCmd,
+    "Kick": buildKickCmd,
+}
+
+
+def assDirectory(jobData):
+    """Where a job's exported .ass files go on the share."""
+    parts = [jobData.get(key) or default for key, default in
+             (("show", "testing"), ("shot", "shot01"), ("name", "maya_job"))]
+    return "/".join([ASS_ROOT] + [INVALID_LAYER_NAME_CHARS.sub("_", part) for part in parts])
+
+
+def buildAssLayers(layerData, assDir):
+    """Split a Maya layer into an .ass export layer and a dependent kick layer.
+
+    The export layer keeps the original chunking and Maya service; the kick
+    layer keeps the layer's name, renders one frame per task on
+    KICK_SERVICE and waits frame by frame on the export.
+    """
+    name = layerData.get("name", "render")
+    assFile = "{}/{}/{}.####.ass".format(assDir, name, name)
+
+    export = dict(layerData)
+    export["name"] = "{}_export".format(name)
+    export["layerType"] = "MayaAssExport"
+    export["cmd"] = dict(layerData.get("cmd", {}))
+    export["cmd"]["assFile"] = assFile
+
+    render = {
+        "name": name,
+        "layerType": "Kick",
+        "layerRange": layerData.get("layerRange", "1-1"),
+        "chunk": 1,
+        "services": [KICK_SERVICE],
+        "cmd": {"assFile": assFile},
+        "dependsOn": export["name"],
+    }
+    return [export, render]
+
+
+def matrixLayerName(baseName, renderLayer, camera):
+    """Return a Cuebot-safe layer name for one render layer x camera pass."""
+    parts = [baseName] + [part for part in (renderLayer, camera) if part]
+    return INVALID_LAYER_NAME_CHARS.sub("_", "_".join(parts)).strip("_")
+
+
+def buildMatrixLayers(layerData, renderLayers, cameras):
+    """Expand one layer into one layer per (render layer, camera) pair.
+
+    Each copy renders a single pass with -rl/-cam, so Cuebot can dispatch
+    the passes of a shot in parallel within one job. An empty render layer
+    or camera list keeps the layer's own setting for that axis.
+    """
+    layers = []
+    names = set()
+    baseName = layerData.get("name", "render")
+    for renderLayer in renderLayers or [""]:
+        for camera in cameras or [""]:
+            name = matrixLayerName(baseName, renderLayer, camera)
+            # Sanitising can make distinct passes collide; keep names unique.
+            uniqueName, suffix = name, 2
+            while uniqueName in names:
+                uniqueName = "{}_{}".format(name, suffix)
+                suffix += 1
+            names.add(uniqueName)
+
+            layer = dict(layerData)
+            layer["name"] = uniqueName
+            layer["cmd"] = dict(layerData.get("cmd", {}))
+            if renderLayer:
+                layer["cmd"]["renderLayer"] = renderLayer
+            if camera:
+                layer["cmd"]["camera"] = camera
+            layers.append(layer)
+    return layers
+
+
+def buildPreviewLayers(layerData, keyCount=PREVIEW_FRAMES):
+    """Split a layer so its key frames render ahead of the rest.
+
+    Returns [<name>_preview, <name>]: the preview layer holds the first,
+    middle and last frames (keyCount of them) one per task, and the layer
+    keeps the other frames. Cuebot dispatches each layer's frames in order
+    and the preview layer comes first in the spec, so the key frames go out
+    with the job's first tasks.
+    """
+    frames = frame_set.FrameSet.parse(layerData.get("layerRange", "1-1"))
+    keys = frames.keyFrames(keyCount)
+    rest = frames.without(keys)
+
+    preview = dict(layerData)
+    preview["name"] = "{}_preview".format(layerData.get("name", "render"))
+    preview["layerRange"] = frame_set.FrameSet.fromFrames(keys).toSpec()
+    preview["chunk"] = 1
+    if not rest:
+        return [layerData]
+
+    layer = dict(layerData)
+    layer["layerRange"] = rest.toSpec()
+    return [preview, layer]
+
+
+def cuebotJobName(jobData):
+    """Return the name Cuebot will give the job.
+
+    Mirrors Cuebot's JobSpec.conformJobName: the job name is prefixed with
+    show-shot-user_ (unless already present), spaces become underscores and
+    the result is lowercased.
+    """
+    show = jobData.get("show", "testing")
+    shot = jobData.get("shot", "shot01")
+    user = jobData.get("username", "render")
+    prefix = "{}-{}-{}_".format(show, shot, user)
+    name = jobData.get("name", "maya_job").strip()
+    if name.startswith(prefix):
+        name = name[len(prefix):]
+    return (prefix + name.replace(" ", "_")).lower()
+
+
+def writeJobSpec(jobData, stream):
+    """Write the XML job spec for job data to a text stream."""
+    writer = JobSpecWriter(stream)
+    writer.startSpec(
+        show=jobData.get("show", "testing"),
+        shot=jobData.get("shot", "shot01"),
+        user=jobData.get("username", "render"),
+    )
+    jobName = jobData.get("name", "maya_job")
+    writer.startJob(jobName)
+    mapper = path_mapping.forShow(jobData.get("show"))
+
+    for layerData in jobData.get("layers", []):
+        services = layerData.get("services", ["maya"])
+        service = services[0] if services else "maya"
+
+        buildCmd = LAYER_COMMANDS.get(layerData.get("layerType"))
+        if buildCmd is None:
+            raise ValueError("Unsupported layer type: {}".format(layerData.get("layerType")))
+        command = buildCmd(layerData, mapper)
+        frameRange = layerData.get("layerRange", "1-1")
+        chunk = layerData.get("chunk", 1)
+        if FRAME_START_TOKEN in command:
+            chunk = rangeChunk(frameRange, chunk)
+
+        writer.addLayer(
+            name=layerData.get("name", "render"),
+            cmd=command,
+            frameRange=frameRange,
+            chunk=chunk,
+            services=[service],
+            cores=layerData.get("cores"),
+            memory=layerData.get("memory"),
+        )
+
+    writer.endJob()
+    for layerData in jobData.get("layers", []):
+        if layerData.get("dependsOn"):
+            writer.addDepend(jobName, layerData.get("name", "render"),
+                             jobName, layerData["dependsOn"])
+    writer.endSpec()
+
+
+def buildJobSpec(jobData):
+    """Build an XML job spec for direct submission to OpenCue."""
+    stream = io.StringIO()
+    writeJobSpec(jobData, stream)
+    return stream.getvalue()
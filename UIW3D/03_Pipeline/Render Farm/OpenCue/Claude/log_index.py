@@ -0,0 +1,500 @@
+#!/usr/bin/env python
+#  Copyright Contributors to the OpenCue Project
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Local index of render stats and errors parsed from frame logs.
+
+update() walks LOG_ROOT/<show>/<shot>/logs/<job>/*.rqlog and parses every
+log that is new or whose size or mtime changed since the last update. The
+directory listings carry both, so unchanged logs are never opened. Logs
+are parsed in a process pool, and the results are stored STORE_BATCH per
+transaction. Each log is one row:
+
+- render time: Arnold's "render done in", or the sum of render_task.py's
+  per-frame times
+- peak memory: the larger of Arnold's peak CPU memory and RQD's maxrss
+- total rays: from Arnold's ray counts
+- texture cache: main cache misses, redundant tile reads, peak and
+  maximum cache memory, from OpenImageIO's statistics
+- RQD's exit status, and the error line count
+
+Error lines are reduced to signatures, with paths, hex and numbers masked.
+Each distinct signature is stored once and linked to the logs with a
+count. Logs that disappear from the tree are dropped from the index.
+
+The index is SQLite in %LOCALAPPDATA%\\OpenCueSubmit\\log_index.db, with
+indexes for the queries below, so they answer without touching the share.
+
+Standard library only.
+
+Usage:
+    python log_index.py update [--show S] [--shot X] [--workers N]
+    python log_index.py slowest [--show S] [--shot X] [--job J] [--percent 1]
+    python log_index.py texture [--show S] [--shot X] [--job J]
+    python log_index.py errors [--show S] [--shot X] [--job J] [--top N]
+"""
+
+import argparse
+import collections
+import contextlib
+import math
+import os
+import re
+import sqlite3
+import tempfile
+import time
+from concurrent import futures
+
+INDEX_FILE = os.path.join(
+    os.environ.get("LOCALAPPDATA", tempfile.gettempdir()), "OpenCueSubmit", "log_index.db"
+)
+
+# Same tree as maya_submit_worker.LOG_ROOT
+LOG_ROOT = r"\\10.40.14.25\RenderOutputRepo\OpenCue\Logs"
+LOG_SUFFIX = ".rqlog"
+
+# Parsed logs stored per transaction
+STORE_BATCH = 200
+
+# Distinct error signatures kept per log
+MAX_SIGNATURES = 20
+SIGNATURE_LENGTH = 160
+
+# A cache that peaked within this fraction of its maximum ran out
+CACHE_FULL = 0.98
+
+# Lines after Arnold's "ray counts" header searched for its total
+RAY_TABLE_LINES = 40
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    show TEXT,
+    shot TEXT,
+    job TEXT,
+    frame TEXT,
+    renderSeconds REAL,
+    peakMemoryMb REAL,
+    rays INTEGER,
+    textureMisses INTEGER,
+    redundantTiles INTEGER,
+    cachePeakMb REAL,
+    cacheMaxMb REAL,
+    exitStatus INTEGER,
+    errorCount INTEGER
+);
+CREATE TABLE IF NOT EXISTS signatures (
+    id INTEGER PRIMARY KEY,
+    text TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS logErrors (
+    logId INTEGER NOT NULL,
+    signatureId INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (logId, signatureId)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS logsByJob ON logs (show, shot, job);
+CREATE INDEX IF NOT EXISTS logsByRenderSeconds ON logs (renderSeconds);
+CREATE INDEX IF NOT EXISTS logsByRedundantTiles ON logs (redundantTiles);
+CREATE INDEX IF NOT EXISTS logErrorsBySignature ON logErrors (signatureId);
+"""
+
+STAT_COLUMNS = ("renderSeconds", "peakMemoryMb", "rays", "textureMisses", "redundantTiles",
+                "cachePeakMb", "cacheMaxMb", "exitStatus", "errorCount")
+
+# Arnold: "00:02:53  4096MB         | render done in 2:53.845" (h:mm:ss or m:ss)
+RENDER_DONE = re.compile(rb"render done in (?:(\d+):)?(\d+):(\d+(?:\.\d+)?)")
+# render_task.py: "render_task: frame 12 done in 41.2s"
+TASK_FRAME = re.compile(rb"render_task: frame -?\d+ done in (\d+(?:\.\d+)?)s")
+PEAK_MEMORY = re.compile(rb"peak CPU memory used\s+(\d+(?:\.\d+)?)\s*MB")
+# RQD's footer, in KB
+MAX_RSS = re.compile(rb"^maxrss\s+(\d+)")
+EXIT_STATUS = re.compile(rb"^exitStatus\s+(-?\d+)")
+RAY_TOTAL = re.compile(rb"\|\s+total\s+(\d+)")
+# OpenImageIO ImageCache statistics
+CACHE_MAX = re.compile(rb"max_memory_MB=(\d+(?:\.\d+)?)")
+MAIN_MISSES = re.compile(rb"main cache misses\s*:\s*(\d+)")
+REDUNDANT = re.compile(rb"redundant reads\s*:\s*(\d+) tiles")
+CACHE_PEAK = re.compile(rb"Peak cache memory\s*:\s*(\d+(?:\.\d+)?)\s*([KMGT]?B)")
+
+ERROR_LINE = re.compile(
+    rb"ERROR|\[error\]|// Error|Traceback \(most recent|Fatal|[Oo]ut of memory|Exception:"
+)
+# Summaries like "0 warnings, 0 errors" aren't errors.
+NOT_ERROR = re.compile(rb"\b0 errors\b")
+
+# Masked out of error lines to make signatures
+LINE_PREFIX = re.compile(r"^\d\d:\d\d:\d\d\s+\d+MB\s+(?:[A-Z]+\s+)?\|\s*|^\[?\d{4}-\d\d-\d\d[ T][\d:.,]+\]?\s*")
+PATH = re.compile(r"[A-Za-z]:[\\/]\S+|\\\\\S+|(?:/[\w.-]+){2,}")
+HEX = re.compile(r"0x[0-9a-fA-F]+")
+NUMBER = re.compile(r"\d+")
+
+UNITS = {b"B": 1.0 / (1024 * 1024), b"KB": 1.0 / 1024, b"MB": 1.0, b"GB": 1024.0, b"TB": 1024.0 ** 2}
+
+
+def signature(line):
+    """Reduce an error line to a signature shared by its repeats."""
+    text = line.decode("utf-8", "replace").strip()
+    text = LINE_PREFIX.sub("", text)
+    text = PATH.sub("<path>", text)
+    text = HEX.sub("<hex>", text)
+    text = NUMBER.sub("#", text)
+    return " ".join(text.split())[:SIGNATURE_LENGTH]
+
+
+def parseLog(path):
+    """Parse one frame log; return (stats dict, {signature: count}).
+
+    Runs in the process pool, so it only takes and returns plain data.
+    """
+    stats = dict.fromkeys(STAT_COLUMNS)
+    errors = collections.Counter()
+    errorCount = 0
+    taskSeconds = None
+    arnoldPeak = rssPeak = None
+    rayLines = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if ERROR_LINE.search(line) and not NOT_ERROR.search(line):
+                errorCount += 1
+                key = signature(line)
+                if key in errors or len(errors) < MAX_SIGNATURES:
+                    errors[key] += 1
+                continue
+            if b"render" in line:
+                match = RENDER_DONE.search(line)
+                if match:
+                    hours, minutes, seconds = match.groups()
+                    stats["renderSeconds"] = (
+                        int(hours or 0) * 3600 + int(minutes) * 60 + float(seconds)
+                    )
+                    continue
+                match = TASK_FRAME.search(line)
+                if match:
+                    taskSeconds = (taskSeconds or 0.0) + float(match.group(1))
+                    continue
+            if rayLines:
+                rayLines -= 1
+                match = RAY_TOTAL.search(line)
+                if match:
+                    stats["rays"] = int(match.group(1))
+                    rayLines = 0
+                continue
+            if b"ray counts" in line:
+                rayLines = RAY_TABLE_LINES
+                continue
+            if b"peak CPU memory" in line:
+                match = PEAK_MEMORY.search(line)
+                if match:
+                    arnoldPeak = float(match.group(1))
+                continue
+            if b"cache" in line or b"redundant" in line or b"max_memory_MB" in line:
+                for pattern, column in ((MAIN_MISSES, "textureMisses"),
+                                        (REDUNDANT, "redundantTiles"),
+                                        (CACHE_MAX, "cacheMaxMb")):
+                    match = pattern.search(line)
+                    if match:
+                        stats[column] = float(match.group(1)) if column == "cacheMaxMb" \
+                            else int(match.group(1))
+                match = CACHE_PEAK.search(line)
+                if match:
+                    stats["cachePeakMb"] = float(match.group(1)) * UNITS[match.group(2)]
+                continue
+            if line.startswith(b"maxrss"):
+                match = MAX_RSS.match(line)
+                if match:
+                    rssPeak = int(match.group(1)) / 1024.0
+                continue
+            if line.startswith(b"exitStatus"):
+                match = EXIT_STATUS.match(line)
+                if match:
+                    stats["exitStatus"] = int(match.group(1))
+    if stats["renderSeconds"] is None:
+        stats["renderSeconds"] = taskSeconds
+    peaks = [peak for peak in (arnoldPeak, rssPeak) if peak is not None]
+    stats["peakMemoryMb"] = max(peaks) if peaks else None
+    stats["errorCount"] = errorCount
+    return stats, dict(errors)
+
+
+def parseEntry(entry):
+    """parseLog for the pool: (entry, stats, errors), or the error text."""
+    try:
+        stats, errors = parseLog(entry["path"])
+    except OSError as e:
+        return entry, None, str(e)
+    return entry, stats, errors
+
+
+def walkLogs(root=LOG_ROOT, show=None, shot=None):
+    """Yield {path, size, mtime, show, shot, job, frame} for every frame log.
+
+    Sizes and mtimes come from the directory listings.
+    """
+    def children(path, name=None):
+        try:
+            return [
+                entry for entry in os.scandir(path)
+                if entry.is_dir() and (name is None or entry.name == name)
+            ]
+        except OSError:
+            return []
+
+    for showEntry in children(root, show):
+        for shotEntry in children(showEntry.path, shot):
+            for jobEntry in children(os.path.join(shotEntry.path, "logs")):
+                try:
+                    entries = list(os.scandir(jobEntry.path))
+                except OSError:
+                    continue
+                prefix = jobEntry.name + "."
+                for entry in entries:
+                    if not entry.name.endswith(LOG_SUFFIX):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    frame = entry.name[:-len(LOG_SUFFIX)]
+                    if frame.startswith(prefix):
+                        frame = frame[len(prefix):]
+                    yield {
+                        "path": entry.path, "size": stat.st_size, "mtime": stat.st_mtime,
+                        "show": showEntry.name, "shot": shotEntry.name,
+                        "job": jobEntry.name, "frame": frame,
+                    }
+
+
+class LogIndex(object):
+    """SQLite index of parsed frame logs, updated incrementally."""
+
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        self.created = False
+
+    def connect(self):
+        # The database is created on first use, not at import time.
+        if not self.created:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Autocommit; writes are grouped explicitly by transaction().
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        if not self.created:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+            self.created = True
+        return db
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Yield a connection inside a write transaction."""
+        db = self.connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+        finally:
+            db.close()
+
+    def update(self, root=LOG_ROOT, show=None, shot=None, workers=None, onProgress=None):
+        """Parse new and changed logs under root; return (parsed, removed,
+        unchanged, failed).
+        """
+        where, params = scope(show, shot)
+        db = self.connect()
+        try:
+            known = dict(
+                (row["path"], (row["size"], row["mtime"]))
+                for row in db.execute("SELECT path, size, mtime FROM logs" + where, params)
+            )
+        finally:
+            db.close()
+
+        changed = []
+        seen = set()
+        for entry in walkLogs(root, show, shot):
+            seen.add(entry["path"])
+            if known.get(entry["path"]) != (entry["size"], entry["mtime"]):
+                changed.append(entry)
+        removed = [path for path in known if path not in seen]
+
+        parsed = failed = 0
+        batch = []
+        if changed:
+            with futures.ProcessPoolExecutor(workers) as pool:
+                for entry, stats, errors in pool.map(parseEntry, changed, chunksize=8):
+                    if stats is None:
+                        # Unreadable now (e.g. still locked); retried next update.
+                        failed += 1
+                        continue
+                    batch.append((entry, stats, errors))
+                    if len(batch) >= STORE_BATCH:
+                        self.store(batch)
+                        parsed += len(batch)
+                        batch = []
+                        if onProgress is not None:
+                            onProgress(parsed, len(changed))
+        if batch:
+            self.store(batch)
+            parsed += len(batch)
+        if removed:
+            with self.transaction() as db:
+                for path in removed:
+                    self.remove(db, path)
+        return parsed, len(removed), len(seen) - len(changed), failed
+
+    @staticmethod
+    def remove(db, path):
+        row = db.execute("SELECT id FROM logs WHERE path = ?", (path,)).fetchone()
+        if row is not None:
+            db.execute("DELETE FROM logErrors WHERE logId = ?", (row["id"],))
+            db.execute("DELETE FROM logs WHERE id = ?", (row["id"],))
+
+    def store(self, batch):
+        """Replace the rows of parsed logs in one transaction."""
+        with self.transaction() as db:
+            for entry, stats, errors in batch:
+                self.remove(db, entry["path"])
+                logId = db.execute(
+                    "INSERT INTO logs (path, size, mtime, show, shot, job, frame, {})"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, {})".format(
+                        ", ".join(STAT_COLUMNS), ", ".join("?" * len(STAT_COLUMNS))
+                    ),
+                    [entry[key] for key in ("path", "size", "mtime", "show", "shot", "job", "frame")]
+                    + [stats[column] for column in STAT_COLUMNS]
+                ).lastrowid
+                for text, count in errors.items():
+                    db.execute("INSERT OR IGNORE INTO signatures (text) VALUES (?)", (text,))
+                    db.execute(
+                        "INSERT INTO logErrors (logId, signatureId, count)"
+                        " SELECT ?, id, ? FROM signatures WHERE text = ?",
+                        (logId, count, text)
+                    )
+
+    def query(self, sql, params=()):
+        db = self.connect()
+        try:
+            return [dict(row) for row in db.execute(sql, params)]
+        finally:
+            db.close()
+
+    def slowest(self, percent=1.0, show=None, shot=None, job=None):
+        """Return the slowest percent of rendered frames, slowest first."""
+        where, params = scope(show, shot, job, "renderSeconds IS NOT NULL")
+        count = self.query("SELECT COUNT(*) AS n FROM logs" + where, params)[0]["n"]
+        limit = int(math.ceil(count * percent / 100.0))
+        return self.query(
+            "SELECT * FROM logs{} ORDER BY renderSeconds DESC LIMIT ?".format(where),
+            params + [limit]
+        )
+
+    def textureCacheFull(self, show=None, shot=None, job=None):
+        """Return frames whose texture cache ran out: tiles had to be read
+        again, or the cache peaked at its maximum.
+        """
+        where, params = scope(
+            show, shot, job,
+            "(redundantTiles > 0 OR cachePeakMb >= cacheMaxMb * {})".format(CACHE_FULL)
+        )
+        return self.query(
+            "SELECT * FROM logs{} ORDER BY redundantTiles DESC, cachePeakMb DESC".format(where),
+            params
+        )
+
+    def errors(self, show=None, shot=None, job=None, top=20):
+        """Return the most widespread error signatures with frame counts."""
+        where, params = scope(show, shot, job, prefix="l.")
+        return self.query(
+            "SELECT s.text, COUNT(*) AS frames, SUM(e.count) AS lines,"
+            " MIN(l.path) AS example FROM logErrors e"
+            " JOIN signatures s ON s.id = e.signatureId"
+            " JOIN logs l ON l.id = e.logId{}"
+            " GROUP BY s.id ORDER BY frames DESC, lines DESC LIMIT ?".format(where),
+            params + [top]
+        )
+
+
+def scope(show=None, shot=None, job=None, condition=None, prefix=""):
+    """Return a WHERE clause and its parameters for the optional filters."""
+    where, params = [], []
+    for column, value in (("show", show), ("shot", shot), ("job", job)):
+        if value:
+            where.append("{}{} = ?".format(prefix, column))
+            params.append(value)
+    if condition:
+        where.append(condition)
+    return (" WHERE " + " AND ".join(where)) if where else "", params
+
+
+def formatLog(row):
+    parts = ["{}/{}/{} {}".format(row["show"], row["shot"], row["job"], row["frame"])]
+    if row["renderSeconds"] is not None:
+        parts.append("{:.1f} min".format(row["renderSeconds"] / 60.0))
+    if row["peakMemoryMb"] is not None:
+        parts.append("{:.1f} GB peak".format(row["peakMemoryMb"] / 1024.0))
+    if row["redundantTiles"]:
+        parts.append("{} redundant tiles".format(row["redundantTiles"]))
+    if row["cachePeakMb"] is not None and row["cacheMaxMb"]:
+        parts.append("cache {:.0f}/{:.0f} MB".format(row["cachePeakMb"], row["cacheMaxMb"]))
+    if row["errorCount"]:
+        parts.append("{} error lines".format(row["errorCount"]))
+    return "  ".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index render stats and errors from frame logs")
+    parser.add_argument("command", choices=["update", "slowest", "texture", "errors"])
+    parser.add_argument("--root", default=LOG_ROOT)
+    parser.add_argument("--show")
+    parser.add_argument("--shot")
+    parser.add_argument("--job")
+    parser.add_argument("--workers", type=int, help="Parser processes (default: CPU count)")
+    parser.add_argument("--percent", type=float, default=1.0, help="Slowest percent of frames")
+    parser.add_argument("--top", type=int, default=20, help="Error signatures to list")
+    args = parser.parse_args()
+
+    index = LogIndex()
+    if args.command == "update":
+        start = time.time()
+        parsed, removed, unchanged, failed = index.update(
+            args.root, args.show, args.shot, args.workers,
+            lambda done, total: print("  parsed {}/{}".format(done, total))
+        )
+        print("Parsed {} log(s), {} unchanged, {} removed, {} unreadable in {:.1f}s".format(
+            parsed, unchanged, removed, failed, time.time() - start
+        ))
+    elif args.command == "slowest":
+        for row in index.slowest(args.percent, args.show, args.shot, args.job):
+            print(formatLog(row))
+    elif args.command == "texture":
+        rows = index.textureCacheFull(args.show, args.shot, args.job)
+        for row in rows:
+            print(formatLog(row))
+        print("{} frame(s) ran out of texture cache".format(len(rows)))
+    else:
+        for row in index.errors(args.show, args.shot, args.job, args.top):
+            print("{:>6} frames {:>8} lines  {}".format(row["frames"], row["lines"], row["text"]))
+            print("{:>23}e.g. {}".format("", row["example"]))
+
+
+if __name__ == "__main__":
+    main()
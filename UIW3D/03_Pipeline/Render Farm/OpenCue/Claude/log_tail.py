@@ -0,0 +1,324 @@
+#!/usr/bin/env python
+#  Copyright Contributors to the OpenCue Project
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Tail and follow OpenCue frame logs without reading them whole.
+
+Frame logs can reach RQD's 1 GB cap. Opening one in an editor over SMB
+reads all of it. This module reads only the bytes needed:
+
+- The last N lines come from blocks read backwards from the end of the
+  file. Large local files (MMAP_THRESHOLD and up) are memory-mapped
+  instead, so only the pages holding the tail are touched. Files on a UNC
+  share are never mapped.
+- Following keeps a byte offset per file and reads only what was appended
+  since. A file that shrinks or is replaced (a retry writes a new log) is
+  read again from the start. Replacement is told from the listing: the
+  inode on POSIX, the creation time on Windows.
+
+A job's log directory (getLogPath in maya_submit_worker) holds one
+<job>.<frame>.rqlog per frame. Following it costs one directory listing
+per poll, which also carries every file's size and identity. Only logs
+that grew or were replaced are opened. Each poll reads at most MAX_READ
+per file and READ_BUDGET in total, taking the grown files in round-robin
+order. Polls back off from MIN_INTERVAL to MAX_INTERVAL while nothing
+grows.
+
+Standard library only; runs in Maya's Python or the worker's.
+
+Usage:
+    python log_tail.py <log file or job log dir> [-n LINES] [-f] [--frame GLOB]
+    python log_tail.py --show S --shot X --job J [-n LINES] [-f] [--frame GLOB]
+"""
+
+import argparse
+import fnmatch
+import mmap
+import os
+import sys
+import time
+
+import job_monitor
+
+LOG_SUFFIX = ".rqlog"
+
+DEFAULT_LINES = 20
+
+# Read size when searching backwards for line starts
+BLOCK_SIZE = 64 * 1024
+
+# Local files at least this big are memory-mapped to find their tail
+MMAP_THRESHOLD = 32 * 1024 * 1024
+
+# Bytes read per file, and across all files, in one poll
+MAX_READ = 1024 * 1024
+READ_BUDGET = 8 * 1024 * 1024
+
+# Follow interval in seconds, backing off while no log grows
+MIN_INTERVAL = 1
+MAX_INTERVAL = 15
+
+
+def isRemote(path):
+    """Return True for UNC paths, which are never memory-mapped."""
+    return path.replace("/", "\\").startswith("\\\\")
+
+
+def frameName(path):
+    """Return the frame name of <job>.<frame>.rqlog, else the file name."""
+    name = os.path.basename(path)
+    if name.endswith(LOG_SUFFIX):
+        name = name[:-len(LOG_SUFFIX)]
+        return name.rsplit(".", 1)[-1]
+    return name
+
+
+def findLineStart(buffer, end, count, newlines=0):
+    """Find where the count'th line counting back from end starts.
+
+    Returns (offset, newlines found); offset is None if buffer[:end] holds
+    fewer line starts.
+    """
+    while newlines < count:
+        end = buffer.rfind(b"\n", 0, end)
+        if end < 0:
+            return None, newlines
+        newlines += 1
+    return end + 1, newlines
+
+
+def tailOffset(path, count, size=None):
+    """Return the byte offset where the last count lines of path start."""
+    if size is None:
+        size = os.path.getsize(path)
+    if count <= 0 or size == 0:
+        return size
+    with open(path, "rb") as f:
+        # A final newline ends the last line; it doesn't start a new one.
+        f.seek(size - 1)
+        end = size - 1 if f.read(1) == b"\n" else size
+        if size >= MMAP_THRESHOLD and not isRemote(path):
+            with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as buffer:
+                offset, _ = findLineStart(buffer, end, count)
+                return offset or 0
+        newlines = 0
+        while end > 0:
+            start = max(0, end - BLOCK_SIZE)
+            f.seek(start)
+            block = f.read(end - start)
+            offset, newlines = findLineStart(block, len(block), count, newlines)
+            if offset is not None:
+                return start + offset
+            end = start
+    return 0
+
+
+def fileIdentity(st):
+    """Return what tells a replaced log from the one that was followed.
+
+    Windows listings leave st_ino 0, but st_ctime there is the creation
+    time. POSIX ctime changes on every write, so the inode is used.
+    """
+    if os.name == "nt":
+        return st.st_ctime_ns
+    return st.st_ino
+
+
+def decode(line):
+    return line.rstrip(b"\r").decode("utf-8", "replace")
+
+
+def lastLines(path, count=DEFAULT_LINES):
+    """Return the last count lines of a log, reading only its tail."""
+    size = os.path.getsize(path)
+    offset = tailOffset(path, count, size)
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read(size - offset)
+    return [decode(line) for line in data.splitlines()]
+
+
+class LogFile(object):
+    """Read position in one followed log."""
+
+    def __init__(self, path, offset=0, identity=None):
+        self.path = path
+        self.name = frameName(path)
+        self.offset = offset
+        self.identity = identity
+        self.partial = b""
+
+    def changed(self, size, identity):
+        return size != self.offset or identity != self.identity
+
+    def read(self, size, limit=MAX_READ, identity=None):
+        """Return the complete lines appended up to size, reading at most
+        limit bytes, and the bytes read.
+        """
+        if size < self.offset or identity != self.identity:
+            # Truncated or replaced: a retried frame starts a new log.
+            self.offset = 0
+            self.partial = b""
+            self.identity = identity
+        if size == self.offset:
+            return [], 0
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(min(limit, size - self.offset))
+        self.offset += len(data)
+        lines = (self.partial + data).split(b"\n")
+        self.partial = lines.pop()
+        if len(self.partial) > limit:
+            # One enormous line (progress bars without newlines).
+            lines.append(self.partial)
+            self.partial = b""
+        return [decode(line) for line in lines], len(data)
+
+
+class LogTail(object):
+    """Follows one log file or every frame log in a job's log directory."""
+
+    def __init__(self, path, lines=DEFAULT_LINES, pattern=None):
+        self.path = path
+        self.lines = lines
+        self.pattern = pattern
+        self.files = {}
+        self.started = False
+        self.cursor = 0
+
+    def listFiles(self):
+        """Return {path: (size, identity)} of the followed logs.
+
+        On Windows the directory listing carries every file's size and
+        creation time, so this is one SMB round trip however many frames
+        the job has.
+        """
+        if not os.path.isdir(self.path):
+            try:
+                st = os.stat(self.path)
+            except OSError:
+                return {}
+            return {self.path: (st.st_size, fileIdentity(st))}
+        files = {}
+        for entry in os.scandir(self.path):
+            if not entry.name.endswith(LOG_SUFFIX):
+                continue
+            if self.pattern and not fnmatch.fnmatch(frameName(entry.name), self.pattern):
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            files[entry.path] = (st.st_size, fileIdentity(st))
+        return files
+
+    def poll(self, budget=READ_BUDGET, maxRead=MAX_READ):
+        """Return [(frame name, line)] appended since the last poll, and
+        whether more is waiting beyond the budget.
+
+        The first poll starts every existing log at its last self.lines
+        lines; logs that appear later are read from the start.
+        """
+        files = self.listFiles()
+        for path, (size, identity) in files.items():
+            if path not in self.files:
+                offset = tailOffset(path, self.lines, size) if not self.started else 0
+                self.files[path] = LogFile(path, offset, identity)
+        for path in [path for path in self.files if path not in files]:
+            del self.files[path]
+        self.started = True
+
+        grown = sorted(
+            (logFile for path, logFile in self.files.items() if logFile.changed(*files[path])),
+            key=lambda logFile: logFile.path
+        )
+        if grown:
+            # Start after the file that was last served so no log starves.
+            start = self.cursor % len(grown)
+            grown = grown[start:] + grown[:start]
+        output = []
+        for index, logFile in enumerate(grown):
+            if budget <= 0:
+                self.cursor += index
+                return output, True
+            size, identity = files[logFile.path]
+            lines, read = logFile.read(size, min(maxRead, budget), identity)
+            budget -= read
+            output.extend((logFile.name, line) for line in lines)
+        self.cursor += len(grown)
+        pending = any(logFile.changed(*files[path]) for path, logFile in self.files.items())
+        return output, pending
+
+    def follow(self, onLines, stopEvent=None):
+        """Poll until stopEvent is set, passing each poll's lines to onLines."""
+        interval = MIN_INTERVAL
+        while stopEvent is None or not stopEvent.is_set():
+            lines, pending = self.poll()
+            if lines:
+                onLines(lines)
+            interval = job_monitor.nextInterval(
+                interval, bool(lines), MIN_INTERVAL, MAX_INTERVAL
+            )
+            if pending:
+                continue
+            if stopEvent is not None:
+                if stopEvent.wait(interval):
+                    return
+            else:
+                time.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tail and follow OpenCue frame logs")
+    parser.add_argument("path", nargs="?", help="Frame log file or job log directory")
+    parser.add_argument("--show")
+    parser.add_argument("--shot")
+    parser.add_argument("--job", help="Job name; with --show and --shot, its log directory")
+    parser.add_argument("-n", "--lines", type=int, default=DEFAULT_LINES,
+                        help="Lines to show from the end of each log")
+    parser.add_argument("-f", "--follow", action="store_true",
+                        help="Keep printing lines as they are written")
+    parser.add_argument("--frame", help="Only frames matching this glob, e.g. 0001-* or *-render")
+    args = parser.parse_args()
+
+    path = args.path
+    if path is None:
+        if not (args.show and args.shot and args.job):
+            parser.error("give a path, or --show, --shot and --job")
+        from maya_submit_worker import getLogPath
+        path = getLogPath({"show": args.show, "shot": args.shot}, args.job)
+
+    tail = LogTail(path, args.lines, args.frame)
+    prefix = os.path.isdir(path)
+
+    def printLines(lines):
+        for name, line in lines:
+            print("{} | {}".format(name, line) if prefix else line)
+        sys.stdout.flush()
+
+    try:
+        if args.follow:
+            tail.follow(printLines)
+        else:
+            pending = True
+            while pending:
+                lines, pending = tail.poll()
+                printLines(lines)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,20 @@ OPENCUE_PYTHON_PATH = os.environ.get("OPENCUE_PYTHON_PATH", "")
 if OPENCUE_PYTHON_PATH and OPENCUE_PYTHON_PATH not in sys.path:
     sys.path.insert(0, OPENCUE_PYTHON_PATH)
 
+# Shared submitter modules (scene_info, ...) live one directory up
+SUBMIT_MODULES_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SUBMIT_MODULES_PATH not in sys.path:
+    sys.path.append(SUBMIT_MODULES_PATH)
+
+import chunk_sizing
+import frame_set
+import job_history
+import job_spec
+import path_mapping
+import preflight
+import resource_predictor
+import scene_info
+
 # OpenCue imports
 try:
     import outline
@@ -43,16 +57,16 @@ except ImportError as e:
 # Default show name for jobs
 DEFAULT_SHOW = "maya_renders"
 
-# UNC path prefix for render files (how render nodes access files)
-# This should point to your P4 workspace on the Linux server
-UNC_PATH_PREFIX = r"\\YOUR_LINUX_SERVER\p4workspace"
-
-# Local path prefix (what artists use locally with S: drive)
-LOCAL_PATH_PREFIX = "S:"
+# Local paths (S:, ...) are mapped to render node paths by the rules in
+# path_mappings.json one directory up; see path_mapping.py.
 
 # Maya executable on render nodes
 MAYA_EXECUTABLE = "maya"
 
+# mayapy and the render-task script that renders a chunk in one session
+MAYAPY_EXECUTABLE = "mayapy"
+RENDER_TASK_SCRIPT = job_spec.RENDER_TASK_SCRIPT
+
 # Arnold renderer command
 ARNOLD_RENDERER = "arnold"
 
@@ -61,70 +75,64 @@ DEFAULT_SERVICE = "maya2026"
 
 
 # ============================================================================
-# Path Conversion
+# Pre-flight
 # ============================================================================
 
-def convert_to_render_path(local_path):
-    """Convert local path (S:\...) to UNC path for render nodes."""
-    if local_path.startswith(LOCAL_PATH_PREFIX):
-        return local_path.replace(LOCAL_PATH_PREFIX, UNC_PATH_PREFIX, 1)
-    return local_path
+def check_dependencies(show=None):
+    """Check the scene's files exist where render nodes will read them.
+
+    Returns True if everything was found or the artist chose to submit
+    anyway.
+    """
+    report = preflight.runPreflight(path_mapping.forShow(show))
+    if not report["problems"]:
+        print(preflight.formatReport(report))
+        return True
+    cmds.warning(f"Pre-flight found {len(report['problems'])} problem(s); see the Script Editor")
+    print(preflight.formatReport(report, limit=len(report["problems"])))
+    answer = cmds.confirmDialog(
+        title="Missing Scene Files",
+        message=f"Render nodes won't be able to read {len(report['problems'])} file(s) "
+                f"this scene uses.\n\n{preflight.formatReport(report, limit=10)}"
+                "\n\nSubmit anyway?",
+        button=["Submit Anyway", "Cancel"],
+        defaultButton="Cancel",
+        cancelButton="Cancel",
+        dismissString="Cancel"
+    )
+    return answer == "Submit Anyway"
 
 
-def get_scene_info():
-    """Get current scene information."""
-    scene_file = cmds.file(query=True, sceneName=True)
-    if not scene_file:
+def get_scene_info(refresh=False):
+    """Get current scene information.
+
+    Served from the scene_info cache, which Maya events keep current, so
+    reopening the submitter doesn't requery the scene.
+    """
+    info = scene_info.getSceneInfo(refresh)
+    if not info["sceneFile"]:
         return None
 
     # Get frame range
-    start_frame = int(cmds.playbackOptions(query=True, animationStartTime=True))
-    end_frame = int(cmds.playbackOptions(query=True, animationEndTime=True))
+    start_frame = info["playbackStart"]
+    end_frame = info["playbackEnd"]
 
     # Try to get render range if set differently
-    try:
-        render_start = int(cmds.getAttr("defaultRenderGlobals.startFrame"))
-        render_end = int(cmds.getAttr("defaultRenderGlobals.endFrame"))
-        if render_start > 0 or render_end > 0:
-            start_frame = render_start
-            end_frame = render_end
-    except:
-        pass
-
-    # Get renderer
-    renderer = cmds.getAttr("defaultRenderGlobals.currentRenderer") or "arnold"
-
-    # Get renderable cameras
-    cameras = []
-    for cam in cmds.ls(type="camera"):
-        if cmds.getAttr(f"{cam}.renderable"):
-            transform = cmds.listRelatives(cam, parent=True)[0]
-            cameras.append(transform)
-
-    # Get render layers
-    layers = cmds.ls(type="renderLayer")
-    render_layers = [l for l in layers if not l.startswith("defaultRenderLayer")]
-    if not render_layers:
-        render_layers = ["defaultRenderLayer"]
-
-    # Get output path
-    output_path = ""
-    try:
-        output_path = cmds.workspace(fileRuleEntry="images")
-        workspace = cmds.workspace(query=True, rootDirectory=True)
-        output_path = os.path.join(workspace, output_path)
-    except:
-        pass
+    if info["startFrame"] is not None and (info["startFrame"] > 0 or info["endFrame"] > 0):
+        start_frame = info["startFrame"]
+        end_frame = info["endFrame"]
+
+    render_layers = info["renderLayers"] or ["defaultRenderLayer"]
 
     return {
-        "scene_file": scene_file,
-        "scene_name": os.path.splitext(os.path.basename(scene_file))[0],
+        "scene_file": info["sceneFile"],
+        "scene_name": info["sceneName"],
         "start_frame": start_frame,
         "end_frame": end_frame,
-        "renderer": renderer,
-        "cameras": cameras,
+        "renderer": info["renderer"] or "arnold",
+        "cameras": info["renderableCameras"],
         "render_layers": render_layers,
-        "output_path": output_path
+        "output_path": info["outputPath"]
     }
 
 
@@ -132,18 +140,86 @@ def get_scene_info():
 # Submission Functions
 # ============================================================================
 
+def plan_chunk(show, shot, scene_file, frame_count, min_cores):
+    """Pick a chunk size from render history and the farm's idle cores."""
+    try:
+        idle_cores = chunk_sizing.idleCores(opencue.api)
+    except Exception as e:
+        print(f"Could not read farm load: {e}")
+        idle_cores = None
+    plan = chunk_sizing.planChunk(
+        show, shot, scene_file, frame_count, idle_cores, min_cores
+    )
+    print(f"Chunk {plan.chunk}: {plan.reason}")
+    return plan
+
+
+def build_render_command(render_scene_path, renderer, camera, render_layer=None,
+                         render_server=False):
+    """Build the Maya batch render command for one pass.
+
+    Without render_server, Maya batch renders each chunk from its first to
+    its last frame. With it, each task renders its chunk in one mayapy
+    session (render_task.py) instead; it is ignored for renderers that
+    can't render in-process.
+    """
+    if render_server and job_spec.rendersInProcess(renderer):
+        cmd = [
+            MAYAPY_EXECUTABLE, RENDER_TASK_SCRIPT,
+            "--scene", render_scene_path,
+            "--frames", job_spec.FRAME_SPEC_TOKEN,
+            "--renderer", renderer,
+            "--camera", camera
+        ]
+        if render_layer:
+            cmd += ["--render-layer", render_layer]
+        return cmd
+
+    if renderer.lower() == "arnold":
+        # Arnold batch render
+        renderer = ARNOLD_RENDERER
+
+    cmd = [
+        MAYA_EXECUTABLE, "-batch",
+        "-file", render_scene_path,
+        "-renderer", renderer,
+        "-camera", camera,
+        "-s", job_spec.FRAME_START_TOKEN,
+        "-e", job_spec.FRAME_END_TOKEN
+    ]
+    if render_layer:
+        cmd += ["-rl", render_layer]
+    return cmd
+
+
 def submit_render(job_name, show, shot, start_frame, end_frame,
                   scene_file, renderer, camera, chunk_size=1,
                   min_cores=4, min_memory=8192, priority=100,
-                  render_layers=None):
-    """Submit a render job to OpenCue."""
+                  render_layers=None, cameras=None, render_server=False,
+                  frames=None, preview_first=False, auto_resources=False):
+    """Submit a render job to OpenCue.
+
+    With render_layers and/or cameras, one layer is created per
+    (render layer, camera) pass so Cuebot can render them in parallel;
+    otherwise a single "render" layer renders `camera`. render_server
+    renders each chunk in one Maya session (see build_render_command).
+
+    frames is an optional frame-set expression (1-240x4, 1,50,100, ...)
+    replacing start_frame-end_frame. preview_first moves each pass's first,
+    middle and last frames into a preview layer ahead of the rest.
+
+    auto_resources replaces min_memory per layer with a prediction from the
+    local job history, where there is enough history.
+    """
 
     if not OPENCUE_AVAILABLE:
         cmds.error(f"OpenCue not available: {OPENCUE_ERROR}")
         return None
 
+    frame_range = frame_set.FrameSet.parse(frames or f"{start_frame}-{end_frame}").toSpec()
+
     # Convert scene path for render nodes
-    render_scene_path = convert_to_render_path(scene_file)
+    render_scene_path = path_mapping.mapPath(scene_file, show)
 
     # Create job
     job = outline.Outline(
@@ -154,46 +230,53 @@ def submit_render(job_name, show, shot, start_frame, end_frame,
     )
     job.set_priority(priority)
 
-    # Build render command
-    if renderer.lower() == "arnold":
-        # Arnold batch render
-        cmd = [
-            MAYA_EXECUTABLE, "-batch",
-            "-file", render_scene_path,
-            "-renderer", "arnold",
-            "-camera", camera,
-            "-s", "#IFRAME#",
-            "-e", "#IFRAME#"
-        ]
-    else:
-        # Generic Maya batch render
-        cmd = [
-            MAYA_EXECUTABLE, "-batch",
-            "-file", render_scene_path,
-            "-renderer", renderer,
-            "-camera", camera,
-            "-s", "#IFRAME#",
-            "-e", "#IFRAME#"
+    # One pass per (render layer, camera), or a single pass for `camera`
+    passes = [("render", None, camera)]
+    if render_layers or cameras:
+        passes = [
+            (job_spec.matrixLayerName("render", layer, cam), layer, cam)
+            for layer in render_layers or [None]
+            for cam in cameras or [camera]
         ]
 
-    # Create render layer
-    render_layer = outline.modules.shell.Shell(
-        name="render",
-        command=cmd,
-        range=f"{start_frame}-{end_frame}",
-        chunk=chunk_size
-    )
+    for layer_name, maya_layer, pass_camera in passes:
+        cmd = build_render_command(render_scene_path, renderer, pass_camera, maya_layer,
+                                   render_server)
+
+        layer_data = {"name": layer_name, "layerRange": frame_range, "chunk": chunk_size}
+        splits = job_spec.buildPreviewLayers(layer_data) if preview_first else [layer_data]
 
-    # Set resource requirements
-    render_layer.set_min_cores(min_cores)
-    render_layer.set_min_memory(min_memory)
-    render_layer.set_service(DEFAULT_SERVICE)
+        for split in splits:
+            chunk = split["chunk"]
+            if job_spec.FRAME_START_TOKEN in cmd:
+                chunk = job_spec.rangeChunk(split["layerRange"], chunk)
 
-    # Set environment variables for render nodes
-    render_layer.set_env("MAYA_LOCATION", os.environ.get("MAYA_LOCATION", ""))
-    render_layer.set_env("ARNOLD_PATH", os.environ.get("ARNOLD_PATH", ""))
+            # Create render layer
+            render_layer = outline.modules.shell.Shell(
+                name=split["name"],
+                command=cmd,
+                range=split["layerRange"],
+                chunk=chunk
+            )
 
-    job.add_layer(render_layer)
+            # Set resource requirements
+            memory = min_memory
+            if auto_resources:
+                prediction = resource_predictor.predict(
+                    job_history.JobHistory(), DEFAULT_SERVICE, show, shot, scene_file,
+                    split["name"]
+                )
+                print(f"{split['name']}: {resource_predictor.formatPrediction(prediction)}")
+                memory = prediction.memory or memory
+            render_layer.set_min_cores(min_cores)
+            render_layer.set_min_memory(memory)
+            render_layer.set_service(DEFAULT_SERVICE)
+
+            # Set environment variables for render nodes
+            render_layer.set_env("MAYA_LOCATION", os.environ.get("MAYA_LOCATION", ""))
+            render_layer.set_env("ARNOLD_PATH", os.environ.get("ARNOLD_PATH", ""))
+
+            job.add_layer(render_layer)
 
     # Submit
     try:
@@ -276,7 +359,7 @@ def show():
     cmds.columnLayout(adjustableColumn=True, rowSpacing=3)
 
     cmds.text(label=f"Scene: {scene_info['scene_file']}", align="left")
-    cmds.text(label=f"(Render path: {convert_to_render_path(scene_info['scene_file'])})",
+    cmds.text(label=f"(Render path: {path_mapping.mapPath(scene_info['scene_file'])})",
               align="left", font="smallObliqueLabelFont")
 
     start_frame_field = cmds.intFieldGrp(
@@ -291,6 +374,22 @@ def show():
         columnWidth=[(1, 100), (2, 100)]
     )
 
+    frames_field = cmds.textFieldGrp(
+        label="Frames:",
+        text="",
+        columnWidth=[(1, 100), (2, 300)],
+        annotation="Optional frame set instead of start-end: steps (1-240x4), "
+                   "lists (1,50,100) or both"
+    )
+
+    preview_checkbox = cmds.checkBoxGrp(
+        label="",
+        label1="Render first, middle and last frames first",
+        value1=False,
+        columnWidth=[(1, 100)],
+        annotation="Put the key frames in a preview layer ahead of the rest"
+    )
+
     chunk_size_field = cmds.intFieldGrp(
         label="Chunk Size:",
         value1=1,
@@ -298,11 +397,57 @@ def show():
         annotation="Frames per task (1 = one frame per task)"
     )
 
+    auto_chunk_checkbox = cmds.checkBoxGrp(
+        label="",
+        label1="Auto chunk size from render history",
+        value1=False,
+        columnWidth=[(1, 100)],
+        annotation="Size chunks from past load and per-frame render times "
+                   "and the farm's idle cores",
+        changeCommand=lambda value: cmds.intFieldGrp(
+            chunk_size_field, edit=True, enable=not value
+        )
+    )
+
     camera_menu = cmds.optionMenuGrp(label="Camera:", columnWidth=[(1, 100)])
     for cam in scene_info['cameras']:
         cmds.menuItem(label=cam)
 
-    renderer_menu = cmds.optionMenuGrp(label="Renderer:", columnWidth=[(1, 100)])
+    matrix_checkbox = cmds.checkBoxGrp(
+        label="",
+        label1="One layer per render layer x camera",
+        value1=False,
+        columnWidth=[(1, 100)],
+        annotation="Render every render layer from every renderable camera as "
+                   "parallel layers of one job"
+    )
+
+    server_checkbox = cmds.checkBoxGrp(
+        label="",
+        label1="Render each chunk in one Maya session",
+        value1=False,
+        columnWidth=[(1, 100)],
+        annotation="Load the scene once per task and render the chunk frame by "
+                   "frame, retrying a failed frame instead of the whole chunk. "
+                   "Arnold only"
+    )
+
+    preflight_checkbox = cmds.checkBoxGrp(
+        label="",
+        label1="Check scene files before submitting",
+        value1=True,
+        columnWidth=[(1, 100)],
+        annotation="Make sure every texture, reference and cache exists on the "
+                   "share render nodes read from"
+    )
+
+    renderer_menu = cmds.optionMenuGrp(
+        label="Renderer:",
+        columnWidth=[(1, 100)],
+        changeCommand=lambda renderer: cmds.checkBoxGrp(
+            server_checkbox, edit=True, enable=job_spec.rendersInProcess(renderer)
+        )
+    )
     cmds.menuItem(label="arnold")
     cmds.menuItem(label="mayaHardware2")
     cmds.menuItem(label="mayaSoftware")
@@ -336,6 +481,30 @@ def show():
         columnWidth=[(1, 100), (2, 60), (3, 190)]
     )
 
+    resources_checkbox = cmds.checkBoxGrp(
+        label="",
+        label1="Auto from job history",
+        value1=False,
+        columnWidth=[(1, 100)],
+        annotation="Predict each layer's memory from past frames of this "
+                   "scene, shot or show; the slider applies without history",
+        changeCommand=lambda value: update_resource_preview()
+    )
+    resources_text = cmds.text(label="", align="left", font="smallObliqueLabelFont")
+
+    def update_resource_preview():
+        if not cmds.checkBoxGrp(resources_checkbox, query=True, value1=True):
+            cmds.text(resources_text, edit=True, label="")
+            return
+        prediction = resource_predictor.predict(
+            job_history.JobHistory(), DEFAULT_SERVICE,
+            cmds.textFieldGrp(show_field, query=True, text=True),
+            cmds.textFieldGrp(shot_field, query=True, text=True),
+            scene_info['scene_file'], "render"
+        )
+        cmds.text(resources_text, edit=True,
+                  label=resource_predictor.formatPrediction(prediction))
+
     priority_field = cmds.intSliderGrp(
         label="Priority:",
         field=True,
@@ -355,6 +524,30 @@ def show():
 
     def do_submit(*args):
         """Submit button callback."""
+        matrix = cmds.checkBoxGrp(matrix_checkbox, query=True, value1=True)
+        if cmds.checkBoxGrp(preflight_checkbox, query=True, value1=True):
+            if not check_dependencies(cmds.textFieldGrp(show_field, query=True, text=True)):
+                return
+        frames = cmds.textFieldGrp(frames_field, query=True, text=True).strip()
+        try:
+            frame_count = len(frame_set.FrameSet.parse(frames)) if frames else None
+        except ValueError as e:
+            cmds.confirmDialog(title="Bad Frames", message=str(e), button=["OK"])
+            return
+        chunk_note = ""
+        if cmds.checkBoxGrp(auto_chunk_checkbox, query=True, value1=True):
+            plan = plan_chunk(
+                cmds.textFieldGrp(show_field, query=True, text=True),
+                cmds.textFieldGrp(shot_field, query=True, text=True),
+                scene_info['scene_file'],
+                frame_count or (
+                    cmds.intFieldGrp(end_frame_field, query=True, value1=True)
+                    - cmds.intFieldGrp(start_frame_field, query=True, value1=True) + 1
+                ),
+                cmds.intSliderGrp(cores_field, query=True, value=True)
+            )
+            cmds.intFieldGrp(chunk_size_field, edit=True, value1=plan.chunk)
+            chunk_note = f"\n\nChunk {plan.chunk}: {plan.reason}"
         result = submit_render(
             job_name=cmds.textFieldGrp(job_name, query=True, text=True),
             show=cmds.textFieldGrp(show_field, query=True, text=True),
@@ -367,13 +560,19 @@ def show():
             chunk_size=cmds.intFieldGrp(chunk_size_field, query=True, value1=True),
             min_cores=cmds.intSliderGrp(cores_field, query=True, value=True),
             min_memory=cmds.intSliderGrp(memory_field, query=True, value=True),
-            priority=cmds.intSliderGrp(priority_field, query=True, value=True)
+            priority=cmds.intSliderGrp(priority_field, query=True, value=True),
+            render_layers=scene_info['render_layers'] if matrix else None,
+            cameras=scene_info['cameras'] if matrix else None,
+            render_server=cmds.checkBoxGrp(server_checkbox, query=True, value1=True),
+            frames=frames or None,
+            preview_first=cmds.checkBoxGrp(preview_checkbox, query=True, value1=True),
+            auto_resources=cmds.checkBoxGrp(resources_checkbox, query=True, value1=True)
         )
 
         if result:
             cmds.confirmDialog(
                 title="Job Submitted",
-                message=f"Successfully submitted job:\n{result}\n\nCheck CueGUI to monitor progress.",
+                message=f"Successfully submitted job:\n{result}{chunk_note}\n\nCheck CueGUI to monitor progress.",
                 button=["OK"]
             )
             cmds.deleteUI(WINDOW_NAME)
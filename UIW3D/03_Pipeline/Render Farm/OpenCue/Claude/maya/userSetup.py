@@ -119,6 +119,16 @@ def create_opencue_menu():
         )
 
 
+def install_scene_info_cache():
+    """Start tracking scene changes so the submitters open instantly."""
+    try:
+        import scene_info
+    except ImportError:
+        return
+    scene_info.CACHE.install()
+
+
 # Run setup when Maya loads
 cmds.evalDeferred(setup_opencue)
 cmds.evalDeferred(create_opencue_menu)
+cmds.evalDeferred(install_scene_info_cache)
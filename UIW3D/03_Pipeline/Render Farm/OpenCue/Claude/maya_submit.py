@@ -29,11 +29,28 @@ import json
 import logging
 import os
 import subprocess
-import tempfile
+import threading
+import time
 
 import maya.cmds as cmds
 import maya.utils
 
+import chunk_sizing
+import build_worker_zipapp
+import cuebot_hosts
+import frame_set
+import job_history
+import job_monitor
+import job_spec
+import path_mapping
+import preflight
+import render_cache
+import resource_predictor
+import scene_info
+import spec_cache
+import submit_daemon
+import submit_outbox
+
 # Maya 2026 uses PySide6 (Qt 6.5+)
 try:
     from PySide6 import QtCore, QtWidgets, QtGui
@@ -42,13 +59,33 @@ except ImportError:
 
 # Configuration
 PYTHON_PATH = r"C:\Program Files\Python39\python.exe"
-CUEBOT_HOST = "10.40.14.25:8443"
+# Prebuilt worker from build_worker_zipapp.py, used when present and current
+WORKER_ZIPAPP = os.path.join(os.path.dirname(__file__), "dist", "maya_submit_worker.pyz")
+# Cuebot endpoints; the fastest healthy one is used and submits fail over
+# to the others.
+CUEBOT_HOSTS = ["10.40.14.25:8443"]
+CUEBOT_HOST = ",".join(CUEBOT_HOSTS)
 MAYA_VERSION = "2026"
 UI_NAME = "OpenCueSubmit"
 
+# Start the persistent submit daemon after a one-shot submission so the
+# next submit skips the Python 3.9 cold start.
+AUTOSTART_DAEMON = True
+
+# Progress panel repaints at most this often (ms); polls arriving in
+# between are merged into one update.
+PROGRESS_REFRESH_MS = 1000
+
 log = logging.getLogger(UI_NAME)
 window = None
 
+# Submissions and Cuebot probes still running after their window was
+# closed; keeps the QThread objects alive until they finish.
+activeSubmits = set()
+
+# Open progress panels, kept alive after the submitter closes
+progressPanels = set()
+
 
 # =============================================================================
 # CueSubmit Style - Dark Theme
@@ -166,6 +203,19 @@ QFrame[accessibleName="separator"] {
 QScrollArea {
     border: none;
 }
+
+QProgressBar {
+    border: none;
+    border-radius: 4px;
+    background-color: rgb(60, 70, 80);
+    text-align: center;
+    min-height: 16px;
+}
+
+QProgressBar::chunk {
+    border-radius: 4px;
+    background-color: rgb(50, 120, 180);
+}
 """
 
 
@@ -280,9 +330,23 @@ class SubmitWidget(QtWidgets.QWidget):
         super(SubmitWidget, self).__init__(parent)
         self.filename = filename or ""
         self.cameras = cameras or []
+        self.submitThread = None
+        self.probeThread = None
+        self.preflightThread = None
+        self.chunkThread = None
+        self.chunkHistory = None
+        self.predictThread = None
+        # (service, show, shot, scene, layer) -> memory prediction
+        self.predictions = {}
+        self.manifest = None
+        # The scene's current renderer, which "file" renders with
+        self.sceneRenderer = None
+        self.rpcSent = False
+        self.launched = False
         self.setupUi()
         self.setupConnections()
         self.loadSceneDefaults()
+        self.probeCuebot()
 
     def setupUi(self):
         """Create the widget layout matching CueSubmit."""
@@ -371,6 +435,12 @@ class SubmitWidget(QtWidgets.QWidget):
         self.chunkInput.setRange(1, 1000)
         self.chunkInput.setValue(1)
         self.chunkInput.setFixedWidth(60)
+        self.autoChunkInput = QtWidgets.QCheckBox("Auto")
+        self.autoChunkInput.setToolTip(
+            "Size chunks from this scene's, shot's or show's past load and "
+            "per-frame render times (recorded by one-session-per-chunk renders) "
+            "and the farm's idle cores."
+        )
 
         frameLayout.addWidget(frameLabel)
         frameLayout.addWidget(self.startFrameInput)
@@ -379,13 +449,37 @@ class SubmitWidget(QtWidgets.QWidget):
         frameLayout.addSpacing(20)
         frameLayout.addWidget(chunkLabel)
         frameLayout.addWidget(self.chunkInput)
+        frameLayout.addWidget(self.autoChunkInput)
         frameLayout.addStretch()
         layerInfoLayout.addLayout(frameLayout)
 
+        self.framesInput = CueLabelLineEdit(
+            "Frames:",
+            tooltip="Optional frame set instead of the range above: steps "
+                    "(1-240x4), lists (1,50,100) or both (1-100x10,101-120)."
+        )
+        self.framesInput.lineEdit.setPlaceholderText("start-end")
+        layerInfoLayout.addWidget(self.framesInput)
+
+        self.previewInput = QtWidgets.QCheckBox("Render first, middle and last frames first")
+        self.previewInput.setToolTip(
+            "Put the key frames in their own preview layer ahead of the rest, "
+            "so they come back within the job's first tasks."
+        )
+        layerInfoLayout.addWidget(self.previewInput)
+
         # Services
         self.servicesInput = CueLabelLineEdit("Services:", "maya")
         layerInfoLayout.addWidget(self.servicesInput)
 
+        self.resourcesInput = QtWidgets.QCheckBox("Auto memory from job history")
+        self.resourcesInput.setToolTip(
+            "Request memory per layer from past frames of the same scene, "
+            "shot or show (peak memory percentile plus headroom). Without "
+            "history the service default applies."
+        )
+        layerInfoLayout.addWidget(self.resourcesInput)
+
         scrollLayout.addLayout(layerInfoLayout)
 
         # === Maya Options Section ===
@@ -410,6 +504,31 @@ class SubmitWidget(QtWidgets.QWidget):
         self.cameraInput.comboBox.addItems(self.cameras)
         mayaLayout.addWidget(self.cameraInput)
 
+        self.matrixInput = QtWidgets.QCheckBox(
+            "One layer per render layer x renderable camera"
+        )
+        self.matrixInput.setToolTip(
+            "Submit every render layer from every renderable camera as its own "
+            "OpenCue layer in one job, so the passes render in parallel."
+        )
+        mayaLayout.addWidget(self.matrixInput)
+
+        self.serverInput = QtWidgets.QCheckBox("Render each chunk in one Maya session")
+        self.serverInput.setToolTip(
+            "Load the scene once per task and render the chunk's frames one by "
+            "one, logging each frame's time. A failed frame is retried in the "
+            "same session instead of failing the whole chunk. Arnold only."
+        )
+        mayaLayout.addWidget(self.serverInput)
+
+        self.assInput = QtWidgets.QCheckBox("Export .ass once, render with kick")
+        self.assInput.setToolTip(
+            "Two-stage job: Maya exports one Arnold .ass per frame (in chunks), "
+            "then kick renders each frame as soon as it is exported, on any "
+            "Arnold host and without Maya startup or scene load."
+        )
+        mayaLayout.addWidget(self.assInput)
+
         scrollLayout.addLayout(mayaLayout)
 
         # === Submission Details Section ===
@@ -418,6 +537,51 @@ class SubmitWidget(QtWidgets.QWidget):
         detailsLayout = QtWidgets.QVBoxLayout()
         detailsLayout.setContentsMargins(20, 0, 0, 0)
 
+        self.waitInput = QtWidgets.QCheckBox("Wait for Cuebot to create the job")
+        self.waitInput.setToolTip(
+            "Off: return as soon as Cuebot accepts the job and report job IDs "
+            "in the Script Editor once confirmed. On: wait until the job exists."
+        )
+        detailsLayout.addWidget(self.waitInput)
+
+        self.watchInput = QtWidgets.QCheckBox("Watch frame progress after submit")
+        self.watchInput.setToolTip(
+            "Open a small progress panel for the new job instead of CueGUI. It "
+            "polls only the frames that changed, through the submit daemon, and "
+            "polls less often while nothing changes."
+        )
+        detailsLayout.addWidget(self.watchInput)
+
+        self.preflightInput = QtWidgets.QCheckBox("Check scene files before submitting")
+        self.preflightInput.setChecked(True)
+        self.preflightInput.setToolTip(
+            "Make sure every texture, reference and cache the scene uses exists "
+            "on the share render nodes read from, before the job is sent."
+        )
+        detailsLayout.addWidget(self.preflightInput)
+
+        self.stageInput = QtWidgets.QCheckBox("Stage scene files on render nodes")
+        self.stageInput.setChecked(False)
+        self.stageInput.setToolTip(
+            "Render nodes copy the scene and the files the check found into a "
+            "local cache once per node, instead of every frame reading them "
+            "from the share. Needs the file check."
+        )
+        detailsLayout.addWidget(self.stageInput)
+
+        # Cuebot health, from cuebot_hosts probes
+        cuebotLayout = QtWidgets.QHBoxLayout()
+        cuebotLabel = QtWidgets.QLabel("Cuebot:")
+        cuebotLabel.setFixedWidth(100)
+        self.cuebotStatus = QtWidgets.QLabel("Probing...")
+        self.cuebotStatus.setWordWrap(True)
+        self.probeButton = QtWidgets.QPushButton("Probe")
+        self.probeButton.setToolTip("Check every Cuebot endpoint again")
+        cuebotLayout.addWidget(cuebotLabel)
+        cuebotLayout.addWidget(self.cuebotStatus, 1)
+        cuebotLayout.addWidget(self.probeButton)
+        detailsLayout.addLayout(cuebotLayout)
+
         # Command preview
         self.commandPreview = QtWidgets.QTextEdit()
         self.commandPreview.setReadOnly(True)
@@ -435,6 +599,14 @@ class SubmitWidget(QtWidgets.QWidget):
         """)
         detailsLayout.addWidget(self.commandPreview)
 
+        # Submission progress, shown once a submit starts
+        self.progressLog = QtWidgets.QTextEdit()
+        self.progressLog.setReadOnly(True)
+        self.progressLog.setMaximumHeight(90)
+        self.progressLog.setStyleSheet(self.commandPreview.styleSheet())
+        self.progressLog.hide()
+        detailsLayout.addWidget(self.progressLog)
+
         scrollLayout.addLayout(detailsLayout)
 
         # Spacer
@@ -460,13 +632,32 @@ class SubmitWidget(QtWidgets.QWidget):
         """Connect widget signals."""
         self.submitButton.clicked.connect(self.submit)
         self.cancelButton.clicked.connect(self.cancel)
+        self.probeButton.clicked.connect(lambda: self.probeCuebot(refresh=True))
 
         # Update command preview on changes
         self.mayaFileInput.textChanged.connect(self.updateCommandPreview)
+        self.rendererInput.comboBox.currentTextChanged.connect(self.updateServerInput)
         self.rendererInput.comboBox.currentTextChanged.connect(self.updateCommandPreview)
         self.cameraInput.comboBox.currentTextChanged.connect(self.updateCommandPreview)
+        self.matrixInput.toggled.connect(self.cameraInput.setDisabled)
+        self.matrixInput.toggled.connect(self.updateCommandPreview)
+        self.serverInput.toggled.connect(self.updateCommandPreview)
+        self.assInput.toggled.connect(self.updateCommandPreview)
+        self.assInput.toggled.connect(self.updateServerInput)
+        self.preflightInput.toggled.connect(self.stageInput.setEnabled)
         self.startFrameInput.valueChanged.connect(self.updateCommandPreview)
         self.endFrameInput.valueChanged.connect(self.updateCommandPreview)
+        self.framesInput.textChanged.connect(self.updateCommandPreview)
+        self.startFrameInput.valueChanged.connect(self.updateChunkInput)
+        self.endFrameInput.valueChanged.connect(self.updateChunkInput)
+        self.framesInput.textChanged.connect(self.updateChunkInput)
+        self.previewInput.toggled.connect(self.updateCommandPreview)
+        self.resourcesInput.toggled.connect(self.updateCommandPreview)
+        self.servicesInput.lineEdit.editingFinished.connect(self.updateCommandPreview)
+        self.autoChunkInput.toggled.connect(self.chunkInput.setDisabled)
+        self.autoChunkInput.toggled.connect(self.readChunkHistory)
+        self.showInput.lineEdit.editingFinished.connect(self.readChunkHistory)
+        self.shotInput.lineEdit.editingFinished.connect(self.readChunkHistory)
 
     def loadSceneDefaults(self):
         """Load defaults from the current Maya scene."""
@@ -476,39 +667,199 @@ class SubmitWidget(QtWidgets.QWidget):
             jobName = os.path.splitext(os.path.basename(self.filename))[0]
             self.jobNameInput.setText(jobName)
 
-        # Get frame range from render globals
-        try:
-            startFrame = int(cmds.getAttr("defaultRenderGlobals.startFrame"))
-            endFrame = int(cmds.getAttr("defaultRenderGlobals.endFrame"))
-            self.startFrameInput.setValue(startFrame)
-            self.endFrameInput.setValue(endFrame)
-        except Exception:
+        # Frame range and renderer from render globals (cached)
+        info = scene_info.getSceneInfo()
+        if info["startFrame"] is not None:
+            self.startFrameInput.setValue(info["startFrame"])
+            self.endFrameInput.setValue(info["endFrame"])
+        else:
             self.startFrameInput.setValue(1)
             self.endFrameInput.setValue(100)
 
-        # Get current renderer
-        try:
-            renderer = cmds.getAttr("defaultRenderGlobals.currentRenderer")
-            self.rendererInput.setCurrentText(renderer)
-        except Exception:
-            pass
+        if info["renderer"]:
+            self.sceneRenderer = info["renderer"]
+            self.rendererInput.setCurrentText(info["renderer"])
 
+        self.updateServerInput()
         self.updateCommandPreview()
 
+    def updateServerInput(self):
+        """Offer one-session chunks only for renderers that render in-process."""
+        self.serverInput.setEnabled(
+            not self.assInput.isChecked()
+            and job_spec.rendersInProcess(self.rendererInput.currentText(), self.sceneRenderer)
+        )
+
     def updateCommandPreview(self):
         """Update the command preview text."""
         mayaFile = self.mayaFileInput.text()
         renderer = self.rendererInput.currentText()
         camera = self.cameraInput.currentText()
-
-        cmd = "Render -r {} -s #FRAME_START# -e #FRAME_END#".format(renderer)
-        if camera:
-            cmd += " -cam {}".format(camera)
-        if mayaFile:
-            cmd += ' "{}"'.format(mayaFile)
+        renderLayer = ""
+        passes = 1
+
+        if self.matrixInput.isChecked():
+            renderLayers, cameras = self.getMatrix()
+            passes = max(1, len(renderLayers)) * max(1, len(cameras))
+            renderLayer = renderLayers[0] if renderLayers else ""
+            camera = cameras[0] if cameras else camera
+
+        server = self.serverInput.isChecked() and self.serverInput.isEnabled()
+        if server:
+            cmd = "mayapy render_task.py"
+            if mayaFile:
+                cmd += ' --scene "{}"'.format(mayaFile)
+            cmd += " --frames #FRAMESPEC# --renderer {}".format(renderer)
+            if renderLayer:
+                cmd += " --render-layer {}".format(renderLayer)
+            if camera:
+                cmd += " --camera {}".format(camera)
+        else:
+            cmd = "Render -r {} -s #FRAME_START# -e #FRAME_END#".format(renderer)
+            if renderLayer:
+                cmd += " -rl {}".format(renderLayer)
+            if camera:
+                cmd += " -cam {}".format(camera)
+            if mayaFile:
+                cmd += ' "{}"'.format(mayaFile)
+        if self.assInput.isChecked():
+            cmd = "mayapy ass_export.py ... -> kick -i <layer>.#ZFRAME#.ass\n" + cmd
+        if passes > 1:
+            cmd += "\n(+{} more layers, one per render layer x camera)".format(passes - 1)
+        try:
+            frames = self.getFrameSet()
+            cmd += "\nFrames {} ({} frames)".format(frames.toSpec(), len(frames))
+            if not server and not frames.isContiguous():
+                # Render.exe renders a chunk's whole first-to-last range.
+                cmd += ", one per task"
+            if self.previewInput.isChecked():
+                cmd += ", preview first: {}".format(
+                    ",".join(str(frame) for frame in frames.keyFrames(job_spec.PREVIEW_FRAMES))
+                )
+        except ValueError as e:
+            cmd += "\nFrames: {}".format(e)
+        if self.autoChunkInput.isChecked():
+            plan = self.planChunk()
+            if plan is None:
+                cmd += "\nChunk: reading render history..."
+            else:
+                cmd += "\nChunk {}: {}".format(plan.chunk, plan.reason)
+        if self.resourcesInput.isChecked():
+            prediction = self.predictions.get(self.predictionKey())
+            if prediction is None:
+                self.readPrediction()
+                cmd += "\nResources: reading job history..."
+            else:
+                cmd += "\nResources: " + resource_predictor.formatPrediction(prediction)
 
         self.commandPreview.setText(cmd)
 
+    def readChunkHistory(self):
+        """Read render history and farm load for auto chunk on a background thread."""
+        if not self.autoChunkInput.isChecked() or self.chunkThread is not None:
+            return
+        self.chunkHistory = None
+        self.chunkThread = ChunkThread(
+            self.showInput.text().strip(), self.shotInput.text().strip(),
+            self.mayaFileInput.text().strip()
+        )
+        self.chunkThread.result.connect(self.onChunkHistory)
+        activeSubmits.add(self.chunkThread)
+        self.chunkThread.finished.connect(
+            lambda thread=self.chunkThread: activeSubmits.discard(thread)
+        )
+        self.chunkThread.start()
+        self.updateCommandPreview()
+
+    def onChunkHistory(self, history):
+        self.chunkThread = None
+        self.chunkHistory = history
+        self.updateChunkInput()
+        self.updateCommandPreview()
+
+    def planChunk(self):
+        """Return the chunk plan from history, or None while it is read."""
+        if self.chunkHistory is None:
+            return None
+        estimate, idleCores = self.chunkHistory
+        try:
+            frames = len(self.getFrameSet())
+        except ValueError:
+            frames = self.endFrameInput.value() - self.startFrameInput.value() + 1
+        return chunk_sizing.chooseChunk(frames, estimate, idleCores)
+
+    def updateChunkInput(self):
+        """Set the chunk from history when auto chunk is on."""
+        if not self.autoChunkInput.isChecked():
+            return
+        plan = self.planChunk()
+        if plan is not None:
+            self.chunkInput.setValue(plan.chunk)
+
+    def predictionKey(self):
+        """Return what the main layer's memory prediction depends on."""
+        services = [s.strip() for s in self.servicesInput.text().split(",") if s.strip()]
+        return (
+            services[0] if services else "maya",
+            self.showInput.text().strip(), self.shotInput.text().strip(),
+            self.mayaFileInput.text().strip(), self.layerNameInput.text().strip(),
+        )
+
+    def readPrediction(self):
+        """Predict the main layer's memory from job history on a background thread.
+
+        One read runs at a time; when it finishes, the preview asks again
+        for whatever the fields hold by then.
+        """
+        if self.predictThread is not None:
+            return
+        self.predictThread = PredictThread(self.predictionKey())
+        self.predictThread.result.connect(self.onPrediction)
+        activeSubmits.add(self.predictThread)
+        self.predictThread.finished.connect(
+            lambda thread=self.predictThread: activeSubmits.discard(thread)
+        )
+        self.predictThread.start()
+
+    def onPrediction(self, result):
+        self.predictThread = None
+        key, prediction = result
+        self.predictions[key] = prediction
+        self.updateCommandPreview()
+
+    def getMatrix(self):
+        """Return the (render layers, renderable cameras) for matrix mode."""
+        info = scene_info.getSceneInfo()
+        return info["renderLayers"], info["renderableCameras"]
+
+    def probeCuebot(self, refresh=False):
+        """Probe the Cuebot endpoints on a background thread."""
+        if self.probeThread is not None:
+            return
+        self.probeButton.setEnabled(False)
+        self.probeThread = ProbeThread(refresh)
+        self.probeThread.result.connect(self.showProbes)
+        activeSubmits.add(self.probeThread)
+        self.probeThread.finished.connect(
+            lambda thread=self.probeThread: activeSubmits.discard(thread)
+        )
+        self.probeThread.start()
+
+    def showProbes(self, probes):
+        """Show Cuebot probe results, fastest healthy host first."""
+        self.probeThread = None
+        self.probeButton.setEnabled(True)
+        if not probes:
+            self.cuebotStatus.setText("No Cuebot hosts configured")
+            return
+        self.cuebotStatus.setText(", ".join(
+            cuebot_hosts.formatProbe(probe) for probe in probes
+        ))
+        if not any(probe["ok"] for probe in probes):
+            self.cuebotStatus.setStyleSheet("color: rgb(220, 120, 100);")
+        else:
+            self.cuebotStatus.setStyleSheet("")
+
     def validate(self):
         """Validate the submission data."""
         errors = []
@@ -522,17 +873,32 @@ class SubmitWidget(QtWidgets.QWidget):
         if not self.showInput.text().strip():
             errors.append("Show is required")
 
-        if self.startFrameInput.value() > self.endFrameInput.value():
+        if self.framesInput.text().strip():
+            try:
+                if not self.getFrameSet():
+                    errors.append("Frame set has no frames")
+            except ValueError as e:
+                errors.append("Frames: {}".format(e))
+        elif self.startFrameInput.value() > self.endFrameInput.value():
             errors.append("Start frame must be less than or equal to end frame")
 
+        if self.assInput.isChecked() and self.rendererInput.currentText() != "arnold":
+            errors.append("Exporting .ass files needs the arnold renderer")
+
         return errors
 
+    def getFrameSet(self):
+        """Return the frames to render; raise ValueError for a bad frame set."""
+        expression = self.framesInput.text().strip()
+        if expression:
+            return frame_set.FrameSet.parse(expression)
+        return frame_set.FrameSet.fromRange(
+            self.startFrameInput.value(), self.endFrameInput.value()
+        )
+
     def getJobData(self):
         """Collect all job data into a dictionary."""
-        frameRange = "{}-{}".format(
-            self.startFrameInput.value(),
-            self.endFrameInput.value()
-        )
+        frameRange = self.getFrameSet().toSpec()
 
         # Build layer data
         layerData = {
@@ -548,18 +914,40 @@ class SubmitWidget(QtWidgets.QWidget):
             }
         }
 
+        if self.manifest:
+            layerData["cmd"]["manifest"] = self.manifest
+        if self.serverInput.isChecked() and self.serverInput.isEnabled():
+            layerData["cmd"]["renderServer"] = True
+
+        layers = [layerData]
+        if self.matrixInput.isChecked():
+            renderLayers, cameras = self.getMatrix()
+            layers = job_spec.buildMatrixLayers(layerData, renderLayers, cameras)
+        if self.previewInput.isChecked():
+            layers = [split for layer in layers for split in job_spec.buildPreviewLayers(layer)]
+
         jobData = {
             "name": self.jobNameInput.text(),
             "show": self.showInput.text(),
             "shot": self.shotInput.text(),
             "username": self.userNameInput.text(),
-            "layers": [layerData],
+            "launchMode": "wait" if self.waitInput.isChecked() else "async",
+            "layers": layers,
         }
 
+        if self.assInput.isChecked():
+            assDir = job_spec.assDirectory(jobData)
+            jobData["layers"] = [
+                stage for layer in layers for stage in job_spec.buildAssLayers(layer, assDir)
+            ]
+
         return jobData
 
     def submit(self):
-        """Submit the job to OpenCue via external Python process."""
+        """Validate, check the scene's files, then submit."""
+        if self.submitThread is not None or self.preflightThread is not None:
+            return
+
         errors = self.validate()
         if errors:
             QtWidgets.QMessageBox.warning(
@@ -568,54 +956,577 @@ class SubmitWidget(QtWidgets.QWidget):
             )
             return
 
+        self.manifest = None
+        self.progressLog.clear()
+        self.progressLog.show()
+        if self.preflightInput.isChecked():
+            self.runPreflight()
+        else:
+            self.startSubmit()
+
+    def runPreflight(self):
+        """Check the scene's file dependencies on a background thread."""
+        # Reading the scene has to happen on the main thread; only the
+        # file checks run in the background.
+        dependencies = preflight.collectDependencies()
+        dependencies.setdefault(self.mayaFileInput.text().strip(), ["scene"])
+
+        self.progressLog.append("Checking {} scene file(s)...".format(len(dependencies)))
+        self.submitButton.setEnabled(False)
+
+        # Map paths as job_spec will when it builds the render command.
+        mapper = path_mapping.forShow(self.showInput.text().strip())
+        stageScene = None
+        if self.stageInput.isChecked():
+            stageScene = mapper.map(self.mayaFileInput.text().strip().replace("\\", "/"))
+        self.preflightThread = PreflightThread(dependencies, mapper, stageScene)
+        self.preflightThread.result.connect(self.onPreflightResult)
+        activeSubmits.add(self.preflightThread)
+        self.preflightThread.finished.connect(
+            lambda thread=self.preflightThread: activeSubmits.discard(thread)
+        )
+        self.preflightThread.start()
+
+    def onPreflightResult(self, report):
+        """Submit if every file was found, otherwise ask the artist first."""
+        self.preflightThread = None
+        self.submitButton.setEnabled(True)
+        self.progressLog.append(preflight.formatReport(report, limit=0))
+        self.manifest = report.get("manifest")
+        if report.get("manifestError"):
+            self.progressLog.append("Not staging files on render nodes: {}".format(
+                report["manifestError"]
+            ))
+        if not report["problems"]:
+            self.startSubmit()
+            return
+
+        log.warning(preflight.formatReport(report, limit=len(report["problems"])))
+        msg = QtWidgets.QMessageBox(self)
+        msg.setWindowTitle("Missing Scene Files")
+        msg.setText(
+            "Render nodes won't be able to read {} file(s) this scene uses; "
+            "frames using them will fail or render wrong.\n\n{}\n\n"
+            "The full list is in the Script Editor. Submit anyway?".format(
+                len(report["problems"]), preflight.formatReport(report, limit=10)
+            )
+        )
+        msg.setIcon(QtWidgets.QMessageBox.Warning)
+        msg.setStandardButtons(QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No)
+        msg.setDefaultButton(QtWidgets.QMessageBox.No)
+        msg.setStyleSheet(MAIN_STYLE)
+        if msg.exec_() == QtWidgets.QMessageBox.Yes:
+            self.startSubmit()
+
+    def startSubmit(self):
+        """Submit the job to OpenCue on a background thread."""
+        self.rpcSent = False
+        self.launched = False
+        self.progressLog.append("Submitting...")
+        self.submitButton.setEnabled(False)
+
         jobData = self.getJobData()
+        if self.resourcesInput.isChecked():
+            predictions = resource_predictor.applyPredictions(jobData)
+            for name, prediction in sorted(predictions.items()):
+                self.progressLog.append("{}: {}".format(
+                    name, resource_predictor.formatPrediction(prediction)
+                ))
 
-        # Write job data to temp file
-        with tempfile.NamedTemporaryFile(
-            mode='w', suffix='.json', delete=False, encoding='utf-8'
-        ) as f:
-            json.dump(jobData, f, indent=2)
-            jobDataFile = f.name
+        self.submitThread = SubmitThread(jobData)
+        self.submitThread.event.connect(self.onSubmitEvent)
+        self.submitThread.result.connect(self.onSubmitResult)
+        activeSubmits.add(self.submitThread)
+        self.submitThread.finished.connect(
+            lambda thread=self.submitThread: activeSubmits.discard(thread)
+        )
+        self.submitThread.start()
+
+    def onSubmitEvent(self, event):
+        """Append a submission stage to the progress log."""
+        stage = event.get("event")
+        if stage == "hosts_probed":
+            self.showProbes(event.get("hosts"))
+            self.progressLog.append("Using Cuebot {}".format(event.get("host")))
+        elif stage == "failover":
+            self.progressLog.append("Cuebot {} unreachable, retrying on {}".format(
+                event.get("host"), event.get("nextHost")
+            ))
+        elif stage == "spec_built":
+            self.progressLog.append("Job spec {} ({} layers, {} bytes)".format(
+                "reused from cache" if event.get("cached") else "built",
+                event.get("layers"), event.get("size")
+            ))
+        elif stage == "rpc_sent":
+            self.rpcSent = True
+            self.progressLog.append("Sent to Cuebot, waiting for the job...")
+        elif stage == "job_accepted":
+            for job in event.get("jobs", []):
+                self.progressLog.append("Job accepted: {} ({})".format(
+                    job["name"], job["id"]
+                ))
+        elif stage == "job_launched":
+            # Async launch: Cuebot accepted the spec, IDs follow later.
+            self.launched = True
+            lines = []
+            for job in event.get("jobs", []):
+                lines.append("Job Name: {}".format(job["name"]))
+                lines.append("Log Path: {}".format(job["logPath"]))
+            lines.append("")
+            lines.append("Job IDs will be reported in the Script Editor "
+                         "once Cuebot confirms the job.")
+            self.showSubmitted("\n".join(lines), event.get("jobs"))
+        elif stage == "job_confirmed":
+            for job in event.get("jobs", []):
+                self.progressLog.append("Job confirmed: {} ({})".format(
+                    job["name"], job["id"]
+                ))
+                log.info("Job confirmed: %s ID: %s Log Path: %s",
+                         job["name"], job["id"], job["logPath"])
+        elif stage == "queued":
+            self.progressLog.append(
+                "Cuebot unreachable, saved to the outbox (retry in {}s)".format(
+                    event.get("retryIn")
+                )
+            )
+        elif stage == "job_unconfirmed":
+            log.warning("Cuebot has not confirmed job(s) %s yet; check CueGUI.",
+                        ", ".join(event.get("names", [])))
+        else:
+            self.progressLog.append(stage)
+
+    def onSubmitResult(self, reply):
+        """Show the result dialog once the submission finishes."""
+        self.submitThread = None
+        self.submitButton.setEnabled(True)
+
+        if self.launched:
+            # The dialog was shown at launch; only report late failures.
+            if not reply.get("ok") and not reply.get("cancelled"):
+                log.warning("Job confirmation failed: %s", reply.get("error"))
+        elif reply.get("cancelled"):
+            self.progressLog.append("Submission cancelled.")
+            if self.rpcSent:
+                self.progressLog.append(
+                    "Cuebot may already have accepted the job; check CueGUI."
+                )
+        elif reply.get("ok"):
+            self.showSubmitted(reply["text"], reply.get("jobs"))
+        elif reply.get("queued"):
+            self.showQueued(reply)
+        else:
+            self.showFailed(reply.get("traceback") or reply.get("error"))
+
+    def showSubmitted(self, details, jobs=None):
+        """Show the success dialog and close the submitter.
+
+        With "Watch frame progress" ticked, a progress panel for the jobs
+        stays open instead.
+        """
+        # Success dialog matching CueSubmit style
+        msg = QtWidgets.QMessageBox(self)
+        msg.setWindowTitle("Submitted Job Data")
+        msg.setText("Submitted Job to OpenCue.\n\n{}".format(details))
+        msg.setStyleSheet(MAIN_STYLE)
+        msg.exec_()
+        if jobs and self.watchInput.isChecked():
+            panel = ProgressPanel(
+                [{"name": job["name"], "id": job.get("id")} for job in jobs],
+                parent=self.window().parentWidget()
+            )
+            panel.show()
+        self.window().close()
 
-        try:
-            # Call external submitter
-            submitterScript = os.path.join(
-                os.path.dirname(__file__), "maya_submit_worker.py"
+    def showQueued(self, reply):
+        """Tell the artist the job will be submitted once Cuebot is back."""
+        log.warning("Submission queued in the outbox (%s): %s",
+                    reply.get("key", "")[:12], reply.get("error"))
+        msg = QtWidgets.QMessageBox(self)
+        msg.setWindowTitle("Submission Queued")
+        msg.setText(
+            "{}\n\nThe job is saved locally and the submit daemon will send it "
+            "to OpenCue as soon as Cuebot is reachable; there is no need to "
+            "submit again.\n\nCheck it with: python submit_outbox.py list".format(
+                reply.get("error")
             )
+        )
+        msg.setIcon(QtWidgets.QMessageBox.Warning)
+        msg.setStyleSheet(MAIN_STYLE)
+        msg.exec_()
+        self.window().close()
+
+    def showFailed(self, details):
+        """Show the failure dialog."""
+        msg = QtWidgets.QMessageBox(self)
+        msg.setWindowTitle("Failed Job Submission")
+        msg.setText("Failed to submit job!\n\n{}".format(details))
+        msg.setIcon(QtWidgets.QMessageBox.Critical)
+        msg.setStyleSheet(MAIN_STYLE)
+        msg.exec_()
+
+    def cancel(self):
+        """Cancel a running submission, or close the dialog."""
+        if self.submitThread is not None:
+            self.progressLog.append("Cancelling...")
+            self.submitThread.cancel()
+            return
+        self.window().close()
+
+
+class ProbeThread(QtCore.QThread):
+    """Probes the Cuebot endpoints without blocking Maya."""
+
+    result = QtCore.Signal(object)
+
+    def __init__(self, refresh=False, parent=None):
+        super(ProbeThread, self).__init__(parent)
+        self.refresh = refresh
+
+    def run(self):
+        self.result.emit(cuebot_hosts.probeHosts(CUEBOT_HOSTS, self.refresh))
+
+
+class ChunkThread(QtCore.QThread):
+    """Reads timing history and the farm's idle cores without blocking Maya."""
+
+    result = QtCore.Signal(object)
 
-            result = subprocess.run(
-                [PYTHON_PATH, submitterScript, jobDataFile, CUEBOT_HOST],
-                capture_output=True,
-                text=True
+    def __init__(self, show, shot, scene, parent=None):
+        super(ChunkThread, self).__init__(parent)
+        self.show = show
+        self.shot = shot
+        self.scene = scene
+
+    def run(self):
+        estimate = chunk_sizing.history().estimate(self.show, self.shot, self.scene)
+        # Idle cores come from the daemon's warm channel; unknown without it.
+        self.result.emit((estimate, submit_daemon.idleCores(CUEBOT_HOST)))
+
+
+class PredictThread(QtCore.QThread):
+    """Predicts a layer's memory from the job history without blocking Maya."""
+
+    result = QtCore.Signal(object)
+
+    def __init__(self, key, parent=None):
+        super(PredictThread, self).__init__(parent)
+        self.key = key
+
+    def run(self):
+        service, show, shot, scene, layer = self.key
+        try:
+            prediction = resource_predictor.predict(
+                job_history.JobHistory(), service, show, shot, scene, layer
             )
+        except Exception as e:
+            # Unreadable history database: keep the service default.
+            prediction = resource_predictor.Prediction(
+                None, None, 0, "job history unavailable: {}".format(e)
+            )
+        self.result.emit((self.key, prediction))
 
-            if result.returncode == 0:
-                # Success dialog matching CueSubmit style
-                msg = QtWidgets.QMessageBox(self)
-                msg.setWindowTitle("Submitted Job Data")
-                msg.setText("Submitted Job to OpenCue.\n\n{}".format(result.stdout))
-                msg.setStyleSheet(MAIN_STYLE)
-                msg.exec_()
-                self.window().close()
-            else:
-                msg = QtWidgets.QMessageBox(self)
-                msg.setWindowTitle("Failed Job Submission")
-                msg.setText("Failed to submit job!\n\n{}".format(
-                    result.stderr or result.stdout
-                ))
-                msg.setIcon(QtWidgets.QMessageBox.Critical)
-                msg.setStyleSheet(MAIN_STYLE)
-                msg.exec_()
-        finally:
-            # Clean up temp file
+
+class PreflightThread(QtCore.QThread):
+    """Checks scene file dependencies without blocking Maya."""
+
+    result = QtCore.Signal(object)
+
+    def __init__(self, dependencies, mapper, stageScene=None, parent=None):
+        super(PreflightThread, self).__init__(parent)
+        self.dependencies = dependencies
+        self.mapper = mapper
+        self.stageScene = stageScene
+
+    def run(self):
+        report = preflight.runPreflight(self.mapper, self.dependencies)
+        if self.stageScene:
+            # Render nodes stage what was found; missing files stay missing.
+            found = [result["renderPath"] for result in report["results"]
+                     if result["status"] == preflight.STATUS_OK]
             try:
-                os.unlink(jobDataFile)
-            except Exception:
-                pass
+                report["manifest"] = render_cache.writeManifest(self.stageScene, found)
+            except OSError as e:
+                report["manifestError"] = str(e)
+        self.result.emit(report)
+
+
+class SubmitThread(QtCore.QThread):
+    """Runs a submission off the Qt main thread and streams its stages.
+
+    The warm daemon is tried first; if it isn't running the one-shot worker
+    is started with --progress and its JSON event lines are forwarded.
+    """
+
+    event = QtCore.Signal(object)
+    result = QtCore.Signal(object)
+
+    def __init__(self, jobData, parent=None):
+        super(SubmitThread, self).__init__(parent)
+        self.jobData = jobData
+        self.cancelEvent = threading.Event()
+        self.process = None
+        self.processLock = threading.Lock()
 
     def cancel(self):
-        """Close the dialog."""
-        self.window().close()
+        """Stop waiting for the submission and kill the worker if running.
+
+        The outbox record is marked failed first, so the daemon's flusher
+        doesn't launch the job later and the same job data can be
+        resubmitted at once.
+        """
+        self.cancelEvent.set()
+        with self.processLock:
+            self.cancelOutbox()
+            if self.process is not None and self.process.poll() is None:
+                self.process.kill()
+
+    def cancelOutbox(self):
+        """Mark this job data's pending outbox record failed, if any."""
+        try:
+            submit_outbox.Outbox().cancel(
+                spec_cache.canonicalHash(self.jobData), "Cancelled from Maya"
+            )
+        except Exception as e:
+            log.warning("Could not cancel the outbox record: %s", e)
+
+    def run(self):
+        reply = submit_daemon.submit(
+            self.jobData, CUEBOT_HOST, self.event.emit, self.cancelEvent
+        )
+        if reply is None:
+            reply = self.runWorker()
+        self.result.emit(reply)
+
+    def runWorker(self):
+        """Run the one-shot worker and return its JSON result document.
+
+        Job data goes to the worker on stdin and the result comes back on
+        stdout, so nothing is written to the (often roaming) temp directory.
+        """
+        submitterScript = getWorkerScript()
+
+        with self.processLock:
+            if self.cancelEvent.is_set():
+                return {"ok": False, "cancelled": True}
+            self.process = subprocess.Popen(
+                [PYTHON_PATH, submitterScript, "-", CUEBOT_HOST,
+                 "--progress", "--json"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                encoding="utf-8"
+            )
+
+        reply = None
+        try:
+            self.process.stdin.write(json.dumps(self.jobData))
+            self.process.stdin.close()
+            for line in self.process.stdout:
+                document = parseDocument(line)
+                if document is None:
+                    continue
+                if "event" in document:
+                    self.event.emit(document)
+                else:
+                    reply = document
+        except OSError:
+            # Worker died or was killed by cancel(); handled below.
+            pass
+        stderr = self.process.stderr.read()
+        self.process.wait()
+
+        if self.cancelEvent.is_set():
+            # The worker may have recorded the job after cancel() looked;
+            # it's dead now, so this is the final state.
+            self.cancelOutbox()
+            return {"ok": False, "cancelled": True}
+
+        if AUTOSTART_DAEMON:
+            try:
+                submit_daemon.startDaemon(PYTHON_PATH, CUEBOT_HOST)
+            except Exception as e:
+                log.warning("Could not start submit daemon: %s", e)
+
+        if reply is None:
+            # Worker failed before it could report (e.g. missing opencue).
+            return {"ok": False, "error": stderr or "Worker exited without a result"}
+        return reply
+
+
+class ProgressThread(QtCore.QThread):
+    """Polls frame progress through the daemon, backing off while quiet.
+
+    Emits progress only when a poll brings changes, and status after
+    every poll. Stops once every job has finished or stop() is called.
+    """
+
+    progress = QtCore.Signal(object)
+    status = QtCore.Signal(str)
+
+    def __init__(self, jobs, parent=None):
+        super(ProgressThread, self).__init__(parent)
+        self.jobs = jobs
+        self.since = {}
+        self.stopped = threading.Event()
+
+    def stop(self):
+        self.stopped.set()
+
+    def run(self):
+        interval = job_monitor.MIN_POLL
+        while not self.stopped.is_set():
+            summaries = submit_daemon.jobProgress(self.jobs, self.since, CUEBOT_HOST)
+            changed = False
+            if summaries is None:
+                # The daemon starts after a one-shot submit; keep trying.
+                message = "Waiting for the submit daemon"
+            else:
+                changed = any(
+                    summary["serial"] != self.since.get(summary["name"], 0)
+                    for summary in summaries
+                )
+                if changed:
+                    self.progress.emit(summaries)
+                for summary in summaries:
+                    self.since[summary["name"]] = summary["serial"]
+                if all(summary["state"] == job_monitor.FINISHED for summary in summaries):
+                    self.status.emit("All jobs finished")
+                    return
+                errors = [summary["error"] for summary in summaries if summary["error"]]
+                message = errors[0] if errors else "Up to date"
+            interval = job_monitor.nextInterval(interval, changed)
+            self.status.emit("{} - next check in {:.0f}s".format(message, interval))
+            if self.stopped.wait(interval):
+                return
+
+
+class ProgressPanel(QtWidgets.QWidget):
+    """Frame progress of submitted jobs, a lightweight CueGUI stand-in.
+
+    Poll results are merged and painted at most every PROGRESS_REFRESH_MS.
+    """
+
+    def __init__(self, jobs, parent=None):
+        super(ProgressPanel, self).__init__(parent)
+        self.setWindowFlags(QtCore.Qt.Window)
+        self.setAttribute(QtCore.Qt.WA_DeleteOnClose)
+        self.setWindowTitle("OpenCue Job Progress")
+        self.setStyleSheet(MAIN_STYLE)
+        self.resize(500, 360)
+        self.rows = {}
+        self.pending = {}
+        self.pendingChanges = []
+
+        layout = QtWidgets.QVBoxLayout(self)
+        for job in jobs:
+            nameLabel = QtWidgets.QLabel(job["name"])
+            nameLabel.setAccessibleName("sectionLabel")
+            bar = QtWidgets.QProgressBar()
+            bar.setRange(0, 1)
+            bar.setValue(0)
+            countsLabel = QtWidgets.QLabel("Waiting for Cuebot...")
+            layout.addWidget(nameLabel)
+            layout.addWidget(bar)
+            layout.addWidget(countsLabel)
+            self.rows[job["name"]] = (bar, countsLabel)
+
+        self.changeLog = QtWidgets.QTextEdit()
+        self.changeLog.setReadOnly(True)
+        self.changeLog.document().setMaximumBlockCount(500)
+        self.changeLog.setStyleSheet("""
+            QTextEdit {
+                background-color: rgb(30, 35, 40);
+                color: rgb(150, 150, 150);
+                border: none;
+                border-radius: 4px;
+                font-family: Consolas, monospace;
+                font-size: 9pt;
+                padding: 5px;
+            }
+        """)
+        layout.addWidget(self.changeLog, 1)
+
+        self.statusLabel = QtWidgets.QLabel("")
+        layout.addWidget(self.statusLabel)
+
+        self.refreshTimer = QtCore.QTimer(self)
+        self.refreshTimer.setSingleShot(True)
+        self.refreshTimer.setInterval(PROGRESS_REFRESH_MS)
+        self.refreshTimer.timeout.connect(self.refresh)
+
+        self.thread = ProgressThread(jobs)
+        self.thread.progress.connect(self.onProgress)
+        self.thread.status.connect(self.statusLabel.setText)
+        activeSubmits.add(self.thread)
+        self.thread.finished.connect(
+            lambda thread=self.thread: activeSubmits.discard(thread)
+        )
+        progressPanels.add(self)
+        self.thread.start()
+
+    def onProgress(self, summaries):
+        """Queue a poll's summaries for the next repaint."""
+        for summary in summaries:
+            self.pending[summary["name"]] = summary
+            self.pendingChanges.extend(
+                (summary["name"], change) for change in summary["changes"]
+            )
+        if not self.refreshTimer.isActive():
+            self.refreshTimer.start()
+
+    def refresh(self):
+        """Paint the newest summaries and every change since the last paint."""
+        for name, summary in self.pending.items():
+            bar, countsLabel = self.rows[name]
+            counts = summary["counts"]
+            bar.setRange(0, max(1, summary["total"]))
+            bar.setValue(counts.get("SUCCEEDED", 0) + counts.get("EATEN", 0))
+            countsLabel.setText(job_monitor.formatCounts(summary))
+            if summary["truncated"]:
+                self.changeLog.append("{}: some changes were missed".format(name))
+        lines = []
+        multiple = len(self.rows) > 1
+        for name, change in self.pendingChanges:
+            line = "{} {} {}".format(
+                time.strftime("%H:%M:%S", time.localtime(change["time"])),
+                change["frame"], change["state"]
+            )
+            if change["state"] == "DEAD":
+                line += " (exit {}, {} retries)".format(
+                    change["exitStatus"], change["retries"]
+                )
+            lines.append("{}: {}".format(name, line) if multiple else line)
+        if lines:
+            self.changeLog.append("\n".join(lines))
+        self.pending = {}
+        self.pendingChanges = []
+
+    def closeEvent(self, event):
+        self.thread.stop()
+        progressPanels.discard(self)
+        super(ProgressPanel, self).closeEvent(event)
+
+
+def getWorkerScript():
+    """Return the worker to run: the zipapp unless a bundled source is newer."""
+    if not build_worker_zipapp.isStale(WORKER_ZIPAPP, os.path.dirname(__file__)):
+        return WORKER_ZIPAPP
+    return os.path.join(os.path.dirname(__file__), "maya_submit_worker.py")
+
+
+def parseDocument(line):
+    """Return the JSON object on a worker output line, or None."""
+    line = line.strip()
+    if not line.startswith("{"):
+        return None
+    try:
+        document = json.loads(line)
+    except ValueError:
+        return None
+    if isinstance(document, dict):
+        return document
+    return None
 
 
 class CueSubmitMainWindow(QtWidgets.QMainWindow):
@@ -639,15 +1550,12 @@ class CueSubmitMainWindow(QtWidgets.QMainWindow):
 
 def getFilename():
     """Return the current Maya scene filename."""
-    return cmds.file(q=True, sn=True)
+    return scene_info.getSceneInfo()["sceneFile"]
 
 
 def getCameras():
     """Return a list of cameras in the current Maya scene."""
-    cameraShapes = cmds.ls(type='camera')
-    if cameraShapes:
-        return cmds.listRelatives(cameraShapes, p=True) or []
-    return []
+    return scene_info.getSceneInfo()["cameras"]
 
 
 def deleteExistingUi():
@@ -21,124 +21,116 @@ It receives job data from the Maya UI and submits directly via opencue API
 to avoid wrapper script path issues on Windows.
 
 Usage:
-    python maya_submit_worker.py <job_data.json> <cuebot_host>
+    python maya_submit_worker.py <job_data.json|-> <cuebot_hosts> [--progress] [--json]
+    python maya_submit_worker.py --batch <dir|glob|file.ndjson|-> <cuebot_hosts>
+        [--concurrency N]
+
+<cuebot_hosts> is one host:port or a comma-separated list. The fastest
+healthy host is used, and a submit that can't reach it moves on to the
+next one.
+
+With --progress, stage events are written to stdout as JSON lines ahead of
+the usual human-readable result so the Maya UI can stream them.
+
+Passing "-" as the job data reads it from stdin, and --json replaces the
+human-readable result with one JSON document holding the jobs, per-stage
+timings and any error, so nothing touches the temp directory.
+
+Single submits are recorded in the local outbox (submit_outbox.py) first. If
+Cuebot can't be reached, the result has "queued": true and the submit daemon
+retries it in the background instead of the submission being lost.
+
+With --batch, every job-data record from a directory of .json files, a glob,
+or an NDJSON file/stdin stream is submitted over one Cuebot connection and
+one JSON result line is printed per job, failures included.
 """
 
+import argparse
+import glob
 import json
 import os
 import sys
+import threading
+import time
+import traceback
+from concurrent import futures
+
+# Reference point for the stage timings reported with --json
+WORKER_START = time.time()
 
 # Add OpenCue libraries to path
 SITE_PACKAGES = r"C:\Program Files\Python39\Lib\site-packages"
 sys.path.insert(0, SITE_PACKAGES)
 
-# Import OpenCue after path setup
-from opencue.cuebot import Cuebot
-import opencue
-
+# opencue (and with it grpc, protobuf and the YAML config) is imported on
+# first use by importOpencue(), so --help, argument errors and cache
+# commands never pay for it.
+opencue = None
+Cuebot = None
+
+# Spec generation lives in job_spec so it can be used without opencue
+from job_spec import (
+    FRAME_END_TOKEN,
+    FRAME_START_TOKEN,
+    FRAME_TOKEN,
+    MAYA_RENDER_EXE,
+    buildJobSpec,
+    buildMayaCmd,
+    cuebotJobName,
+)
+import chunk_sizing
+import cuebot_hosts
+import job_history
+import job_monitor
+import spec_cache
+import submit_outbox
 
-# Frame tokens used by OpenCue
-FRAME_TOKEN = "#IFRAME#"
-FRAME_START_TOKEN = "#FRAME_START#"
-FRAME_END_TOKEN = "#FRAME_END#"
 
 # Log path configuration
 LOG_ROOT = r"\\10.40.14.25\RenderOutputRepo\OpenCue\Logs"
 
-# Maya configuration
-MAYA_RENDER_EXE = r"C:/Program Files/Autodesk/Maya2026/bin/Render.exe"
+# Launch modes: "wait" blocks in launchSpecAndWait until Cuebot has created
+# the job; "async" returns as soon as Cuebot accepts the spec and confirms
+# the job in the background.
+LAUNCH_MODE_WAIT = "wait"
+LAUNCH_MODE_ASYNC = "async"
 
+# Background confirmation polling for async launches (seconds)
+CONFIRM_INTERVAL = 2
+CONFIRM_TIMEOUT = 300
 
-def buildMayaCmd(layerData):
-    """Build a Maya Render command from layer data."""
-    cmd = layerData.get("cmd", {})
-    mayaFile = cmd.get("mayaFile", "")
-    camera = cmd.get("camera", "")
-    renderer = cmd.get("renderer", "file")
+# Concurrent submissions in --batch mode; kept low so a nightly batch
+# doesn't crowd out artists' interactive submits on the same Cuebot.
+BATCH_CONCURRENCY = 4
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
 
-    if not mayaFile:
-        raise ValueError("No Maya file provided")
+# Compiled spec cache shared by every submit in this process; set to None
+# (--no-spec-cache) to always rebuild.
+SPEC_CACHE = spec_cache.SpecCache()
 
-    # Build render command - use forward slashes for consistency
-    mayaFile = mayaFile.replace("\\", "/")
+# Cuebot endpoints for this process, set by useHosts()
+HOSTS = None
 
-    renderCmd = '"{}" -r {} -s {} -e {}'.format(
-        MAYA_RENDER_EXE,
-        renderer,
-        FRAME_START_TOKEN,
-        FRAME_END_TOKEN
-    )
+# Durable record of interactive submits; None (--no-outbox) submits directly.
+OUTBOX = submit_outbox.Outbox()
 
-    if camera:
-        renderCmd += " -cam {}".format(camera)
+# Seconds between outbox flushes in the submit daemon
+FLUSH_INTERVAL = 5
 
-    renderCmd += ' "{}"'.format(mayaFile)
+# Local job history; shows are watched as jobs are submitted to them and
+# synced by the submit daemon's HistorySyncer. None disables it.
+HISTORY = job_history.JobHistory()
 
-    return renderCmd
+# Frame progress of jobs the submitter's progress panel is watching
+MONITOR = job_monitor.JobMonitor()
 
 
-def buildJobSpec(jobData):
-    """Build an XML job spec for direct submission to OpenCue."""
-    show = jobData.get("show", "testing")
-    shot = jobData.get("shot", "shot01")
-    jobName = jobData.get("name", "maya_job")
-    username = jobData.get("username", "render")
-    # Use UID 1000+ to avoid root (0) rejection - typical non-root user range
-    uid = 1000
-
-    layers_xml = ""
-    for layerData in jobData.get("layers", []):
-        layerName = layerData.get("name", "render")
-        frameRange = layerData.get("layerRange", "1-1")
-        chunk = layerData.get("chunk", 1)
-        services = layerData.get("services", ["maya"])
-        service = services[0] if services else "maya"
-
-        if layerData.get("layerType") == "Maya":
-            command = buildMayaCmd(layerData)
-        else:
-            raise ValueError("Unsupported layer type: {}".format(layerData.get("layerType")))
-
-        layers_xml += """
-      <layer name="{name}" type="Render">
-        <cmd>{cmd}</cmd>
-        <range>{range}</range>
-        <chunk>{chunk}</chunk>
-        <services>
-          <service>{service}</service>
-        </services>
-      </layer>""".format(
-            name=layerName,
-            cmd=command,
-            range=frameRange,
-            chunk=chunk,
-            service=service
-        )
+class SubmissionQueued(Exception):
+    """Cuebot was unreachable; the submission waits in the outbox."""
 
-    spec = """<?xml version="1.0"?>
-<!DOCTYPE spec PUBLIC "SPI Cue Specification Language" "http://localhost:8080/spcue/dtd/cjsl-1.12.dtd">
-<spec>
-  <facility>local</facility>
-  <show>{show}</show>
-  <shot>{shot}</shot>
-  <user>{user}</user>
-  <uid>{uid}</uid>
-  <job name="{jobName}">
-    <paused>False</paused>
-    <os>Windows</os>
-    <layers>{layers}
-    </layers>
-  </job>
-</spec>""".format(
-        show=show,
-        shot=shot,
-        user=username,
-        uid=uid,
-        jobName=jobName,
-        layers=layers_xml
-    )
-
-    return spec
+    def __init__(self, key, message):
+        super(SubmissionQueued, self).__init__(message)
+        self.key = key
 
 
 def getLogPath(jobData, jobName):
@@ -149,47 +141,576 @@ def getLogPath(jobData, jobName):
     return os.path.join(LOG_ROOT, show, shot, "logs", jobName)
 
 
-def submitJob(jobData):
-    """Submit a job directly using opencue.api.launchSpecAndWait."""
-    spec = buildJobSpec(jobData)
-    jobs = opencue.api.launchSpecAndWait(spec)
+def ignoreEvent(event, **fields):
+    """Default progress callback."""
+
+
+def emitEvent(event, **fields):
+    """Write a progress event to stdout as a single JSON line."""
+    fields["event"] = event
+    print(json.dumps(fields), flush=True)
+
+
+class StageTimer(object):
+    """Progress callback wrapper recording when each stage was reached.
+
+    Timings are seconds since `start` and are keyed by stage name.
+    """
+
+    def __init__(self, onEvent=ignoreEvent, start=None):
+        self.onEvent = onEvent
+        self.start = start or time.time()
+        self.timings = {}
+
+    def mark(self, stage):
+        self.timings[stage] = round(time.time() - self.start, 3)
+
+    def __call__(self, event, **fields):
+        self.mark(event)
+        self.onEvent(event, **fields)
+
+
+def importOpencue():
+    """Import opencue on first use and return the module."""
+    global opencue, Cuebot
+    if opencue is None:
+        # Import OpenCue after path setup
+        from opencue.cuebot import Cuebot as cuebotClass
+        import opencue as opencueModule
+        Cuebot = cuebotClass
+        opencue = opencueModule
+    return opencue
+
+
+def useHosts(cuebotHosts, onEvent=ignoreEvent, refresh=False):
+    """Probe Cuebot endpoints and point the channel at the fastest healthy one."""
+    global HOSTS
+    importOpencue()
+    HOSTS = cuebot_hosts.HostPool(
+        cuebot_hosts.parseHosts(cuebotHosts),
+        lambda host: Cuebot.setHosts([host]),
+        refresh,
+    )
+    onEvent("hosts_probed", hosts=HOSTS.probes, host=HOSTS.current())
+    return HOSTS
+
+
+def callCuebot(call, onEvent=ignoreEvent, findDone=None):
+    """Run an RPC, failing over to the next Cuebot if the host is unreachable.
+
+    Only connection failures (gRPC UNAVAILABLE) are retried elsewhere. A
+    request can reach Cuebot before its connection drops, so retrying a
+    launch could create the job twice. For those, findDone is called on the
+    next host first; if it returns anything but None, that is the result and
+    the call isn't repeated.
+    """
+    tried = set()
+    while True:
+        host = HOSTS.current() if HOSTS is not None else None
+        try:
+            return call()
+        except opencue.exception.ConnectionException as e:
+            if host is None:
+                raise
+            tried.add(host)
+            nextHost = HOSTS.failover(host, tried, e)
+            if nextHost is None:
+                raise
+            onEvent("failover", host=host, nextHost=nextHost, error=str(e))
+            if findDone is not None:
+                done = findDone()
+                if done is not None:
+                    return done
+
+
+def farmIdleCores():
+    """Return the idle cores on up, unlocked hosts, for chunk sizing."""
+    return callCuebot(lambda: chunk_sizing.idleCores(opencue.api))
+
+
+def jobProgress(jobs, since=None):
+    """Return frame progress summaries of jobs, from delta polls."""
+    return MONITOR.progress(opencue.api, jobs, since, callCuebot)
+
+
+def submitJob(jobData, onEvent=ignoreEvent):
+    """Submit a job directly using opencue.api.launchSpecAndWait.
+
+    onEvent is called with each submission stage: spec_built, rpc_sent and
+    job_accepted (with the job names, IDs and log paths).
+    """
+    importOpencue()
+    spec, cached = spec_cache.compileSpec(jobData, SPEC_CACHE)
+    onEvent("spec_built", layers=len(jobData.get("layers", [])), size=len(spec),
+            cached=cached)
+    onEvent("rpc_sent")
+    jobs = callCuebot(
+        lambda: opencue.api.launchSpecAndWait(spec), onEvent,
+        lambda: launchedJobs(jobData)
+    )
+    onEvent("job_accepted", jobs=describeJobs(jobData, jobs))
     return jobs
 
 
-def main():
-    if len(sys.argv) < 3:
-        print("Usage: maya_submit_worker.py <job_data.json> <cuebot_host>", file=sys.stderr)
-        sys.exit(1)
+class JobConfirmer(threading.Thread):
+    """Polls Cuebot until asynchronously launched jobs exist.
+
+    Emits job_confirmed with the job ID and log path as each job appears,
+    and job_unconfirmed for any still missing when the timeout expires.
+    """
+
+    def __init__(self, jobData, jobNames, onEvent=None,
+                 interval=CONFIRM_INTERVAL, timeout=CONFIRM_TIMEOUT):
+        super(JobConfirmer, self).__init__()
+        self.daemon = True
+        self.jobData = jobData
+        self.jobNames = list(jobNames)
+        self.onEvent = onEvent or ignoreEvent
+        self.interval = interval
+        self.timeout = timeout
+        self.confirmed = {}
+
+    def run(self):
+        deadline = time.time() + self.timeout
+        pending = list(self.jobNames)
+        while pending:
+            for jobName in list(pending):
+                try:
+                    job = callCuebot(
+                        lambda: opencue.api.findJob(jobName), self.onEvent
+                    )
+                except opencue.exception.EntityNotFoundException:
+                    continue
+                except Exception as e:
+                    # Transient RPC failure; keep polling until the deadline.
+                    self.onEvent("confirm_error", name=jobName, error=str(e))
+                    continue
+                result = describeJobs(self.jobData, [job])[0]
+                self.confirmed[jobName] = result
+                pending.remove(jobName)
+                self.onEvent("job_confirmed", jobs=[result])
+            if not pending or time.time() >= deadline:
+                break
+            time.sleep(self.interval)
+
+        if pending:
+            self.onEvent("job_unconfirmed", names=pending)
+
+    def results(self):
+        """Describe every launched job; unconfirmed jobs have no ID."""
+        return [
+            self.confirmed.get(jobName) or describeLaunched(self.jobData, [jobName])[0]
+            for jobName in self.jobNames
+        ]
+
+
+def launchJob(jobData, onEvent=ignoreEvent):
+    """Submit a job with opencue.api.launchSpec and confirm it in the background.
+
+    Returns as soon as Cuebot accepts the spec, after emitting job_launched
+    with the job names and log paths. The returned JobConfirmer is already
+    running; join() it to wait for the job IDs.
+    """
+    importOpencue()
+    spec, cached = spec_cache.compileSpec(jobData, SPEC_CACHE)
+    onEvent("spec_built", layers=len(jobData.get("layers", [])), size=len(spec),
+            cached=cached)
+
+    def launchedNames():
+        jobs = launchedJobs(jobData)
+        return [job.name() for job in jobs] if jobs else None
+
+    onEvent("rpc_sent")
+    jobNames = callCuebot(lambda: opencue.api.launchSpec(spec), onEvent, launchedNames)
+    onEvent("job_launched", jobs=describeLaunched(jobData, jobNames))
+    confirmer = JobConfirmer(jobData, jobNames, onEvent)
+    confirmer.start()
+    return confirmer
+
+
+def runSubmission(jobData, onEvent=ignoreEvent):
+    """Submit in the job data's launch mode and return the job descriptions."""
+    if jobData.get("launchMode") == LAUNCH_MODE_ASYNC:
+        confirmer = launchJob(jobData, onEvent)
+        confirmer.join()
+        return confirmer.results()
+    return describeJobs(jobData, submitJob(jobData, onEvent))
+
+
+def isTransient(error):
+    """Return True for Cuebot errors worth retrying later from the outbox."""
+    return isinstance(error, (
+        opencue.exception.ConnectionException,
+        opencue.exception.DeadlineExceededException,
+    ))
+
+
+def submitDurably(jobData, onEvent=ignoreEvent):
+    """Submit through the outbox so a Cuebot outage never loses the job.
+
+    Returns the job descriptions, or raises SubmissionQueued if Cuebot could
+    not be reached (or identical job data is already queued); the submit
+    daemon's OutboxFlusher then retries it.
+    """
+    if OUTBOX is None:
+        results = runSubmission(jobData, onEvent)
+        watchShow(jobData)
+        return results
+    importOpencue()
+    key, created = OUTBOX.add(jobData)
+    if not created:
+        raise SubmissionQueued(key, "Identical job data is already queued for retry")
+    try:
+        results = runSubmission(jobData, onEvent)
+    except Exception as e:
+        if not isTransient(e):
+            OUTBOX.fail(key, e)
+            raise
+        delay = OUTBOX.retryLater(key, e)
+        if delay is None:
+            raise
+        onEvent("queued", key=key, retryIn=delay, error=str(e))
+        raise SubmissionQueued(
+            key, "Cuebot unavailable, submission queued for retry: {}".format(e)
+        )
+    OUTBOX.complete(key, results)
+    watchShow(jobData)
+    return results
 
-    jobDataFile = sys.argv[1]
-    cuebotHost = sys.argv[2]
 
-    # Configure Cuebot connection
-    Cuebot.setHosts([cuebotHost])
+def watchShow(jobData):
+    """Add the job's show to the history syncs; never fails a submit."""
+    if HISTORY is None:
+        return
+    try:
+        HISTORY.watch(jobData.get("show"))
+    except Exception:
+        traceback.print_exc()
+
+
+def findExistingJob(jobData):
+    """Return the pending Cuebot job for job data, or None."""
+    try:
+        return callCuebot(lambda: opencue.api.findJob(cuebotJobName(jobData)))
+    except opencue.exception.EntityNotFoundException:
+        return None
+
+
+def launchedJobs(jobData):
+    """Return [job] if a launch that lost its connection reached Cuebot, else None."""
+    job = findExistingJob(jobData)
+    return [job] if job is not None else None
+
+
+class OutboxFlusher(threading.Thread):
+    """Retries queued submissions with backoff until Cuebot accepts them.
+
+    A queued attempt may have reached Cuebot before the connection failed
+    (e.g. a deadline error), so Cuebot is asked for the job by name before
+    every relaunch.
+    """
+
+    def __init__(self, outbox, interval=FLUSH_INTERVAL, onEvent=None):
+        super(OutboxFlusher, self).__init__()
+        self.daemon = True
+        self.outbox = outbox
+        self.interval = interval
+        self.onEvent = onEvent or ignoreEvent
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.flush()
+
+    def stop(self):
+        self.stopped.set()
+
+    def flush(self):
+        """Retry every due record once."""
+        for key, jobData, attempts in self.outbox.claimDue():
+            try:
+                job = findExistingJob(jobData)
+                if job is not None:
+                    results = describeJobs(jobData, [job])
+                else:
+                    results = runSubmission(jobData)
+            except Exception as e:
+                if isTransient(e) and self.outbox.retryLater(key, e) is not None:
+                    continue
+                self.outbox.fail(key, e)
+                self.onEvent("outbox_failed", key=key, attempts=attempts, error=str(e))
+                continue
+            self.outbox.complete(key, results)
+            self.onEvent("outbox_submitted", key=key, attempts=attempts, jobs=results)
+
+
+class HistorySyncer(threading.Thread):
+    """Pulls finished jobs of watched shows into the local job history."""
+
+    def __init__(self, history, interval=job_history.SYNC_INTERVAL, onEvent=None):
+        super(HistorySyncer, self).__init__()
+        self.daemon = True
+        self.history = history
+        self.interval = interval
+        self.onEvent = onEvent or ignoreEvent
+        self.stopped = threading.Event()
+
+    def run(self):
+        while True:
+            self.sync()
+            if self.stopped.wait(self.interval):
+                return
+
+    def stop(self):
+        self.stopped.set()
+
+    def sync(self):
+        try:
+            added = callCuebot(lambda: self.history.sync(opencue.api))
+        except Exception as e:
+            # Cuebot down or a bad record; the next interval tries again.
+            self.onEvent("history_failed", error=str(e))
+            return
+        if any(added.values()):
+            self.onEvent("history_synced", jobs=added)
+
+
+def describeLaunched(jobData, jobNames):
+    """Describe jobs known only by name, before Cuebot confirms them."""
+    return [
+        {"name": jobName, "id": None, "logPath": getLogPath(jobData, jobName)}
+        for jobName in jobNames or []
+    ]
+
+
+def describeJobs(jobData, jobs):
+    """Return name, ID and log path for each launched job."""
+    results = []
+    for job in jobs or []:
+        jobName = job.name()
+        results.append({
+            "name": jobName,
+            "id": job.id(),
+            "logPath": getLogPath(jobData, jobName),
+        })
+    return results
+
+
+def formatJobs(results):
+    """Format job descriptions as the lines shown in the Maya dialog."""
+    if not results:
+        return "Job submitted successfully"
+    lines = []
+    for result in results:
+        lines.append("Job Name: {}".format(result["name"]))
+        lines.append("Job ID: {}".format(result["id"] or "(not yet confirmed)"))
+        lines.append("Log Path: {}".format(result["logPath"]))
+    return "\n".join(lines)
+
+
+def readNdjson(lines, source):
+    """Yield (source, jobData, error) for each non-blank NDJSON line."""
+    for lineNumber, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        label = "{}:{}".format(source, lineNumber)
+        try:
+            yield label, json.loads(line), None
+        except ValueError as e:
+            yield label, None, "Invalid JSON: {}".format(e)
+
+
+def iterBatchRecords(source):
+    """Yield (source, jobData, error) for every record in a batch source.
+
+    The source may be "-" (NDJSON on stdin), a directory of .json files, an
+    NDJSON file, or a glob matching any of those. Unreadable records are
+    yielded with an error instead of raising so the batch keeps going.
+    """
+    if source == "-":
+        for record in readNdjson(sys.stdin, "<stdin>"):
+            yield record
+        return
+
+    if os.path.isdir(source):
+        paths = sorted(glob.glob(os.path.join(source, "*.json")))
+    else:
+        paths = sorted(glob.glob(source))
+        if not paths:
+            yield source, None, "No job data matches {}".format(source)
+            return
+
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                if path.lower().endswith(NDJSON_EXTENSIONS):
+                    for record in readNdjson(f, path):
+                        yield record
+                else:
+                    yield path, json.load(f), None
+        except (OSError, ValueError) as e:
+            yield path, None, "Could not read job data: {}".format(e)
+
+
+def submitRecord(source, jobData):
+    """Submit one batch record and return its result document."""
+    start = time.time()
+    try:
+        jobs = runSubmission(jobData)
+        return {
+            "source": source,
+            "ok": True,
+            "jobs": jobs,
+            "seconds": round(time.time() - start, 3),
+        }
+    except Exception as e:
+        return {
+            "source": source,
+            "ok": False,
+            "error": "Submission error: {}".format(e),
+            "seconds": round(time.time() - start, 3),
+        }
+
+
+def submitBatch(records, concurrency=BATCH_CONCURRENCY, onResult=None):
+    """Submit batch records with at most `concurrency` in flight.
+
+    Records are pulled lazily so an NDJSON stream of any length never sits
+    in memory. onResult receives each result document as it completes.
+    Returns (submitted, failed) counts.
+    """
+    counts = {"ok": 0, "failed": 0}
+
+    def report(result):
+        counts["ok" if result["ok"] else "failed"] += 1
+        if onResult is not None:
+            onResult(result)
+
+    pending = set()
+    with futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for source, jobData, error in records:
+            if error is not None:
+                report({"source": source, "ok": False, "error": error})
+                continue
+            if len(pending) >= concurrency:
+                done, pending = futures.wait(
+                    pending, return_when=futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    report(future.result())
+            pending.add(executor.submit(submitRecord, source, jobData))
+
+        for future in futures.as_completed(pending):
+            report(future.result())
+
+    return counts["ok"], counts["failed"]
+
+
+def printResult(result, lock=threading.Lock()):
+    """Print one batch result as a single JSON line."""
+    with lock:
+        print(json.dumps(result), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Submit a Maya job to OpenCue")
+    parser.add_argument("jobDataFile",
+                        help="Job data JSON written by maya_submit.py ('-' for "
+                             "stdin), or the batch source with --batch")
+    parser.add_argument("cuebotHost",
+                        help="Cuebot host:port, or a comma-separated list to "
+                             "fail over between")
+    parser.add_argument("--progress", action="store_true",
+                        help="Stream stage events to stdout as JSON lines")
+    parser.add_argument("--json", action="store_true",
+                        help="Print the result as one JSON document")
+    parser.add_argument("--no-spec-cache", action="store_true",
+                        help="Always rebuild the job spec instead of reusing a "
+                             "cached one")
+    parser.add_argument("--no-outbox", action="store_true",
+                        help="Submit directly instead of through the local "
+                             "outbox (a Cuebot outage then fails the submit)")
+    parser.add_argument("--batch", action="store_true",
+                        help="Submit every record from a directory, glob or "
+                             "NDJSON stream ('-' for stdin)")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY,
+                        help="Concurrent submissions in batch mode "
+                             "(default: {})".format(BATCH_CONCURRENCY))
+    args = parser.parse_args()
+    global SPEC_CACHE, OUTBOX
+    if args.no_spec_cache:
+        SPEC_CACHE = None
+    if args.no_outbox:
+        OUTBOX = None
+    timer = StageTimer(emitEvent if args.progress else ignoreEvent, WORKER_START)
+    timer.mark("started")
+
+    importOpencue()
+    timer.mark("imported")
 
-    # Load job data
-    with open(jobDataFile, 'r', encoding='utf-8') as f:
-        jobData = json.load(f)
+    # Configure Cuebot connection
+    useHosts(args.cuebotHost, timer)
+
+    if args.batch:
+        start = time.time()
+        submitted, failed = submitBatch(
+            iterBatchRecords(args.jobDataFile),
+            max(1, args.concurrency),
+            printResult
+        )
+        print("Submitted {} job(s), {} failed, in {:.1f}s".format(
+            submitted, failed, time.time() - start
+        ), file=sys.stderr)
+        sys.exit(1 if failed else 0)
 
-    # Submit the job
+    timer.mark("connected")
     try:
-        jobs = submitJob(jobData)
-        if jobs:
-            for job in jobs:
-                jobName = job.name()
-                jobId = job.id()
-                logPath = getLogPath(jobData, jobName)
-                print("Job Name: {}".format(jobName))
-                print("Job ID: {}".format(jobId))
-                print("Log Path: {}".format(logPath))
+        # Load job data
+        if args.jobDataFile == "-":
+            jobData = json.load(sys.stdin)
+        else:
+            with open(args.jobDataFile, 'r', encoding='utf-8') as f:
+                jobData = json.load(f)
+        timer.mark("loaded")
+
+        # Submit the job
+        results = submitDurably(jobData, timer)
+        timer.mark("done")
+    except SubmissionQueued as e:
+        if args.json:
+            print(json.dumps({
+                "ok": False,
+                "queued": True,
+                "key": e.key,
+                "error": str(e),
+                "timings": timer.timings,
+            }))
         else:
-            print("Job submitted successfully")
+            print(str(e), file=sys.stderr)
+        sys.exit(1)
     except Exception as e:
-        import traceback
-        print("Submission error: {}".format(e), file=sys.stderr)
-        traceback.print_exc(file=sys.stderr)
+        if args.json:
+            print(json.dumps({
+                "ok": False,
+                "error": "Submission error: {}".format(e),
+                "traceback": traceback.format_exc(),
+                "timings": timer.timings,
+            }))
+        else:
+            print("Submission error: {}".format(e), file=sys.stderr)
+            traceback.print_exc(file=sys.stderr)
         sys.exit(1)
 
+    if args.json:
+        print(json.dumps({
+            "ok": True,
+            "jobs": results,
+            "text": formatJobs(results),
+            "timings": timer.timings,
+        }))
+    else:
+        print(formatJobs(results))
+
 
 if __name__ == "__main__":
     main()
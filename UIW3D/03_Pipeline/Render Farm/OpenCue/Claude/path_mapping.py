@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+#  Copyright Contributors to the OpenCue Project
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Rule-based mapping of artist paths to the paths render nodes use.
+
+Rules come from path_mappings.json (or the file named by
+OPENCUE_PATH_MAPPINGS). Each rule maps a source prefix (a mapped drive, a
+Linux mount point, a show root) to a target prefix, optionally for one show
+only. They are compiled into a prefix trie, so mapping a path costs one walk
+over its characters however many rules there are. The longest matching
+prefix wins; for the same prefix, a show rule beats a global one and an
+earlier rule beats a later one. Windows prefixes (drive letters and UNC
+shares) match case-insensitively, and / and \\ are interchangeable.
+The rest of a mapped path takes the target's separator. The rules file is
+read again when its mtime changes, so the submit daemon picks up edits
+without a restart.
+
+Used by both submitters (paths and pre-flight dependency lists) and by
+job_spec in the worker (render commands). Standard library only.
+
+Usage:
+    python path_mapping.py [--show SHOW] <path>...
+    python path_mapping.py --rules
+"""
+
+import argparse
+import collections
+import hashlib
+import json
+import os
+import re
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RULES_FILE = os.environ.get("OPENCUE_PATH_MAPPINGS", os.path.join(HERE, "path_mappings.json"))
+
+# Used when no rules file can be read
+DEFAULT_RULES = (
+    {"from": "S:/", "to": "//10.40.14.25/Projects/"},
+    {"from": "R:/", "to": "//10.40.14.25/RenderOutput/"},
+)
+
+# Drive letters and UNC shares are Windows paths: matched case-insensitively
+WINDOWS_PREFIX = re.compile(r"^(?:[A-Za-z]:|[\\/]{2})")
+
+Rule = collections.namedtuple("Rule", "source target show")
+
+# Trie node key holding the rule that ends at that node
+RULE = None
+
+# Mapped paths remembered per mapper (a long-running daemon maps many scenes)
+MAX_CACHED = 200000
+
+
+def normalizeSeparators(path):
+    return path.replace("\\", "/")
+
+
+def isWindowsPath(path):
+    return bool(WINDOWS_PREFIX.match(path))
+
+
+def parseRules(data):
+    """Return Rules from config data: a list of rules or {"rules": [...]}."""
+    if isinstance(data, dict):
+        data = data.get("rules", [])
+    rules = []
+    for entry in data:
+        if not entry.get("from") or entry.get("to") is None:
+            raise ValueError("Path mapping rule needs 'from' and 'to': {!r}".format(entry))
+        rules.append(Rule(entry["from"], entry["to"], entry.get("show") or None))
+    return rules
+
+
+def loadRules(path=RULES_FILE):
+    """Read rules from a JSON file, or DEFAULT_RULES if it doesn't exist."""
+    try:
+        data = readConfig(path)
+    except OSError:
+        return parseRules(DEFAULT_RULES)
+    return parseRules(json.loads(data.decode("utf-8")))
+
+
+def readConfig(path):
+    # Inside the worker zipapp the config is read through the loader.
+    loader = getattr(globals().get("__spec__"), "loader", None)
+    if path.startswith(HERE) and hasattr(loader, "get_data"):
+        return loader.get_data(path)
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class PathMapper(object):
+    """Ordered rules compiled into prefix tries.
+
+    Windows prefixes go into a trie keyed on lower-cased characters, the
+    rest into a case-sensitive one; a path is looked up in both and the
+    longer match wins.
+    """
+
+    def __init__(self, rules, show=None):
+        self.rules = list(rules)
+        self.show = show
+        self.foldedTrie = {}
+        self.exactTrie = {}
+        self.cache = {}
+        # Show rules first, so they take an identical prefix from global ones.
+        active = [rule for rule in self.rules if rule.show and rule.show == show]
+        active += [rule for rule in self.rules if not rule.show]
+        self.active = active
+        for rule in active:
+            self.insert(rule)
+        self.pattern = self.commandPattern()
+
+    def insert(self, rule):
+        source = normalizeSeparators(rule.source)
+        trie = self.exactTrie
+        if isWindowsPath(source):
+            source = source.lower()
+            trie = self.foldedTrie
+        node = trie
+        for char in source:
+            node = node.setdefault(char, {})
+        # The first rule for a prefix wins.
+        node.setdefault(RULE, rule)
+
+    @staticmethod
+    def longestMatch(trie, path):
+        """Return (rule, prefix length) of the longest prefix of path in trie.
+
+        Prefixes only match whole path components, so /mnt/proj doesn't
+        match /mnt/projects.
+        """
+        node = trie
+        best = (None, 0)
+        end = len(path) - 1
+        for index, char in enumerate(path):
+            node = node.get(char)
+            if node is None:
+                break
+            if RULE in node and (char == "/" or index == end or path[index + 1] == "/"):
+                best = (node[RULE], index + 1)
+        return best
+
+    def match(self, path):
+        """Return (rule, matched length) for a path, or (None, 0)."""
+        normalized = normalizeSeparators(path)
+        folded = self.longestMatch(self.foldedTrie, normalized.lower())
+        exact = self.longestMatch(self.exactTrie, normalized)
+        return folded if folded[1] >= exact[1] else exact
+
+    def map(self, path):
+        """Return the render-node path for a path (unchanged if no rule matches)."""
+        mapped = self.cache.get(path)
+        if mapped is None:
+            rule, length = self.match(path)
+            if rule is None:
+                mapped = path
+            else:
+                separator = "\\" if "\\" in rule.target and "/" not in rule.target else "/"
+                rest = path[length:].replace("\\", "/")
+                mapped = rule.target + rest.replace("/", separator)
+            if len(self.cache) >= MAX_CACHED:
+                self.cache.clear()
+            self.cache[path] = mapped
+        return mapped
+
+    def mapPaths(self, paths):
+        """Map a list of paths; repeated paths are only looked up once."""
+        return [self.map(path) for path in paths]
+
+    def commandPattern(self):
+        """One regex finding every path (quoted or bare) that starts with a rule prefix."""
+        sources = sorted(
+            set(normalizeSeparators(rule.source) for rule in self.active),
+            key=len, reverse=True
+        )
+        if not sources:
+            return None
+        prefixes = "|".join(
+            re.escape(source).replace("/", r"[\\/]") for source in sources
+        )
+        return re.compile(
+            r'"((?:{0})[^"]*)"|(?<![\w:/\\])((?:{0})[^\s"]*)'.format(prefixes),
+            re.IGNORECASE
+        )
+
+    def mapCommand(self, command):
+        """Map every path in a command string in one pass."""
+        if self.pattern is None:
+            return command
+
+        def replace(match):
+            if match.group(1) is not None:
+                return '"{}"'.format(self.map(match.group(1)))
+            return self.map(match.group(2))
+
+        return self.pattern.sub(replace, command)
+
+    def fingerprint(self):
+        """Hash of the active rules, for caches keyed on mapped output."""
+        data = json.dumps([list(rule) for rule in self.rules] + [self.show])
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+
+RULES = None
+RULES_MTIME = None
+MAPPERS = {}
+
+
+def rulesMtime(path=RULES_FILE):
+    """Return the rules file's mtime, or None if it can't be stat-ed
+    (missing, or bundled in the zipapp)."""
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def forShow(show=None):
+    """Return the (cached) mapper for a show, using the configured rules.
+
+    The rules and mappers are rebuilt when the rules file's mtime changes.
+    """
+    global RULES, RULES_MTIME, MAPPERS
+    show = (show or "").strip() or None
+    mtime = rulesMtime()
+    if RULES is None or mtime != RULES_MTIME:
+        RULES = loadRules()
+        RULES_MTIME = mtime
+        MAPPERS = {}
+    mapper = MAPPERS.get(show)
+    if mapper is None:
+        mapper = MAPPERS[show] = PathMapper(RULES, show)
+    return mapper
+
+
+def mapPath(path, show=None):
+    return forShow(show).map(path)
+
+
+def mapPaths(paths, show=None):
+    return forShow(show).mapPaths(paths)
+
+
+def mapCommand(command, show=None):
+    return forShow(show).mapCommand(command)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Map artist paths to render-node paths")
+    parser.add_argument("paths", nargs="*")
+    parser.add_argument("--show", help="Apply this show's rules too")
+    parser.add_argument("--rules", action="store_true", help="List the rules in effect")
+    args = parser.parse_args()
+
+    mapper = forShow(args.show)
+    if args.rules:
+        print("Rules file: {}".format(RULES_FILE))
+        for rule in mapper.rules:
+            print("{:<30} -> {}{}".format(
+                rule.source, rule.target, "  (show {})".format(rule.show) if rule.show else ""
+            ))
+    for path in args.paths:
+        print("{} -> {}".format(path, mapper.map(path)))
+
+
+if __name__ == "__main__":
+    main()
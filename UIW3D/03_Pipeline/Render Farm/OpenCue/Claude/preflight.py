@@ -0,0 +1,271 @@
+#  Copyright Contributors to the OpenCue Project
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Pre-flight check of a scene's file dependencies before submission.
+
+Frames that fail after minutes of Maya startup because a texture, reference
+or cache is missing on the share are caught here instead. Every file the
+scene depends on (file textures, references, aiImage, Alembic, standins,
+GPU caches, ...) is mapped to the path render nodes will use (path_mapping)
+and checked on a small thread pool, so a scene with thousands of textures
+doesn't stat them one by one or flood the file server. Files found recently
+are remembered with their size and mtime, so checking again is instant.
+
+collectDependencies() needs Maya; checkDependencies() and the cache only
+use the standard library.
+
+Usage (in Maya):
+    import preflight
+    report = preflight.runPreflight()
+    print(preflight.formatReport(report))
+"""
+
+import glob
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent import futures
+
+import path_mapping
+
+# Node types and the attribute holding their file path
+DEPENDENCY_ATTRS = (
+    ("file", "fileTextureName"),
+    ("aiImage", "filename"),
+    ("aiStandIn", "dso"),
+    ("aiVolume", "filename"),
+    ("AlembicNode", "abc_File"),
+    ("gpuCache", "cacheFileName"),
+    ("imagePlane", "imageName"),
+)
+
+# Concurrent stats against the share; enough to hide SMB latency without
+# hammering the file server.
+PREFLIGHT_WORKERS = 8
+
+# Give up on files the share hasn't answered for after this many seconds
+PREFLIGHT_TIMEOUT = 30
+
+# Files found within this many seconds are not checked again
+CACHE_TTL = 15 * 60
+
+CACHE_FILE = os.path.join(
+    os.environ.get("LOCALAPPDATA", tempfile.gettempdir()), "OpenCueSubmit", "preflight_cache.json"
+)
+
+STATUS_OK = "ok"
+STATUS_MISSING = "missing"
+STATUS_UNMAPPED = "unmapped"
+STATUS_TIMEOUT = "timeout"
+STATUS_ERROR = "error"
+
+# Frame and UV tile tokens that make a path a pattern rather than a file
+PATTERN_TOKENS = re.compile(r"<udim>|<uvtile>|<tile>|<f>|<frame>|u<u>_v<v>|#+", re.IGNORECASE)
+
+# A path still on a drive letter after mapping only exists on the artist's box
+DRIVE_PATH = re.compile(r"^[A-Za-z]:")
+
+
+def collectDependencies():
+    """Return {path: [sources]} for every file the open scene depends on.
+
+    Sources are "node.attribute", "reference" or "scene". Node types from
+    plug-ins that aren't loaded are skipped.
+    """
+    import maya.cmds as cmds
+    import maya.api.OpenMaya as om
+
+    dependencies = {}
+
+    def add(path, source):
+        path = (path or "").strip()
+        if path:
+            dependencies.setdefault(path, []).append(source)
+
+    add(cmds.file(query=True, sceneName=True), "scene")
+    for reference in cmds.file(query=True, reference=True) or []:
+        add(cmds.referenceQuery(reference, filename=True, withoutCopyNumber=True),
+            "reference")
+
+    for nodeType, attr in DEPENDENCY_ATTRS:
+        try:
+            nodes = cmds.ls(type=nodeType) or []
+        except RuntimeError:
+            continue  # Plug-in for this type isn't loaded
+        if not nodes:
+            continue
+        # One selection list and direct plug reads instead of a getAttr per node
+        selection = om.MSelectionList()
+        for node in nodes:
+            selection.add(node)
+        for i, node in enumerate(nodes):
+            fn = om.MFnDependencyNode(selection.getDependNode(i))
+            add(fn.findPlug(attr, False).asString(), "{}.{}".format(node, attr))
+    return dependencies
+
+
+class PreflightCache(object):
+    """Files recently found on the share, with their size and mtime."""
+
+    def __init__(self, path=CACHE_FILE, ttl=CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, renderPath):
+        entry = self.entries.get(renderPath)
+        if entry and time.time() - entry["checked"] < self.ttl:
+            return entry
+        return None
+
+    def put(self, renderPath, size, mtime):
+        with self.lock:
+            self.entries[renderPath] = {"size": size, "mtime": mtime, "checked": time.time()}
+
+    def save(self):
+        """Write the cache, dropping expired entries."""
+        now = time.time()
+        with self.lock:
+            entries = dict(
+                (path, entry) for path, entry in self.entries.items()
+                if now - entry["checked"] < self.ttl
+            )
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd, tmpPath = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entries, f)
+            os.replace(tmpPath, self.path)
+        except OSError:
+            pass
+
+
+def statRenderPath(renderPath):
+    """Return (size, mtime) for a file or the newest match of a pattern.
+
+    Raises OSError if nothing exists.
+    """
+    if not PATTERN_TOKENS.search(renderPath):
+        st = os.stat(renderPath)
+        return st.st_size, st.st_mtime
+    # <UDIM>, ####, ... : any matching file will do
+    matches = glob.glob(PATTERN_TOKENS.sub("*", glob.escape(renderPath)))
+    if not matches:
+        raise OSError("No files match {}".format(renderPath))
+    newest = max(os.stat(match).st_mtime for match in matches)
+    return len(matches), newest
+
+
+def checkDependencies(dependencies, mapper=None, cache=None,
+                      workers=PREFLIGHT_WORKERS, timeout=PREFLIGHT_TIMEOUT):
+    """Check that every dependency exists where render nodes will look.
+
+    dependencies is {path: [sources]}; paths are mapped with mapper (a
+    path_mapping.PathMapper, the global rules by default). Returns one
+    result dict per path with path, renderPath, sources, status (ok,
+    missing, unmapped, timeout or error), cached and error.
+    """
+    mapper = mapper or path_mapping.forShow()
+    paths = sorted(dependencies)
+    results = []
+    pending = {}
+    executor = futures.ThreadPoolExecutor(max_workers=workers)
+    try:
+        for path, renderPath in zip(paths, mapper.mapPaths(paths)):
+            sources = dependencies[path]
+            result = {
+                "path": path,
+                "renderPath": renderPath,
+                "sources": sources,
+                "status": STATUS_OK,
+                "cached": False,
+                "error": None,
+            }
+            results.append(result)
+            if DRIVE_PATH.match(renderPath):
+                result["status"] = STATUS_UNMAPPED
+                result["error"] = "Not on a share render nodes can reach"
+            elif cache is not None and cache.get(renderPath):
+                result["cached"] = True
+            else:
+                pending[executor.submit(statRenderPath, renderPath)] = result
+
+        done, notDone = futures.wait(pending, timeout=timeout)
+        for future in done:
+            result = pending[future]
+            try:
+                size, mtime = future.result()
+            except OSError as e:
+                result["status"] = STATUS_MISSING
+                result["error"] = e.strerror or str(e)
+            except Exception as e:
+                result["status"] = STATUS_ERROR
+                result["error"] = str(e)
+            else:
+                if cache is not None:
+                    cache.put(result["renderPath"], size, mtime)
+        for future in notDone:
+            pending[future]["status"] = STATUS_TIMEOUT
+            pending[future]["error"] = "No answer from the share in {}s".format(timeout)
+    finally:
+        # Don't wait for stats stuck on an unresponsive share.
+        executor.shutdown(wait=False)
+    if cache is not None:
+        cache.save()
+    return results
+
+
+def runPreflight(mapper=None, dependencies=None):
+    """Collect (unless given) and check the scene's dependencies.
+
+    Returns a report dict with results, problems (results not ok), checked,
+    cached and seconds.
+    """
+    start = time.time()
+    if dependencies is None:
+        dependencies = collectDependencies()
+    results = checkDependencies(dependencies, mapper, PreflightCache())
+    return {
+        "results": results,
+        "problems": [r for r in results if r["status"] != STATUS_OK],
+        "checked": len(results),
+        "cached": sum(1 for r in results if r["cached"]),
+        "seconds": round(time.time() - start, 2),
+    }
+
+
+def formatReport(report, limit=20):
+    """Describe a pre-flight report for a dialog or the Script Editor."""
+    problems = report["problems"]
+    lines = ["Checked {} file(s) in {:.1f}s ({} from cache): {} problem(s)".format(
+        report["checked"], report["seconds"], report["cached"], len(problems)
+    )]
+    for result in problems[:limit]:
+        lines.append("{}: {}".format(result["status"].upper(), result["renderPath"]))
+        lines.append("    used by {}{}".format(
+            ", ".join(result["sources"][:3]),
+            " (+{} more)".format(len(result["sources"]) - 3) if len(result["sources"]) > 3 else ""
+        ))
+    if len(problems) > limit:
+        lines.append("... and {} more".format(len(problems) - limit))
+    return "\n".join(lines)
@@ -0,0 +1,604 @@
+#!/usr/bin/env python
+#  Copyright Contributors to the OpenCue Project
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Node-local, content-addressed asset cache for render tasks.
+
+When 40 render nodes start the same job, every one of them reads the scene
+and all of its textures from the one Linux share. This launcher runs on the
+render node instead: it stages the files listed in the job's manifest into a
+cache under RQD_TMPDIR and then runs the render against the local copies.
+
+- Files are stored once per node by the SHA-256 of their content. They are
+  looked up by (path, size, mtime), so a file already cached needs only a
+  stat on the share.
+- Fills are atomic. One task per node copies a file while the others wait
+  for it, so 8 frames starting together on one host download it once.
+- Least recently used objects are evicted once the cache grows past
+  RENDER_CACHE_MAX_GB. Anything used in the last KEEP_RECENT seconds is
+  kept, because running tasks may still read it.
+- Every run prints its hit rate, and `stats` prints totals for the node.
+
+Each task gets a private mirror of the files it staged (hard links into the
+cache). A generated userSetup.py points Maya at the mirror for exactly those
+files: references as they load, and file paths on the node types preflight
+collects once the scene is open. Anything else the scene reads (nested
+references, .tx files, caches, OCIO configs) still comes from the share. If
+any file can't be staged, the render runs straight from the share as before.
+
+Python 3.9, standard library only.
+
+Usage:
+    python render_cache.py run --manifest <manifest.json> -- <render command...>
+    python render_cache.py stats
+    python render_cache.py evict
+    python render_cache.py clear
+"""
+
+import argparse
+import contextlib
+import glob
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from concurrent import futures
+
+import preflight
+
+# rqd.conf's RQD_TMPDIR isn't exported to frames, so its value is repeated
+# here; set RQD_TMPDIR in the environment to override it.
+CACHE_ROOT = os.path.join(
+    os.environ.get(
+        "RQD_TMPDIR",
+        r"C:\tmp\rqd" if os.name == "nt" else os.path.join(tempfile.gettempdir(), "rqd")
+    ),
+    "asset_cache"
+)
+
+# Manifests written at submit time, readable from every render node
+MANIFEST_ROOT = r"\\10.40.14.25\RenderOutputRepo\OpenCue\Manifests"
+
+MAX_CACHE_BYTES = int(float(os.environ.get("RENDER_CACHE_MAX_GB", "200")) * 2 ** 30)
+
+# Objects used this recently may be open by a running task; never evict them
+KEEP_RECENT = 6 * 3600
+
+# Files copied from the share at once by one task
+STAGE_WORKERS = 8
+
+# A fill lock older than this belongs to a task that died mid-copy
+FILL_STALE = 15 * 60
+
+# How often a task waiting on another task's fill checks for it
+FILL_POLL = 0.2
+
+COPY_CHUNK = 4 * 1024 * 1024
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS sources (
+        key TEXT PRIMARY KEY,
+        path TEXT NOT NULL,
+        digest TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS objects (
+        digest TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        created REAL NOT NULL,
+        lastUsed REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS stats (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )
+    """,
+)
+
+STAT_NAMES = ("hits", "misses", "bytesHit", "bytesFetched", "evicted", "fallbacks")
+
+# userSetup.py for a staged task. Only paths that were staged are redirected,
+# so a file the manifest doesn't list is still read from the share.
+STARTUP_SCRIPT = r"""import maya.OpenMaya as om
+import maya.cmds as cmds
+
+STAGED = {staged!r}
+ATTRS = {attrs!r}
+
+
+def staged(path):
+    return STAGED.get((path or "").strip().replace("\\", "/").lower())
+
+
+def checkReference(retCode, fileObject, clientData):
+    mirror = staged(fileObject.rawFullName())
+    if mirror:
+        fileObject.setRawFullName(mirror)
+    om.MScriptUtil.setBool(retCode, True)
+
+
+def repath(clientData):
+    for nodeType, attr in ATTRS:
+        try:
+            nodes = cmds.ls(type=nodeType) or []
+        except RuntimeError:
+            continue
+        for node in nodes:
+            plug = node + "." + attr
+            mirror = staged(cmds.getAttr(plug))
+            if not mirror:
+                continue
+            # A new path re-runs the colour space rules; keep the scene's.
+            colorSpace = None
+            if cmds.attributeQuery("colorSpace", node=node, exists=True):
+                colorSpace = cmds.getAttr(node + ".colorSpace")
+            try:
+                cmds.setAttr(plug, mirror, type="string")
+                if colorSpace:
+                    cmds.setAttr(node + ".colorSpace", colorSpace, type="string")
+            except RuntimeError:
+                pass  # Locked; render it from the share
+
+
+om.MSceneMessage.addCheckFileCallback(om.MSceneMessage.kBeforeLoadReferenceCheck, checkReference)
+om.MSceneMessage.addCallback(om.MSceneMessage.kAfterOpen, repath)
+"""
+
+
+def writeManifest(scene, files, root=MANIFEST_ROOT):
+    """Write a staging manifest to the share and return its path.
+
+    scene and files are render-node paths. The file name is the hash of the
+    content, so resubmitting an unchanged scene reuses the same manifest.
+    """
+    manifest = {"version": 1, "scene": scene, "files": sorted(set(files) | {scene})}
+    data = json.dumps(manifest, sort_keys=True, indent=1).encode("utf-8")
+    path = os.path.join(root, hashlib.sha256(data).hexdigest()[:32] + ".json")
+    if not os.path.exists(path):
+        os.makedirs(root, exist_ok=True)
+        fd, tmpPath = tempfile.mkstemp(dir=root, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmpPath, path)
+    return path
+
+
+def readManifest(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def expandFiles(path):
+    """Return the files a manifest entry stands for (all matches of a pattern)."""
+    if not preflight.PATTERN_TOKENS.search(path):
+        return [path]
+    return sorted(glob.glob(preflight.PATTERN_TOKENS.sub("*", glob.escape(path))))
+
+
+def normalizePath(path):
+    """Forward slashes and (Windows paths being case-insensitive) lower case."""
+    return path.replace("\\", "/").lower()
+
+
+def sourceKey(path, st):
+    """Identify one version of a source file without reading it."""
+    identity = "{}|{}|{}".format(normalizePath(path), st.st_size, st.st_mtime_ns)
+    return hashlib.sha1(identity.encode("utf-8")).hexdigest()
+
+
+def mirrorPath(mirrorRoot, path):
+    """Where a share path appears inside a task's mirror."""
+    parts = [part for part in path.replace("\\", "/").split("/") if part]
+    parts[0] = parts[0].rstrip(":")
+    return os.path.join(mirrorRoot, *parts)
+
+
+class AssetCache(object):
+    """Content-addressed file cache shared by every task on one node.
+
+    The index (SQLite, WAL) maps source versions to content digests and
+    tracks object sizes and last use; objects live under objects/.
+    """
+
+    def __init__(self, root=CACHE_ROOT, maxBytes=MAX_CACHE_BYTES):
+        self.root = root
+        self.maxBytes = maxBytes
+        self.created = False
+
+    def connect(self):
+        if not self.created:
+            for name in ("objects", "locks", "tmp", "tasks"):
+                os.makedirs(os.path.join(self.root, name), exist_ok=True)
+        db = sqlite3.connect(os.path.join(self.root, "index.db"), timeout=60,
+                             isolation_level=None)
+        db.row_factory = sqlite3.Row
+        if not self.created:
+            db.execute("PRAGMA journal_mode=WAL")
+            for statement in SCHEMA:
+                db.execute(statement)
+            self.created = True
+        return db
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Yield a connection inside a write transaction (see submit_outbox)."""
+        db = self.connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+        finally:
+            db.close()
+
+    def objectPath(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], digest)
+
+    def lookup(self, key):
+        """Return the cached object path for a source version, or None."""
+        db = self.connect()
+        try:
+            row = db.execute("SELECT digest FROM sources WHERE key = ?", (key,)).fetchone()
+        finally:
+            db.close()
+        if row is None:
+            return None
+        path = self.objectPath(row["digest"])
+        return path if os.path.exists(path) else None
+
+    def fill(self, path, key):
+        """Copy a source file into the cache, hashing it on the way.
+
+        Returns the object path. Must be called holding the key's fill lock.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmpPath = tempfile.mkstemp(dir=os.path.join(self.root, "tmp"))
+        try:
+            with open(path, "rb") as src, os.fdopen(fd, "wb") as dst:
+                while True:
+                    chunk = src.read(COPY_CHUNK)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    dst.write(chunk)
+                    size += len(chunk)
+            digest = digest.hexdigest()
+            objectPath = self.objectPath(digest)
+            os.makedirs(os.path.dirname(objectPath), exist_ok=True)
+            if os.path.exists(objectPath):
+                # Same content under another path: keep the existing object.
+                os.unlink(tmpPath)
+            else:
+                os.replace(tmpPath, objectPath)
+        except BaseException:
+            if os.path.exists(tmpPath):
+                os.unlink(tmpPath)
+            raise
+
+        now = time.time()
+        with self.transaction() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO sources (key, path, digest) VALUES (?, ?, ?)",
+                (key, path, digest)
+            )
+            db.execute(
+                "INSERT OR IGNORE INTO objects (digest, size, created, lastUsed)"
+                " VALUES (?, ?, ?, ?)",
+                (digest, size, now, now)
+            )
+        return objectPath
+
+    @contextlib.contextmanager
+    def fillLock(self, key):
+        """Yield True holding the key's fill lock, or False if another task has it."""
+        lockPath = os.path.join(self.root, "locks", key)
+        try:
+            fd = os.open(lockPath, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lockPath) > FILL_STALE:
+                    os.unlink(lockPath)
+            except OSError:
+                pass
+            yield False
+            return
+        os.close(fd)
+        try:
+            yield True
+        finally:
+            os.unlink(lockPath)
+
+    def stage(self, path):
+        """Fetch a source file into the cache once per node.
+
+        Returns (object path, hit, fetched, size). hit is False if the file
+        wasn't cached when asked for; fetched is True only for the task that
+        copied it, not for tasks that waited on that copy.
+        """
+        st = os.stat(path)
+        key = sourceKey(path, st)
+        hit = True
+        while True:
+            objectPath = self.lookup(key)
+            if objectPath is not None:
+                return objectPath, hit, False, st.st_size
+            with self.fillLock(key) as locked:
+                if locked:
+                    # Another task may have finished between lookup and lock.
+                    objectPath = self.lookup(key)
+                    if objectPath is not None:
+                        return objectPath, False, False, st.st_size
+                    return self.fill(path, key), False, True, st.st_size
+            # Another task on this node is copying it; wait and reuse.
+            hit = False
+            time.sleep(FILL_POLL)
+
+    def touch(self, objectPaths):
+        """Mark objects as used now, for LRU eviction."""
+        now = time.time()
+        with self.transaction() as db:
+            db.executemany(
+                "UPDATE objects SET lastUsed = ? WHERE digest = ?",
+                [(now, os.path.basename(path)) for path in objectPaths]
+            )
+
+    def count(self, **deltas):
+        with self.transaction() as db:
+            for name, delta in deltas.items():
+                db.execute(
+                    "INSERT INTO stats (name, value) VALUES (?, ?)"
+                    " ON CONFLICT(name) DO UPDATE SET value = value + ?",
+                    (name, delta, delta)
+                )
+
+    def stats(self):
+        db = self.connect()
+        try:
+            stats = dict((name, 0) for name in STAT_NAMES)
+            stats.update((row["name"], row["value"]) for row in db.execute("SELECT * FROM stats"))
+            row = db.execute("SELECT COUNT(*) AS objects, SUM(size) AS size FROM objects").fetchone()
+            stats["objects"] = row["objects"]
+            stats["size"] = row["size"] or 0
+        finally:
+            db.close()
+        lookups = stats["hits"] + stats["misses"]
+        stats["hitRate"] = stats["hits"] / float(lookups) if lookups else 0.0
+        return stats
+
+    def evict(self, maxBytes=None, keepRecent=KEEP_RECENT):
+        """Remove least recently used objects until the cache fits maxBytes.
+
+        Returns the number of objects removed.
+        """
+        maxBytes = self.maxBytes if maxBytes is None else maxBytes
+        removed = []
+        with self.transaction() as db:
+            total = db.execute("SELECT SUM(size) FROM objects").fetchone()[0] or 0
+            if total <= maxBytes:
+                return 0
+            rows = db.execute(
+                "SELECT digest, size FROM objects WHERE lastUsed < ? ORDER BY lastUsed",
+                (time.time() - keepRecent,)
+            ).fetchall()
+            for row in rows:
+                if total <= maxBytes:
+                    break
+                try:
+                    os.unlink(self.objectPath(row["digest"]))
+                except FileNotFoundError:
+                    pass
+                except OSError:
+                    continue  # Still open by a render
+                total -= row["size"]
+                removed.append(row["digest"])
+            db.executemany("DELETE FROM objects WHERE digest = ?", [(d,) for d in removed])
+            db.executemany("DELETE FROM sources WHERE digest = ?", [(d,) for d in removed])
+        if removed:
+            self.count(evicted=len(removed))
+        return len(removed)
+
+    def clear(self):
+        return self.evict(maxBytes=0, keepRecent=0)
+
+
+class StagedTask(object):
+    """A task's private mirror of the share paths it renders from."""
+
+    def __init__(self, cache, manifest):
+        self.cache = cache
+        self.manifest = manifest
+        self.taskDir = os.path.join(
+            cache.root, "tasks", "{}-{}".format(os.getpid(), uuid.uuid4().hex[:8])
+        )
+        self.mirrorRoot = os.path.join(self.taskDir, "mirror")
+        self.startupDir = os.path.join(self.taskDir, "startup")
+        self.files = {}
+        self.entries = []
+        self.hits = 0
+        self.misses = 0
+        self.bytesHit = 0
+        self.bytesFetched = 0
+        self.seconds = 0.0
+
+    def stage(self, workers=STAGE_WORKERS):
+        """Stage every manifest file and build the mirror. Raises OSError on failure."""
+        start = time.time()
+        files = []
+        for entry in self.manifest["files"]:
+            matches = expandFiles(entry)
+            if not matches:
+                raise OSError("No files match {}".format(entry))
+            files.extend(matches)
+            self.entries.append(entry)
+
+        with futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            staged = executor.map(self.cache.stage, files)
+            for path, (objectPath, hit, fetched, size) in zip(files, staged):
+                self.files[path] = objectPath
+                if hit:
+                    self.hits += 1
+                    self.bytesHit += size
+                else:
+                    self.misses += 1
+                if fetched:
+                    self.bytesFetched += size
+        self.cache.touch(set(self.files.values()))
+
+        for path, objectPath in self.files.items():
+            target = mirrorPath(self.mirrorRoot, path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            try:
+                os.link(objectPath, target)
+            except OSError:
+                # No hard links on this volume; a copy still avoids the share.
+                shutil.copyfile(objectPath, target)
+        self.writeStartup()
+        self.seconds = time.time() - start
+
+    def stagedPaths(self):
+        """Return {normalized share path: mirror path} for each manifest entry.
+
+        A pattern (UDIM, frame number) maps to the same pattern in the
+        mirror, which holds every file it matched.
+        """
+        return dict(
+            (normalizePath(entry), mirrorPath(self.mirrorRoot, entry).replace("\\", "/"))
+            for entry in self.entries
+        )
+
+    def writeStartup(self):
+        # Maya runs every userSetup.py on PYTHONPATH at startup, before the
+        # scene given on the command line is opened.
+        os.makedirs(self.startupDir, exist_ok=True)
+        script = STARTUP_SCRIPT.format(
+            staged=self.stagedPaths(), attrs=preflight.DEPENDENCY_ATTRS
+        )
+        with open(os.path.join(self.startupDir, "userSetup.py"), "w", encoding="utf-8") as f:
+            f.write(script)
+
+    def rewriteCommand(self, command):
+        """Point the command's scene argument at the mirrored copy."""
+        scene = normalizePath(self.manifest["scene"])
+        return [
+            mirrorPath(self.mirrorRoot, arg) if normalizePath(arg) == scene else arg
+            for arg in command
+        ]
+
+    def environment(self):
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            part for part in (self.startupDir, env.get("PYTHONPATH")) if part
+        )
+        return env
+
+    def summary(self):
+        total = self.hits + self.misses
+        return (
+            "render_cache: {} file(s), {} hit(s) ({:.0%}), fetched {:.1f} MiB, "
+            "reused {:.1f} MiB in {:.1f}s".format(
+                total, self.hits, self.hits / float(total) if total else 0.0,
+                self.bytesFetched / 2.0 ** 20, self.bytesHit / 2.0 ** 20, self.seconds
+            )
+        )
+
+    def cleanup(self):
+        shutil.rmtree(self.taskDir, ignore_errors=True)
+
+
+def runTask(manifestPath, command, cache=None):
+    """Stage a manifest, run the render command against it and return its exit code.
+
+    Staging failures fall back to running the command unchanged from the share.
+    """
+    cache = cache or AssetCache()
+    task = None
+    try:
+        task = StagedTask(cache, readManifest(manifestPath))
+        task.stage()
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print("render_cache: staging failed, rendering from the share: {}".format(e),
+              flush=True)
+        if task is not None:
+            task.cleanup()
+        try:
+            cache.count(fallbacks=1)
+        except (OSError, sqlite3.Error):
+            pass
+        return subprocess.call(command)
+
+    try:
+        print(task.summary(), flush=True)
+        cache.count(hits=task.hits, misses=task.misses,
+                    bytesHit=task.bytesHit, bytesFetched=task.bytesFetched)
+        return subprocess.call(task.rewriteCommand(command), env=task.environment())
+    finally:
+        task.cleanup()
+        try:
+            cache.evict()
+        except (OSError, sqlite3.Error) as e:
+            print("render_cache: eviction failed: {}".format(e), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Node-local asset cache for render tasks")
+    parser.add_argument("command", choices=["run", "stats", "evict", "clear"])
+    parser.add_argument("--manifest", help="Staging manifest written at submit time")
+    # Everything after -- is the render command, passed through untouched.
+    argv = sys.argv[1:]
+    render = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, render = argv[:split], argv[split + 1:]
+    args = parser.parse_args(argv)
+
+    cache = AssetCache()
+    if args.command == "run":
+        if not args.manifest or not render:
+            parser.error("run needs --manifest and a render command after --")
+        sys.exit(runTask(args.manifest, render, cache))
+    elif args.command == "stats":
+        stats = cache.stats()
+        print("Cache dir:  {}".format(cache.root))
+        print("Objects:    {}".format(stats["objects"]))
+        print("Size:       {:.1f} GiB of {:.0f} GiB".format(
+            stats["size"] / 2.0 ** 30, cache.maxBytes / 2.0 ** 30))
+        print("Hit rate:   {:.1%} ({} hits, {} misses)".format(
+            stats["hitRate"], stats["hits"], stats["misses"]))
+        print("Reused:     {:.2f} GiB".format(stats["bytesHit"] / 2.0 ** 30))
+        print("Fetched:    {:.2f} GiB".format(stats["bytesFetched"] / 2.0 ** 30))
+        print("Evicted:    {}".format(stats["evicted"]))
+        print("Fallbacks:  {}".format(stats["fallbacks"]))
+    elif args.command == "evict":
+        print("Removed {} objects".format(cache.evict()))
+    elif args.command == "clear":
+        print("Removed {} objects".format(cache.clear()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+#  Copyright Contributors to the OpenCue Project
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Render a chunk of frames in one mayapy session.
+
+Render.exe pays Maya startup and scene load for every task, so small chunks
+waste most of their time loading, and in a large chunk one bad frame fails
+the whole task. This wrapper runs in mayapy. It loads the scene once and
+renders the chunk's frames one at a time, printing each frame's status and
+time to the frame log. A frame that fails is retried in the same session
+(FRAME_RETRIES times) before the wrapper moves on to the next frame. The
+task exits non-zero only if some frame still failed, and the summary lists
+which ones. In-process load and frame times are also recorded for
+chunk_sizing, which picks chunk sizes for later submissions.
+
+Arnold frames render in-process with arnoldRender. With --renderer file the
+scene's current renderer is used. Other renderers have no in-process batch
+render, so the chunk runs through Render.exe as it would without this
+wrapper; the submitters don't offer the option for them.
+
+--frames takes the chunk's frame spec (#FRAMESPEC#), so a chunk of a
+stepped or listed frame set renders only its own frames.
+
+Usage:
+    mayapy render_task.py --scene <scene.ma> --frames 1-10 --renderer arnold
+        [--camera cam] [--render-layer layer]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import chunk_sizing
+import frame_set
+import job_spec
+
+# Extra attempts for a failing frame before moving on
+FRAME_RETRIES = 1
+
+
+class MayaSession(object):
+    """One mayapy session with the scene loaded."""
+
+    def __init__(self, scene, renderer, camera=None, renderLayer=None):
+        import maya.standalone
+        maya.standalone.initialize(name="python")
+        import maya.cmds as cmds
+
+        self.cmds = cmds
+        self.camera = camera
+        if renderer == "arnold":
+            cmds.loadPlugin("mtoa", quiet=True)
+        cmds.file(scene, open=True, force=True)
+        if renderer == "file":
+            renderer = cmds.getAttr("defaultRenderGlobals.currentRenderer")
+            if renderer == "arnold":
+                cmds.loadPlugin("mtoa", quiet=True)
+        self.renderer = renderer
+        if renderLayer:
+            cmds.editRenderLayerGlobals(currentRenderLayer=renderLayer)
+
+    def renderFrame(self, frame):
+        # Render settings decide the output; narrow them to this frame.
+        self.cmds.setAttr("defaultRenderGlobals.animation", True)
+        self.cmds.setAttr("defaultRenderGlobals.startFrame", frame)
+        self.cmds.setAttr("defaultRenderGlobals.endFrame", frame)
+        self.cmds.currentTime(frame)
+        options = {"camera": self.camera} if self.camera else {}
+        self.cmds.arnoldRender(batch=True, **options)
+
+
+def renderChunk(scene, renderer, frames, camera=None, renderLayer=None):
+    """Render a FrameSet with one Render.exe per progression.
+
+    Returns the first non-zero exit code, else 0.
+    """
+    exitCode = 0
+    for first, last, step in frames.progressions:
+        args = [job_spec.MAYA_RENDER_EXE, "-r", renderer,
+                "-s", str(first), "-e", str(last), "-b", str(step)]
+        if renderLayer:
+            args += ["-rl", renderLayer]
+        if camera:
+            args += ["-cam", camera]
+        args.append(scene)
+        code = subprocess.call(args)
+        exitCode = exitCode or code
+    return exitCode
+
+
+def log(message):
+    print("render_task: {}".format(message), flush=True)
+
+
+def renderFrames(session, frames, retries=FRAME_RETRIES):
+    """Render frames one at a time; return {frame: (ok, seconds, attempts)}."""
+    results = {}
+    for frame in frames:
+        start = time.time()
+        for attempt in range(1, retries + 2):
+            try:
+                session.renderFrame(frame)
+            except Exception as e:
+                log("frame {} failed (attempt {}): {}".format(frame, attempt, e))
+                ok = False
+            else:
+                ok = True
+                break
+        seconds = time.time() - start
+        results[frame] = (ok, seconds, attempt)
+        log("frame {} {} in {:.1f}s{}".format(
+            frame, "done" if ok else "FAILED", seconds,
+            " after {} attempts".format(attempt) if attempt > 1 else ""
+        ))
+    return results
+
+
+def recordTimings(scene, loadSeconds, results):
+    """Record this task's timings for chunk sizing; never fails the task."""
+    frameSeconds = [seconds for ok, seconds, attempts in results.values() if ok and attempts == 1]
+    show = os.environ.get("CUE_SHOW")
+    if not show or not frameSeconds:
+        return
+    try:
+        chunk_sizing.recordTiming(
+            show, os.environ.get("CUE_SHOT", ""), os.environ.get("CUE_JOB", ""),
+            os.environ.get("CUE_LAYER", ""), scene, loadSeconds, frameSeconds
+        )
+    except OSError as e:
+        log("could not record timings: {}".format(e))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a chunk of frames in one Maya session")
+    parser.add_argument("--scene", required=True)
+    parser.add_argument("--frames", required=True, help="Frame spec, e.g. 1-10 or 1-17x4")
+    parser.add_argument("--renderer", default="arnold")
+    parser.add_argument("--camera")
+    parser.add_argument("--render-layer")
+    parser.add_argument("--retries", type=int, default=FRAME_RETRIES)
+    args = parser.parse_args()
+    try:
+        frameSet = frame_set.FrameSet.parse(args.frames)
+    except ValueError as e:
+        parser.error(str(e))
+
+    renderer = args.renderer
+    if job_spec.rendersInProcess(renderer):
+        loadStart = time.time()
+        session = MayaSession(args.scene, renderer, args.camera, args.render_layer)
+        loadSeconds = time.time() - loadStart
+        log("scene loaded in {:.1f}s".format(loadSeconds))
+        renderer = session.renderer
+    if not job_spec.rendersInProcess(renderer):
+        log("{} can't render in-process; rendering the chunk with Render.exe".format(renderer))
+        sys.exit(renderChunk(args.scene, renderer, frameSet, args.camera, args.render_layer))
+
+    frames = list(frameSet)
+    results = renderFrames(session, frames, args.retries)
+
+    failed = [frame for frame in frames if not results[frame][0]]
+    renderSeconds = sum(seconds for _, seconds, _ in results.values())
+    log("{}/{} frames done, load {:.1f}s, {:.1f}s per frame{}".format(
+        len(frames) - len(failed), len(frames), loadSeconds,
+        renderSeconds / len(frames) if frames else 0.0,
+        ", failed: {}".format(", ".join(str(frame) for frame in failed)) if failed else ""
+    ))
+    recordTimings(args.scene, loadSeconds, results)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
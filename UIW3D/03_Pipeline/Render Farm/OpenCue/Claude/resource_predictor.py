@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+#  Copyright Contributors to the OpenCue Project
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Per-layer memory requests predicted from the local job history.
+
+For a layer, predict() looks in job_history for past frames of the same
+service. It tries levels from most to least specific, and uses the first
+with at least MIN_SAMPLES frames:
+
+    the same scene and layer name, the same scene, the shot, the show
+
+The request is the MEMORY_PERCENTILE of peak RSS plus MEMORY_HEADROOM,
+rounded up to MEMORY_ROUND_MB. Frames that failed count too, since a frame
+killed for running out of memory shows the most it needed.
+
+Cores are not predicted. Cuebot's core time is the cores a frame reserved
+times its wall time, summed over retries, so it only repeats the previous
+request rather than measuring use. The layer keeps its cores request.
+
+With no history the layer sends no <memory> and Cuebot applies the
+service's own minimum. SERVICE_MEMORY mirrors services/setup_services.py so
+the UI can show it.
+
+Standard library only; reads the SQLite history without opencue.
+
+Usage:
+    python resource_predictor.py --service maya --show S [--shot X] [--scene F] [--layer L]
+"""
+
+import argparse
+import collections
+import math
+import time
+
+import job_history
+
+# Memory request: this percentile of peak RSS, plus headroom
+MEMORY_PERCENTILE = 0.95
+MEMORY_HEADROOM = 0.20
+MEMORY_ROUND_MB = 256
+
+# Frames needed before a level of history is trusted
+MIN_SAMPLES = 5
+
+# Only frames this recent count
+HISTORY_DAYS = 60
+
+# Service minimum memory (MB), as created by services/setup_services.py
+SERVICE_MEMORY = {
+    "maya2026": 8192,
+    "arnold": 16384,
+    "shell": 1024,
+}
+
+Prediction = collections.namedtuple("Prediction", "memory level samples reason")
+
+
+def roundMemory(mb):
+    return int(math.ceil(mb / float(MEMORY_ROUND_MB)) * MEMORY_ROUND_MB)
+
+
+def serviceDefault(service):
+    """Describe the service's own request, used when there's no history."""
+    memory = SERVICE_MEMORY.get(service)
+    if memory is None:
+        return "service {} default".format(service or "-")
+    return "service {} default ({:.0f} GB)".format(service, memory / 1024.0)
+
+
+def levels(show, shot, scene, layer):
+    """(name, filters) from most to least specific, skipping unknown keys."""
+    candidates = (
+        ("scene+layer", dict(show=show, scene=scene, layer=layer), scene and layer),
+        ("scene", dict(show=show, scene=scene), scene),
+        ("shot", dict(show=show, shot=shot), shot),
+        ("show", dict(show=show), show),
+    )
+    return [(name, filters) for name, filters, known in candidates if known]
+
+
+def predictFromFrames(frames, percentile=MEMORY_PERCENTILE, headroom=MEMORY_HEADROOM):
+    """Return (memory MB or None, reason) from history frames' peak RSS."""
+    rss = [frame["maxRss"] / 1024.0 for frame in frames if frame["maxRss"]]
+    if not rss:
+        return None, ""
+    peak = job_history.percentile(rss, percentile)
+    return roundMemory(peak * (1 + headroom)), "p{:.0f} peak {:.1f} GB +{:.0%}".format(
+        percentile * 100, peak / 1024.0, headroom
+    )
+
+
+def predict(history, service, show, shot=None, scene=None, layer=None,
+            percentile=MEMORY_PERCENTILE, headroom=MEMORY_HEADROOM, days=HISTORY_DAYS):
+    """Return a Prediction for a layer; memory is None to keep the service
+    default.
+    """
+    since = time.time() - days * 86400
+    for level, filters in levels(show, shot, scene, layer):
+        frames = history.frames(service=service, since=since, **filters)
+        if len(frames) < MIN_SAMPLES:
+            continue
+        memory, detail = predictFromFrames(frames, percentile, headroom)
+        if memory is None:
+            continue
+        reason = "{} history ({} frames): {}".format(level, len(frames), detail)
+        return Prediction(memory, level, len(frames), reason)
+    return Prediction(None, None, 0, "no history, " + serviceDefault(service))
+
+
+def formatPrediction(prediction):
+    if prediction.memory is None:
+        return prediction.reason
+    return "{:.1f} GB ({})".format(prediction.memory / 1024.0, prediction.reason)
+
+
+def applyPredictions(jobData, history=None):
+    """Set "memory" on every layer of job data from history.
+
+    Returns {layer name: Prediction}.
+    """
+    history = history or job_history.JobHistory()
+    predictions = {}
+    for layerData in jobData.get("layers", []):
+        services = layerData.get("services") or ["maya"]
+        prediction = predict(
+            history, services[0], jobData.get("show"), jobData.get("shot"),
+            layerData.get("cmd", {}).get("mayaFile"), layerData.get("name")
+        )
+        if prediction.memory is not None:
+            layerData["memory"] = prediction.memory
+        predictions[layerData.get("name")] = prediction
+    return predictions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Predict a layer's memory request")
+    parser.add_argument("--service", default="maya")
+    parser.add_argument("--show", required=True)
+    parser.add_argument("--shot")
+    parser.add_argument("--scene")
+    parser.add_argument("--layer")
+    parser.add_argument("--percentile", type=float, default=MEMORY_PERCENTILE)
+    parser.add_argument("--headroom", type=float, default=MEMORY_HEADROOM)
+    args = parser.parse_args()
+
+    prediction = predict(job_history.JobHistory(), args.service, args.show, args.shot,
+                         args.scene, args.layer, args.percentile, args.headroom)
+    print(formatPrediction(prediction))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+#  Copyright Contributors to the OpenCue Project
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Cached scene introspection for the Maya submitters.
+
+Listing cameras, render layers, render globals and workspace rules takes
+seconds on heavy lighting scenes, and both submitters used to do it every
+time they opened. SceneInfoCache keeps each of those sections for the
+current scene file and drops only the sections a Maya event says are stale
+(scriptJobs for scene, render layer, playback, workspace, render global and
+camera creation/rename events, plus DG callbacks for added and deleted
+cameras, cameras' renderable flag and render layer membership). After a
+scene is opened the cache refills at idle, so the submitter usually opens
+without touching the scene at all.
+
+Usage:
+    import scene_info
+    info = scene_info.getSceneInfo()
+    info["cameras"], info["renderLayers"], info["startFrame"], ...
+"""
+
+import copy
+import logging
+import os
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om
+
+log = logging.getLogger("OpenCueSubmit")
+
+SECTION_SCENE = "scene"
+SECTION_RENDER_GLOBALS = "renderGlobals"
+SECTION_PLAYBACK = "playback"
+SECTION_CAMERAS = "cameras"
+SECTION_RENDER_LAYERS = "renderLayers"
+SECTION_WORKSPACE = "workspace"
+
+# scriptJob events and the sections they make stale
+EVENT_SECTIONS = {
+    "SceneSaved": (SECTION_SCENE,),
+    # Camera layer membership is part of the cameras section.
+    "renderLayerChange": (SECTION_RENDER_LAYERS, SECTION_CAMERAS),
+    "renderLayerManagerChange": (SECTION_RENDER_LAYERS, SECTION_CAMERAS),
+    "playbackRangeChanged": (SECTION_PLAYBACK,),
+    "workspaceChanged": (SECTION_WORKSPACE,),
+    "DagObjectCreated": (SECTION_CAMERAS,),
+    "NameChanged": (SECTION_CAMERAS,),
+    # Undo/redo can bring back or remove anything without other events.
+    "Undo": None,
+    "Redo": None,
+}
+
+# Events after which the whole scene is different
+RESET_EVENTS = ("SceneOpened", "NewSceneOpened")
+
+# Render global attributes read into the renderGlobals section
+RENDER_GLOBAL_ATTRS = ("startFrame", "endFrame", "currentRenderer")
+
+# Nodes whose changes make the cameras section stale: camera shapes (only
+# their renderable flag), legacy render layers (members are connections)
+# and Render Setup collection selectors
+MEMBERSHIP_NODE_TYPES = ("camera", "renderLayer", "simpleSelector", "basicSelector")
+
+# Attribute messages that change a watched node
+NODE_CHANGES = (
+    om.MNodeMessage.kAttributeSet
+    | om.MNodeMessage.kConnectionMade
+    | om.MNodeMessage.kConnectionBroken
+)
+
+
+def querySceneFile():
+    sceneFile = cmds.file(query=True, sceneName=True)
+    return {
+        "sceneFile": sceneFile,
+        "sceneName": os.path.splitext(os.path.basename(sceneFile))[0],
+    }
+
+
+def queryRenderGlobals():
+    info = {"startFrame": None, "endFrame": None, "renderer": None}
+    try:
+        info["startFrame"] = int(cmds.getAttr("defaultRenderGlobals.startFrame"))
+        info["endFrame"] = int(cmds.getAttr("defaultRenderGlobals.endFrame"))
+        info["renderer"] = cmds.getAttr("defaultRenderGlobals.currentRenderer")
+    except Exception:
+        pass
+    return info
+
+
+def queryPlayback():
+    return {
+        "playbackStart": int(cmds.playbackOptions(query=True, animationStartTime=True)),
+        "playbackEnd": int(cmds.playbackOptions(query=True, animationEndTime=True)),
+    }
+
+
+def iterCameras():
+    """Yield (transformPath, transformName, renderable) for each camera.
+
+    One OpenMaya DAG pass reads every camera's parent and renderable plug
+    directly, instead of an ls/listRelatives/getAttr round trip through the
+    command layer per camera. Instanced cameras are reported once per path.
+    """
+    it = om.MItDag(om.MItDag.kDepthFirst, om.MFn.kCamera)
+    while not it.isDone():
+        path = it.getPath()
+        renderable = om.MFnDagNode(path).findPlug("renderable", False).asBool()
+        path.pop()
+        yield path.fullPathName(), path.partialPathName(), renderable
+        it.next()
+
+
+def queryLayerMembers(layers):
+    """Return {layer: set of member long names} with one query per layer."""
+    members = {}
+    for layer in layers:
+        members[layer] = set(
+            cmds.editRenderLayerMembers(layer, query=True, fullNames=True) or []
+        )
+    return members
+
+
+def isLayerMember(fullPath, members):
+    """True if a DAG path or any of its parents is in a layer's members."""
+    parts = fullPath.split("|")
+    return any("|".join(parts[:i]) in members for i in range(2, len(parts) + 1))
+
+
+def queryCameras(layers=None):
+    """Return camera transforms, renderable ones and layer membership in one sweep.
+
+    cameraLayers maps each camera transform to the non-default render
+    layers it belongs to (directly or through a parent group).
+    """
+    if layers is None:
+        layers = queryRenderLayers()["renderLayers"]
+    members = queryLayerMembers(layers)
+
+    cameras = []
+    renderable = []
+    cameraLayers = {}
+    for fullPath, transform, isRenderable in iterCameras():
+        if transform in cameraLayers:
+            continue
+        cameras.append(transform)
+        if isRenderable:
+            renderable.append(transform)
+        cameraLayers[transform] = [
+            layer for layer in layers if isLayerMember(fullPath, members[layer])
+        ]
+    return {
+        "cameras": cameras,
+        "renderableCameras": renderable,
+        "cameraLayers": cameraLayers,
+    }
+
+
+def queryRenderLayers():
+    layers = cmds.ls(type="renderLayer") or []
+    return {
+        "renderLayers": [l for l in layers if not l.startswith("defaultRenderLayer")],
+    }
+
+
+def queryWorkspace():
+    outputPath = ""
+    try:
+        outputPath = cmds.workspace(fileRuleEntry="images")
+        workspace = cmds.workspace(query=True, rootDirectory=True)
+        outputPath = os.path.join(workspace, outputPath)
+    except Exception:
+        pass
+    return {"outputPath": outputPath}
+
+
+SECTION_QUERIES = (
+    (SECTION_SCENE, querySceneFile),
+    (SECTION_RENDER_GLOBALS, queryRenderGlobals),
+    (SECTION_PLAYBACK, queryPlayback),
+    (SECTION_CAMERAS, queryCameras),
+    (SECTION_RENDER_LAYERS, queryRenderLayers),
+    (SECTION_WORKSPACE, queryWorkspace),
+)
+
+
+class SceneInfoCache(object):
+    """Per-section cache of scene information, invalidated by Maya events.
+
+    Sections are only queried when missing, and the whole cache is dropped
+    whenever the scene file path differs from the one it was filled for.
+    """
+
+    def __init__(self):
+        self.sections = {}
+        self.scenePath = None
+        self.jobs = []
+        self.callbacks = []
+        # Per-node callbacks, redone for every scene
+        self.nodeCallbacks = []
+
+    def install(self):
+        """Register the scriptJobs and callbacks that keep the cache fresh."""
+        if self.jobs:
+            return
+        for event, sections in EVENT_SECTIONS.items():
+            self.jobs.append(cmds.scriptJob(
+                event=[event, lambda sections=sections: self.invalidate(sections)]
+            ))
+        for event in RESET_EVENTS:
+            self.jobs.append(cmds.scriptJob(event=[event, self.reset]))
+        self.watchRenderGlobals()
+        for nodeType in MEMBERSHIP_NODE_TYPES:
+            try:
+                self.callbacks.append(om.MDGMessage.addNodeAddedCallback(
+                    self.nodeAdded, nodeType
+                ))
+                self.callbacks.append(om.MDGMessage.addNodeRemovedCallback(
+                    lambda node, clientData: self.invalidate((SECTION_CAMERAS,)), nodeType
+                ))
+            except RuntimeError:
+                pass  # Render Setup type not registered in this session
+        self.watchNodes()
+
+    def watchNodes(self):
+        """Watch the open scene's cameras, render layers and selectors."""
+        self.removeNodeCallbacks()
+        for nodeType in MEMBERSHIP_NODE_TYPES:
+            try:
+                nodes = cmds.ls(type=nodeType) or []
+            except RuntimeError:
+                continue
+            selection = om.MSelectionList()
+            for node in nodes:
+                selection.add(node)
+            for i in range(selection.length()):
+                self.watchNode(selection.getDependNode(i))
+
+    def nodeAdded(self, node, clientData=None):
+        self.invalidate((SECTION_CAMERAS,))
+        self.watchNode(node)
+
+    def watchNode(self, node):
+        """Drop the cameras section when node changes what it reports."""
+        isCamera = node.hasFn(om.MFn.kCamera)
+
+        def changed(message, plug, otherPlug, clientData):
+            if not message & NODE_CHANGES:
+                return
+            if isCamera and om.MFnAttribute(plug.attribute()).name != "renderable":
+                return
+            self.invalidate((SECTION_CAMERAS,))
+
+        self.nodeCallbacks.append(om.MNodeMessage.addAttributeChangedCallback(node, changed))
+
+    def removeNodeCallbacks(self):
+        for callback in self.nodeCallbacks:
+            try:
+                om.MMessage.removeCallback(callback)
+            except RuntimeError:
+                pass  # Its node is already gone
+        self.nodeCallbacks = []
+
+    def watchRenderGlobals(self):
+        # Attribute jobs die with their node, so they are recreated for
+        # every scene's defaultRenderGlobals.
+        for attr in RENDER_GLOBAL_ATTRS:
+            self.jobs.append(cmds.scriptJob(
+                attributeChange=[
+                    "defaultRenderGlobals.{}".format(attr),
+                    lambda: self.invalidate((SECTION_RENDER_GLOBALS,)),
+                ],
+                killWithScene=True,
+            ))
+
+    def uninstall(self):
+        for job in self.jobs:
+            if cmds.scriptJob(exists=job):
+                cmds.scriptJob(kill=job, force=True)
+        for callback in self.callbacks:
+            om.MMessage.removeCallback(callback)
+        self.removeNodeCallbacks()
+        self.jobs = []
+        self.callbacks = []
+        self.invalidate()
+
+    def invalidate(self, sections=None):
+        """Drop the given sections, or everything if sections is None."""
+        if sections is None:
+            self.sections.clear()
+            return
+        for section in sections:
+            self.sections.pop(section, None)
+
+    def reset(self):
+        """A different scene is open: drop everything and refill at idle."""
+        self.invalidate()
+        self.jobs = [job for job in self.jobs if cmds.scriptJob(exists=job)]
+        self.watchRenderGlobals()
+        self.watchNodes()
+        cmds.evalDeferred(self.warm, lowestPriority=True)
+
+    def warm(self):
+        try:
+            self.get()
+        except Exception as e:
+            log.debug("Could not prefetch scene info: %s", e)
+
+    def get(self, refresh=False):
+        """Return the scene info dict, querying only stale sections."""
+        scenePath = cmds.file(query=True, sceneName=True)
+        if refresh or scenePath != self.scenePath:
+            self.invalidate()
+            self.scenePath = scenePath
+
+        info = {}
+        for section, query in SECTION_QUERIES:
+            if section not in self.sections:
+                self.sections[section] = query()
+            info.update(self.sections[section])
+        return info
+
+
+CACHE = SceneInfoCache()
+
+
+def getSceneInfo(refresh=False):
+    """Return cached information about the open scene.
+
+    Keys: sceneFile, sceneName, startFrame, endFrame and renderer (render
+    globals), playbackStart, playbackEnd, cameras (all camera transforms),
+    renderableCameras, cameraLayers ({camera: [layers]}), renderLayers
+    (excluding the default layer) and outputPath. Pass refresh=True to
+    requery everything.
+    """
+    CACHE.install()
+    # Copy so callers can't edit the cached sections.
+    return copy.deepcopy(CACHE.get(refresh))
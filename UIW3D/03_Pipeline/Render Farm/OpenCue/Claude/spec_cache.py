@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+#  Copyright Contributors to the OpenCue Project
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Content-hashed cache of compiled job specs.
+
+Artists resubmit the same scene with the same settings many times a day.
+Specs are keyed by a canonical hash of the job data (plus the job_spec
+source, so editing the builder invalidates everything) and kept in memory
+and on disk with size- and age-based eviction. A hit skips spec generation
+and validation entirely.
+
+Usage:
+    python spec_cache.py stats
+    python spec_cache.py list
+    python spec_cache.py show <hash-prefix>
+    python spec_cache.py prune
+    python spec_cache.py clear
+"""
+
+import argparse
+import collections
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import job_spec
+import path_mapping
+
+CACHE_DIR = os.path.join(
+    os.environ.get("LOCALAPPDATA", tempfile.gettempdir()), "OpenCueSubmit", "spec_cache"
+)
+
+# Eviction limits for the on-disk cache
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+MAX_CACHE_AGE = 7 * 24 * 3600
+
+# Specs kept in memory by a long-running process (the submit daemon)
+MEMORY_ENTRIES = 256
+
+# Minimum seconds between directory scans for eviction, so a 500-job batch
+# doesn't rescan the cache on every put.
+PRUNE_INTERVAL = 60
+
+# Job data keys that don't affect the spec and must not split the cache
+VOLATILE_KEYS = ("launchMode",)
+
+SPEC_SUFFIX = ".xml"
+
+
+def sourceDigest():
+    """Hash of job_spec's code.
+
+    The source is read through the module's loader. The zipapp imports
+    job_spec from bytecode but bundles the source next to it, so the worker
+    there computes the same version as Maya does from the source tree.
+    """
+    try:
+        source = os.path.splitext(job_spec.__file__)[0] + ".py"
+        data = job_spec.__spec__.loader.get_data(source)
+    except (AttributeError, OSError):
+        data = job_spec.MAYA_RENDER_EXE.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+JOB_SPEC_DIGEST = sourceDigest()
+
+
+def builderVersion():
+    """Hash of job_spec's code and the current path mapping rules, so
+    changing either invalidates specs, also in a running daemon.
+    """
+    digest = hashlib.sha256(JOB_SPEC_DIGEST.encode("ascii"))
+    digest.update(path_mapping.forShow().fingerprint().encode("ascii"))
+    return digest.hexdigest()[:16]
+
+
+def canonicalHash(jobData):
+    """Return the cache key for job data.
+
+    Dict ordering and whitespace don't matter; VOLATILE_KEYS are ignored.
+    """
+    stable = dict((k, v) for k, v in jobData.items() if k not in VOLATILE_KEYS)
+    canonical = json.dumps(stable, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    digest = hashlib.sha256(builderVersion().encode("ascii"))
+    digest.update(canonical.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SpecCache(object):
+    """Two-level (memory LRU + disk) cache of compiled job specs."""
+
+    def __init__(self, cacheDir=CACHE_DIR, maxBytes=MAX_CACHE_BYTES,
+                 maxAge=MAX_CACHE_AGE, memoryEntries=MEMORY_ENTRIES):
+        self.cacheDir = cacheDir
+        self.maxBytes = maxBytes
+        self.maxAge = maxAge
+        self.memoryEntries = memoryEntries
+        self.memory = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.lastPrune = 0
+
+    def path(self, key):
+        return os.path.join(self.cacheDir, key + SPEC_SUFFIX)
+
+    def remember(self, key, spec):
+        with self.lock:
+            self.memory[key] = spec
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.memoryEntries:
+                self.memory.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached spec for a key, or None."""
+        with self.lock:
+            spec = self.memory.get(key)
+            if spec is not None:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return spec
+
+        path = self.path(key)
+        spec = None
+        try:
+            if time.time() - os.path.getmtime(path) > self.maxAge:
+                os.unlink(path)
+            else:
+                with open(path, "r", encoding="utf-8") as f:
+                    spec = f.read()
+                # Touch so size-based eviction drops the least recently used.
+                os.utime(path, None)
+        except OSError:
+            spec = None
+
+        with self.lock:
+            if spec is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self.remember(key, spec)
+        return spec
+
+    def put(self, key, spec):
+        """Store a spec atomically and evict old entries if over budget."""
+        self.remember(key, spec)
+        try:
+            os.makedirs(self.cacheDir, exist_ok=True)
+            fd, tmpPath = tempfile.mkstemp(dir=self.cacheDir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(spec)
+            os.replace(tmpPath, self.path(key))
+        except OSError:
+            # The cache is an optimisation; never fail a submit over it.
+            return
+        if time.time() - self.lastPrune > PRUNE_INTERVAL:
+            self.prune()
+
+    def entries(self):
+        """Return (key, size, mtime) for every spec on disk, oldest first."""
+        entries = []
+        try:
+            names = os.listdir(self.cacheDir)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith(SPEC_SUFFIX):
+                continue
+            try:
+                st = os.stat(os.path.join(self.cacheDir, name))
+            except OSError:
+                continue
+            entries.append((name[:-len(SPEC_SUFFIX)], st.st_size, st.st_mtime))
+        entries.sort(key=lambda entry: entry[2])
+        return entries
+
+    def prune(self):
+        """Drop expired specs, then the least recently used until under budget."""
+        now = self.lastPrune = time.time()
+        removed = 0
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for key, size, mtime in entries:
+            if now - mtime <= self.maxAge and total <= self.maxBytes:
+                continue
+            try:
+                os.unlink(self.path(key))
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+        removed = 0
+        for key, _, _ in self.entries():
+            try:
+                os.unlink(self.path(key))
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+
+def compileSpec(jobData, cache=None):
+    """Return (spec, cached) for job data, building and caching on a miss."""
+    if cache is None:
+        return job_spec.buildJobSpec(jobData), False
+    key = canonicalHash(jobData)
+    spec = cache.get(key)
+    if spec is not None:
+        return spec, True
+    spec = job_spec.buildJobSpec(jobData)
+    cache.put(key, spec)
+    return spec, False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the compiled job spec cache")
+    parser.add_argument("command", choices=["stats", "list", "show", "prune", "clear"])
+    parser.add_argument("key", nargs="?", help="Hash (or unique prefix) for 'show'")
+    args = parser.parse_args()
+
+    cache = SpecCache()
+    if args.command == "stats":
+        entries = cache.entries()
+        total = sum(size for _, size, _ in entries)
+        print("Cache dir:  {}".format(cache.cacheDir))
+        print("Entries:    {}".format(len(entries)))
+        print("Size:       {:.1f} KiB of {:.0f} MiB".format(total / 1024.0, cache.maxBytes / 2.0 ** 20))
+        print("Max age:    {:.0f} days".format(cache.maxAge / 86400.0))
+        print("Builder:    {}".format(builderVersion()))
+    elif args.command == "list":
+        for key, size, mtime in reversed(cache.entries()):
+            print("{}  {:>8} B  {}".format(
+                key, size, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(mtime))
+            ))
+    elif args.command == "show":
+        matches = [key for key, _, _ in cache.entries() if key.startswith(args.key or "")]
+        if len(matches) != 1:
+            print("{} entries match {!r}".format(len(matches), args.key), file=sys.stderr)
+            sys.exit(1)
+        with open(cache.path(matches[0]), "r", encoding="utf-8") as f:
+            print(f.read())
+    elif args.command == "prune":
+        print("Removed {} entries".format(cache.prune()))
+    elif args.command == "clear":
+        print("Removed {} entries".format(cache.clear()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+#  Copyright Contributors to the OpenCue Project
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Profile the submit worker's cold start.
+
+Starts fresh interpreters the way maya_submit.py does and reports where the
+time goes before a submit can happen: bare interpreter start, importing the
+worker, importing opencue, pointing the channel at Cuebot, and building a
+spec. The opencue import runs under -X importtime and the slowest modules
+are listed, so regressions in the dependency tree show up by name. Run it
+with the worker's Python (Python 3.9).
+
+Usage:
+    python startup_profile.py [--worker dist/maya_submit_worker.pyz]
+        [--cuebot host:port] [--job-data job.json] [--runs N] [--top N] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Runs inside the profiled interpreter; prints one JSON document of phase
+# durations in milliseconds.
+PROBE_SOURCE = """
+import json, sys, time
+start = time.perf_counter()
+phases = []
+def mark(name):
+    global start
+    now = time.perf_counter()
+    phases.append((name, (now - start) * 1000.0))
+    start = now
+sys.path.insert(0, {worker!r})
+import maya_submit_worker as worker
+mark("import worker")
+worker.importOpencue()
+mark("import opencue")
+if {cuebotHost!r}:
+    worker.Cuebot.setHosts([{cuebotHost!r}])
+    mark("set hosts")
+if {jobDataFile!r}:
+    with open({jobDataFile!r}, "r", encoding="utf-8") as f:
+        worker.buildJobSpec(json.load(f))
+    mark("build spec")
+print(json.dumps(phases))
+"""
+
+
+def timeProcess(args):
+    """Run a process to completion and return (milliseconds, stdout, stderr)."""
+    start = time.perf_counter()
+    proc = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True)
+    elapsed = (time.perf_counter() - start) * 1000.0
+    if proc.returncode != 0:
+        raise RuntimeError("{} failed:\n{}".format(args[0], proc.stderr))
+    return elapsed, proc.stdout, proc.stderr
+
+
+def parseImportTime(stderr):
+    """Return (module, selfMs, cumulativeMs, depth) from -X importtime output."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # column header
+        name = fields[2].rstrip()
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped) - 1) // 2
+        imports.append((stripped, int(fields[0]) / 1000.0, int(fields[1]) / 1000.0, depth))
+    return imports
+
+
+def profile(python, worker, cuebotHost=None, jobDataFile=None, runs=5):
+    """Profile cold starts and return a report dict (times in ms)."""
+    bare = [timeProcess([python, "-c", "pass"])[0] for _ in range(runs)]
+
+    source = PROBE_SOURCE.format(
+        worker=os.path.abspath(worker),
+        cuebotHost=cuebotHost or "",
+        jobDataFile=os.path.abspath(jobDataFile) if jobDataFile else "",
+    )
+    totals = []
+    phaseRuns = {}
+    imports = []
+    for _ in range(runs):
+        elapsed, stdout, stderr = timeProcess([python, "-X", "importtime", "-c", source])
+        totals.append(elapsed)
+        for name, ms in json.loads(stdout.strip().splitlines()[-1]):
+            phaseRuns.setdefault(name, []).append(ms)
+        # Later runs have warm OS file caches, like a second submit would.
+        imports = parseImportTime(stderr)
+
+    return {
+        "python": python,
+        "worker": worker,
+        "runs": runs,
+        "interpreter": statistics.median(bare),
+        "total": statistics.median(totals),
+        "phases": [(name, statistics.median(ms)) for name, ms in phaseRuns.items()],
+        "imports": imports,
+    }
+
+
+def printReport(report, top):
+    print("Worker:       {}".format(report["worker"]))
+    print("Python:       {}".format(report["python"]))
+    print("Median of {} runs (ms; -X importtime inflates import phases slightly)".format(
+        report["runs"]
+    ))
+    print("  {:<24}{:>10.1f}".format("interpreter start", report["interpreter"]))
+    for name, ms in report["phases"]:
+        print("  {:<24}{:>10.1f}".format(name, ms))
+    print("  {:<24}{:>10.1f}".format("total process", report["total"]))
+
+    imports = report["imports"]
+    print("\nSlowest top-level imports (cumulative ms):")
+    topLevel = sorted((i for i in imports if i[3] == 0), key=lambda i: -i[2])
+    for name, _, cumulative, _ in topLevel[:top]:
+        print("  {:>9.1f}  {}".format(cumulative, name))
+    print("\nSlowest modules by own time (ms):")
+    for name, own, _, _ in sorted(imports, key=lambda i: -i[1])[:top]:
+        print("  {:>9.1f}  {}".format(own, name))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile submit worker cold start")
+    parser.add_argument("--python", default=sys.executable,
+                        help="Interpreter to profile (default: this one)")
+    parser.add_argument("--worker", default=HERE,
+                        help="Worker source directory or built .pyz (default: {})".format(HERE))
+    parser.add_argument("--cuebot", help="Also time Cuebot.setHosts for this host:port")
+    parser.add_argument("--job-data", help="Also time building a spec for this job data")
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts to measure")
+    parser.add_argument("--top", type=int, default=15, help="Imports to list")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = profile(args.python, args.worker, args.cuebot, args.job_data, max(1, args.runs))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        printReport(report, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+#!/usr/bin/env python
+#  Copyright Contributors to the OpenCue Project
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Persistent OpenCue submission daemon for Maya 2026.
+
+The one-shot worker pays for a Python 3.9 cold start, the opencue/gRPC
+imports and a fresh Cuebot channel on every submit. This daemon keeps all
+of that warm and accepts submit requests from Maya over a local
+multiprocessing connection (a named pipe on Windows, a Unix socket
+elsewhere).
+
+Requests and replies are JSON documents:
+
+    {"op": "ping"}
+    {"op": "submit", "jobData": {...}, "cuebotHost": "host1:8443,host2:8443",
+     "progress": true, "requestId": "..."}
+    {"op": "cancel", "requestId": "..."}
+    {"op": "idleCores", "cuebotHost": "host1:8443"}
+    {"op": "progress", "jobs": [{"name": ..., "id": ...}], "since": {name: serial},
+     "cuebotHost": "host1:8443"}
+    {"op": "shutdown"}
+
+With "progress" set, the daemon sends {"event": ...} documents for each
+submission stage before the final reply on the same connection. A cancel
+stops the submit with that requestId if its launch RPC hasn't been sent yet.
+
+Submits go through the local outbox; if Cuebot is unreachable the reply has
+"queued": true and the daemon's flusher keeps retrying in the background.
+
+The client half of this module only uses the standard library so it can be
+imported from Maya's Python 3.11; the opencue imports happen in serve().
+
+Usage:
+    python submit_daemon.py [cuebot_host[,cuebot_host...]]
+"""
+
+import getpass
+import json
+import os
+import secrets
+import subprocess
+import sys
+import tempfile
+import threading
+import traceback
+import uuid
+from multiprocessing.connection import Client, Listener
+
+DEFAULT_CUEBOT_HOST = "10.40.14.25:8443"
+
+# Per-user address and auth key so artists sharing a workstation never
+# submit through each other's daemon.
+DAEMON_NAME = "opencue_submit_{}".format(getpass.getuser())
+DAEMON_STATE_DIR = os.path.join(
+    os.environ.get("LOCALAPPDATA", tempfile.gettempdir()), "OpenCueSubmit"
+)
+DAEMON_KEY_FILE = os.path.join(DAEMON_STATE_DIR, "daemon.key")
+
+
+def getAddress():
+    """Return the connection address and family for this platform."""
+    if sys.platform == "win32":
+        return r"\\.\pipe\{}".format(DAEMON_NAME), "AF_PIPE"
+    return os.path.join(tempfile.gettempdir(), DAEMON_NAME + ".sock"), "AF_UNIX"
+
+
+def readAuthKey():
+    """Return the daemon auth key, or None if no daemon has been started."""
+    try:
+        with open(DAEMON_KEY_FILE, "rb") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def writeAuthKey():
+    """Create a fresh auth key for a starting daemon."""
+    os.makedirs(DAEMON_STATE_DIR, exist_ok=True)
+    key = secrets.token_hex(16).encode("ascii")
+    with open(DAEMON_KEY_FILE, "wb") as f:
+        f.write(key)
+    return key
+
+
+# =============================================================================
+# Client (Maya side, standard library only)
+# =============================================================================
+
+def request(message, onEvent=None, cancelEvent=None):
+    """Send one request to the daemon and return its reply.
+
+    Event documents received before the reply are passed to onEvent. If
+    cancelEvent is set while waiting, a cancel for the message's requestId
+    is sent, the connection is dropped and a cancelled reply is returned.
+
+    Returns None if the daemon is not running, so callers can fall back to
+    the one-shot worker. Once the request has been sent it may already be
+    running, so a lost connection returns an error reply with "unknown"
+    set instead.
+    """
+    authKey = readAuthKey()
+    if authKey is None:
+        return None
+
+    address, family = getAddress()
+    try:
+        conn = Client(address, family=family, authkey=authKey)
+    except (OSError, EOFError):
+        return None
+
+    try:
+        conn.send_bytes(json.dumps(message).encode("utf-8"))
+        while True:
+            if cancelEvent is not None and cancelEvent.is_set():
+                if message.get("requestId"):
+                    request({"op": "cancel", "requestId": message["requestId"]})
+                return {
+                    "ok": False,
+                    "cancelled": True,
+                    "error": "Submission cancelled; it may still be submitted "
+                             "if it had already reached Cuebot",
+                }
+            if not conn.poll(0.1):
+                continue
+            reply = json.loads(conn.recv_bytes().decode("utf-8"))
+            if "event" not in reply:
+                return reply
+            if onEvent is not None:
+                onEvent(reply)
+    except (OSError, EOFError) as e:
+        return {
+            "ok": False,
+            "unknown": True,
+            "error": "Lost the submit daemon mid-request ({}); check CueGUI before "
+                     "submitting again".format(e),
+        }
+    finally:
+        conn.close()
+
+
+def isRunning():
+    """Return True if a daemon answers a ping."""
+    reply = request({"op": "ping"})
+    return bool(reply and reply.get("ok"))
+
+
+def submit(jobData, cuebotHost, onEvent=None, cancelEvent=None):
+    """Submit job data through the daemon, or return None if it's not running."""
+    message = {
+        "op": "submit",
+        "jobData": jobData,
+        "cuebotHost": cuebotHost,
+        "progress": onEvent is not None,
+        "requestId": uuid.uuid4().hex,
+    }
+    return request(message, onEvent, cancelEvent)
+
+
+def idleCores(cuebotHost):
+    """Return the farm's idle cores via the daemon, or None if unavailable."""
+    reply = request({"op": "idleCores", "cuebotHost": cuebotHost})
+    if not reply or not reply.get("ok"):
+        return None
+    return reply["idleCores"]
+
+
+def jobProgress(jobs, since, cuebotHost):
+    """Return frame progress summaries (see job_monitor) via the daemon.
+
+    Returns None if the daemon is not running or the poll failed.
+    """
+    reply = request({"op": "progress", "jobs": jobs, "since": since,
+                     "cuebotHost": cuebotHost})
+    if not reply or not reply.get("ok"):
+        return None
+    return reply["jobs"]
+
+
+def startDaemon(pythonPath, cuebotHost):
+    """Launch a detached daemon process for subsequent submits."""
+    script = os.path.abspath(__file__)
+    kwargs = {}
+    if sys.platform == "win32":
+        kwargs["creationflags"] = (
+            subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        )
+    else:
+        kwargs["start_new_session"] = True
+    return subprocess.Popen(
+        [pythonPath, script, cuebotHost],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        close_fds=True,
+        **kwargs
+    )
+
+
+# =============================================================================
+# Server (Python 3.9 side)
+# =============================================================================
+
+class SubmissionCancelled(Exception):
+    """A client cancelled the submit before its launch RPC was sent."""
+
+
+class SubmitDaemon(object):
+    """Accepts submit requests and runs them against a warm Cuebot channel."""
+
+    def __init__(self, cuebotHost):
+        # Deferred so the client helpers above never pull in opencue.
+        import maya_submit_worker
+
+        maya_submit_worker.importOpencue()
+        self.worker = maya_submit_worker
+        self.cuebotHost = None
+        self.hostLock = threading.Lock()
+        self.running = True
+        # requestId -> Event for submits in progress
+        self.cancels = {}
+        self.cancelLock = threading.Lock()
+        self.setHost(cuebotHost)
+
+    def setHost(self, cuebotHost, onEvent=None):
+        """Point the shared Cuebot channel at a host list if it changed."""
+        with self.hostLock:
+            if cuebotHost and cuebotHost != self.cuebotHost:
+                self.worker.useHosts(cuebotHost, onEvent or self.worker.ignoreEvent)
+                self.cuebotHost = cuebotHost
+
+    def handle(self, message, onEvent):
+        """Dispatch one request and return the reply document."""
+        op = message.get("op")
+        if op == "ping":
+            return {
+                "ok": True,
+                "cuebotHost": self.cuebotHost,
+                "host": self.worker.HOSTS.current(),
+                "pid": os.getpid(),
+            }
+        if op == "shutdown":
+            self.running = False
+            return {"ok": True}
+        if op == "cancel":
+            with self.cancelLock:
+                cancelled = self.cancels.get(message.get("requestId"))
+            if cancelled is not None:
+                cancelled.set()
+            return {"ok": True, "found": cancelled is not None}
+        if op == "idleCores":
+            self.setHost(message.get("cuebotHost"))
+            return {"ok": True, "idleCores": self.worker.farmIdleCores()}
+        if op == "progress":
+            self.setHost(message.get("cuebotHost"))
+            return {
+                "ok": True,
+                "jobs": self.worker.jobProgress(message["jobs"], message.get("since")),
+            }
+        if op == "submit":
+            return self.submit(message, onEvent)
+        return {"ok": False, "error": "Unknown op: {}".format(op)}
+
+    def submit(self, message, onEvent):
+        """Run one submit, stopping before its launch RPC if it's cancelled."""
+        requestId = message.get("requestId") or uuid.uuid4().hex
+        cancelled = threading.Event()
+        with self.cancelLock:
+            self.cancels[requestId] = cancelled
+        sent = threading.Event()
+
+        def checkCancelled(event, **fields):
+            # Once the launch RPC is out, Cuebot may have the job; finish.
+            if cancelled.is_set() and not sent.is_set():
+                raise SubmissionCancelled("Submission cancelled")
+            if event == "rpc_sent":
+                sent.set()
+            onEvent(event, **fields)
+
+        timer = self.worker.StageTimer(checkCancelled)
+        try:
+            try:
+                self.setHost(message.get("cuebotHost"), timer)
+                results = self.worker.submitDurably(message["jobData"], timer)
+            except SubmissionCancelled as e:
+                # Before the RPC; submitDurably marked the outbox record failed.
+                return {"ok": False, "cancelled": True, "error": str(e),
+                        "timings": timer.timings}
+            except self.worker.SubmissionQueued as e:
+                return {
+                    "ok": False,
+                    "queued": True,
+                    "key": e.key,
+                    "error": str(e),
+                    "timings": timer.timings,
+                }
+        finally:
+            with self.cancelLock:
+                self.cancels.pop(requestId, None)
+        timer.mark("done")
+        return {
+            "ok": True,
+            "jobs": results,
+            "text": self.worker.formatJobs(results),
+            "timings": timer.timings,
+        }
+
+    def reply(self, conn, message):
+        """Handle a request and send the reply on its connection."""
+        disconnected = threading.Event()
+
+        def sendEvent(event, **fields):
+            # A client that went away stops the stream, never the submit.
+            if disconnected.is_set():
+                return
+            fields["event"] = event
+            try:
+                conn.send_bytes(json.dumps(fields).encode("utf-8"))
+            except (OSError, EOFError):
+                disconnected.set()
+
+        onEvent = sendEvent if message.get("progress") else self.worker.ignoreEvent
+        try:
+            try:
+                reply = self.handle(message, onEvent)
+            except Exception as e:
+                reply = {
+                    "ok": False,
+                    "error": "Submission error: {}".format(e),
+                    "traceback": traceback.format_exc(),
+                }
+            conn.send_bytes(json.dumps(reply).encode("utf-8"))
+        except (OSError, EOFError):
+            pass
+        finally:
+            conn.close()
+
+    def serve(self, listener):
+        """Accept connections until a shutdown request arrives.
+
+        Submits, farm queries and progress polls run on their own thread so
+        a slow Cuebot never blocks pings or other submits; everything else
+        is answered inline.
+        """
+        while self.running:
+            try:
+                conn = listener.accept()
+            except (OSError, EOFError):
+                # Failed handshake; keep serving.
+                continue
+            try:
+                message = json.loads(conn.recv_bytes().decode("utf-8"))
+                if not isinstance(message, dict):
+                    raise ValueError("request is not a JSON object")
+            except (OSError, EOFError, ValueError):
+                # Dropped or garbage request; keep serving.
+                conn.close()
+                continue
+            if message.get("op") in ("submit", "idleCores", "progress"):
+                thread = threading.Thread(target=self.reply, args=(conn, message))
+                thread.daemon = True
+                thread.start()
+            else:
+                self.reply(conn, message)
+
+
+def serve(cuebotHost):
+    """Run the daemon in the foreground."""
+    if isRunning():
+        print("Submit daemon already running", file=sys.stderr)
+        return 1
+
+    address, family = getAddress()
+    if family == "AF_UNIX" and os.path.exists(address):
+        os.unlink(address)
+
+    daemon = SubmitDaemon(cuebotHost)
+    authKey = writeAuthKey()
+    listener = Listener(address, family=family, authkey=authKey)
+    print("Submit daemon listening on {} (Cuebot {})".format(address, cuebotHost))
+
+    # Retry anything a previous submit (here or in a one-shot worker) queued.
+    worker = daemon.worker
+    flusher = None
+    if worker.OUTBOX is not None:
+        flusher = worker.OutboxFlusher(worker.OUTBOX, onEvent=worker.emitEvent)
+        flusher.start()
+    # Keep the local job history current for chunk sizing and resources.
+    syncer = None
+    if worker.HISTORY is not None:
+        syncer = worker.HistorySyncer(worker.HISTORY, onEvent=worker.emitEvent)
+        syncer.start()
+    try:
+        daemon.serve(listener)
+    finally:
+        if flusher is not None:
+            flusher.stop()
+        if syncer is not None:
+            syncer.stop()
+        listener.close()
+    return 0
+
+
+def main():
+    cuebotHost = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CUEBOT_HOST
+    sys.exit(serve(cuebotHost))
+
+
+if __name__ == "__main__":
+    main()
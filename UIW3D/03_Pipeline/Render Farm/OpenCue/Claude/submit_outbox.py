@@ -0,0 +1,304 @@
+#!/usr/bin/env python
+#  Copyright Contributors to the OpenCue Project
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Durable local outbox for job submissions.
+
+Every interactive submit is recorded in a SQLite database before it is sent
+to Cuebot, keyed by the canonical hash of its job data. If Cuebot can't be
+reached the record stays pending and the submit daemon's flusher retries it
+with exponential backoff, checking Cuebot for the job first so a request
+that did get through is never launched twice. Submitting identical job data
+while a record is still pending is a no-op.
+
+Standard library only; the flusher itself lives in maya_submit_worker.
+
+Usage:
+    python submit_outbox.py list [--all]
+    python submit_outbox.py show <key-prefix>
+    python submit_outbox.py retry <key-prefix>
+    python submit_outbox.py drop <key-prefix>
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import spec_cache
+
+OUTBOX_FILE = os.path.join(
+    os.environ.get("LOCALAPPDATA", tempfile.gettempdir()), "OpenCueSubmit", "outbox.db"
+)
+
+STATUS_PENDING = "pending"
+STATUS_SUBMITTED = "submitted"
+STATUS_FAILED = "failed"
+
+# Retry backoff (seconds): RETRY_BASE doubling per attempt, capped at RETRY_MAX
+RETRY_BASE = 5
+RETRY_MAX = 300
+
+# Pending submissions older than this are given up on and marked failed
+MAX_AGE = 24 * 3600
+
+# How long an attempt in progress owns its record before the flusher may
+# assume the submitting process died; longer than a launchSpecAndWait.
+LEASE = 600
+
+# Submitted and failed records are kept this long for `list --all`
+KEEP_DONE = 7 * 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    key TEXT PRIMARY KEY,
+    jobName TEXT,
+    jobData TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    nextAttempt REAL NOT NULL,
+    lastError TEXT,
+    jobs TEXT
+)
+"""
+
+COLUMNS = ("key", "jobName", "jobData", "status", "attempts", "created",
+           "updated", "nextAttempt", "lastError", "jobs")
+
+
+def backoff(attempts):
+    """Seconds to wait before retry number `attempts`."""
+    return min(RETRY_MAX, RETRY_BASE * 2 ** max(0, attempts - 1))
+
+
+class Outbox(object):
+    """SQLite-backed queue of submissions awaiting Cuebot.
+
+    Each call opens its own connection, so one Outbox can be shared by the
+    daemon's request threads and its flusher.
+    """
+
+    def __init__(self, path=OUTBOX_FILE):
+        self.path = path
+        self.created = False
+
+    def connect(self):
+        # The database is created on first use, not at import time.
+        if not self.created:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Autocommit; writes are grouped explicitly by transaction().
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        if not self.created:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(SCHEMA)
+            self.created = True
+        return db
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Yield a connection inside a write transaction.
+
+        BEGIN IMMEDIATE takes the write lock up front, so a read-then-write
+        (add, claimDue) can't interleave with another process doing the same.
+        """
+        db = self.connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+        finally:
+            db.close()
+
+    def add(self, jobData, now=None):
+        """Record a submission about to be attempted.
+
+        Returns (key, created). created is False if identical job data is
+        already pending, in which case the caller must not submit it again.
+        """
+        now = now or time.time()
+        key = spec_cache.canonicalHash(jobData)
+        with self.transaction() as db:
+            row = db.execute(
+                "SELECT status FROM outbox WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row["status"] == STATUS_PENDING:
+                return key, False
+            # New submission, or a deliberate resubmit of a finished one.
+            db.execute(
+                "INSERT OR REPLACE INTO outbox (key, jobName, jobData, status,"
+                " attempts, created, updated, nextAttempt) VALUES"
+                " (?, ?, ?, ?, 1, ?, ?, ?)",
+                (key, jobData.get("name"), json.dumps(jobData), STATUS_PENDING,
+                 now, now, now + LEASE)
+            )
+            db.execute(
+                "DELETE FROM outbox WHERE status != ? AND updated < ?",
+                (STATUS_PENDING, now - KEEP_DONE)
+            )
+        return key, True
+
+    def claimDue(self, now=None):
+        """Lease every pending record due for a retry.
+
+        Returns (key, jobData, attempts) for each, with attempts counting
+        this one.
+        """
+        now = now or time.time()
+        with self.transaction() as db:
+            rows = db.execute(
+                "SELECT key, jobData, attempts FROM outbox"
+                " WHERE status = ? AND nextAttempt <= ? ORDER BY created",
+                (STATUS_PENDING, now)
+            ).fetchall()
+            db.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, updated = ?,"
+                " nextAttempt = ? WHERE key = ?",
+                [(now, now + LEASE, row["key"]) for row in rows]
+            )
+        return [(row["key"], json.loads(row["jobData"]), row["attempts"] + 1)
+                for row in rows]
+
+    def update(self, key, **fields):
+        fields["updated"] = time.time()
+        assignments = ", ".join("{} = ?".format(name) for name in fields)
+        with self.transaction() as db:
+            db.execute(
+                "UPDATE outbox SET {} WHERE key = ?".format(assignments),
+                list(fields.values()) + [key]
+            )
+
+    def complete(self, key, jobs):
+        """Mark a submission as accepted by Cuebot."""
+        self.update(key, status=STATUS_SUBMITTED, lastError=None, jobs=json.dumps(jobs))
+
+    def fail(self, key, error):
+        """Give up on a submission."""
+        self.update(key, status=STATUS_FAILED, lastError=str(error))
+
+    def retryLater(self, key, error, now=None):
+        """Schedule another attempt after a transient failure.
+
+        Returns the delay in seconds, or None if the record has expired and
+        was marked failed instead.
+        """
+        now = now or time.time()
+        record = self.get(key)
+        if record is None:
+            return None
+        if now - record["created"] > MAX_AGE:
+            self.fail(key, "Gave up after {} attempts: {}".format(record["attempts"], error))
+            return None
+        delay = backoff(record["attempts"])
+        self.update(key, lastError=str(error), nextAttempt=now + delay)
+        return delay
+
+    def cancel(self, key, reason="Cancelled"):
+        """Mark a pending submission failed so the flusher never retries it.
+
+        Returns True if the record was pending.
+        """
+        with self.transaction() as db:
+            cursor = db.execute(
+                "UPDATE outbox SET status = ?, lastError = ?, updated = ?"
+                " WHERE key = ? AND status = ?",
+                (STATUS_FAILED, reason, time.time(), key, STATUS_PENDING)
+            )
+            return cursor.rowcount > 0
+
+    def retryNow(self, key):
+        """Make a pending or failed record due immediately."""
+        self.update(key, status=STATUS_PENDING, nextAttempt=0)
+
+    def drop(self, key):
+        with self.transaction() as db:
+            db.execute("DELETE FROM outbox WHERE key = ?", (key,))
+
+    def get(self, key):
+        db = self.connect()
+        try:
+            row = db.execute("SELECT * FROM outbox WHERE key = ?", (key,)).fetchone()
+            return dict(row) if row is not None else None
+        finally:
+            db.close()
+
+    def records(self, status=None):
+        """Return records (as dicts), newest first, optionally by status."""
+        query = "SELECT * FROM outbox"
+        params = ()
+        if status is not None:
+            query += " WHERE status = ?"
+            params = (status,)
+        db = self.connect()
+        try:
+            rows = db.execute(query + " ORDER BY created DESC", params).fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            db.close()
+
+    def find(self, prefix):
+        """Return the one key starting with prefix, or None."""
+        matches = [r["key"] for r in self.records() if r["key"].startswith(prefix)]
+        return matches[0] if len(matches) == 1 else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the local submission outbox")
+    parser.add_argument("command", choices=["list", "show", "retry", "drop"])
+    parser.add_argument("key", nargs="?", help="Key (or unique prefix)")
+    parser.add_argument("--all", action="store_true",
+                        help="List submitted and failed records too")
+    args = parser.parse_args()
+
+    outbox = Outbox()
+    if args.command == "list":
+        for record in outbox.records(None if args.all else STATUS_PENDING):
+            print("{}  {:<9}  {:>2} attempt(s)  {}  {}".format(
+                record["key"][:12], record["status"], record["attempts"],
+                time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record["created"])),
+                record["jobName"]
+            ))
+            if record["lastError"] and record["status"] != STATUS_SUBMITTED:
+                print("    {}".format(record["lastError"]))
+        return
+
+    key = outbox.find(args.key or "")
+    if key is None:
+        print("No single record matches {!r}".format(args.key), file=sys.stderr)
+        sys.exit(1)
+    if args.command == "show":
+        record = outbox.get(key)
+        for column in COLUMNS:
+            print("{:<12} {}".format(column + ":", record[column]))
+    elif args.command == "retry":
+        outbox.retryNow(key)
+        print("Queued {} for the next flush".format(key[:12]))
+    elif args.command == "drop":
+        outbox.drop(key)
+        print("Dropped {}".format(key[:12]))
+
+
+if __name__ == "__main__":
+    main()